@@ -0,0 +1,225 @@
+"""
+Benchmark cases for the backtest hot paths.
+
+A case's setup(bars, symbols) builds its input outside the timed region and
+returns the zero-argument callable that gets timed. Cases on the "bars" axis
+run once per series length with one symbol; cases on the "symbols" axis run
+once per universe size with SYMBOL_BARS bars per symbol. max_bars skips
+sizes a case is too slow (or, for the database, too large) for.
+
+The database and API cases read from the scratch SQLite database the runner
+points DB_PATH at; Workspace seeds each synthetic symbol into it once.
+"""
+
+import numpy as np
+
+from benchmarks.synthetic import MAX_DAILY_BARS, price_columns, synthetic_ohlcv, synthetic_universe
+
+# bars per symbol for the multi-symbol cases: ten years of daily bars
+SYMBOL_BARS = 2520
+# MA_Crossover parameters used wherever a case needs one strategy's signals
+MA_PARAMS = {"fast_period": 10, "slow_period": 30}
+
+
+class Case:
+    def __init__(self, name: str, setup, axis: str = "bars", max_bars: int | None = None, max_symbols: int | None = None):
+        self.name = name
+        self.setup = setup
+        self.axis = axis
+        self.max_bars = max_bars
+        self.max_symbols = max_symbols
+
+    def accepts(self, bars: int, symbols: int) -> bool:
+        if self.max_bars is not None and bars > self.max_bars:
+            return False
+        return self.max_symbols is None or symbols <= self.max_symbols
+
+
+class Workspace:
+    """
+    Symbols seeded into the scratch database so far, keyed by (bars, seed).
+    """
+    def __init__(self):
+        self.seeded = {}
+
+    def symbol(self, bars: int, seed: int = 0):
+        """
+        (symbol name, frame) for a synthetic series stored in the database.
+        """
+        key = (bars, seed)
+        if key not in self.seeded:
+            from src.database.connection import db_session
+            from src.database.models import insert_stock_columns, invalidate_symbol_catalog
+
+            name = f"B{bars}S{seed}"
+            frame = synthetic_ohlcv(bars, seed)
+            with db_session() as conn:
+                insert_stock_columns(conn, name, price_columns(frame))
+                conn.commit()
+            invalidate_symbol_catalog()
+            self.seeded[key] = (name, frame)
+        return self.seeded[key]
+
+
+workspace = Workspace()
+
+
+def _strategy_signals(name):
+    def setup(bars, symbols):
+        from src.strategies.registry import registry
+
+        strategy = registry.get(name)(**registry.defaults(name))
+        data = synthetic_ohlcv(bars)
+        return lambda: strategy.compute_signals(data)
+    return setup
+
+
+def _strategy_frame(name):
+    def setup(bars, symbols):
+        from src.strategies.registry import registry
+
+        strategy = registry.get(name)(**registry.defaults(name))
+        data = synthetic_ohlcv(bars)
+        return lambda: strategy.generate_signals(data)
+    return setup
+
+
+def _simulate(mode):
+    def setup(bars, symbols):
+        from src.strategies.ma_crossover import MA_Crossover
+
+        strategy = MA_Crossover(**MA_PARAMS)
+        data = synthetic_ohlcv(bars)
+        signals = strategy.compute_signals(data)
+        simulate = {
+            "loop": strategy.simulate_trades,
+            "vectorized": strategy.simulate_trades_vectorized,
+            "kernel": strategy.simulate_trades_kernel,
+        }[mode]
+        return lambda: simulate(data, signals, columnar=True)
+    return setup
+
+
+def _calculate_full_metrics(bars, symbols):
+    from src.backtesting.metrics import calculate_full_metrics
+    from src.backtesting.vectorized import simulate_long_flat
+    from src.strategies.ma_crossover import MA_Crossover
+
+    data = synthetic_ohlcv(bars)
+    signals = MA_Crossover(**MA_PARAMS).compute_signals(data)
+    sim = simulate_long_flat(data["close"].to_numpy(), signals["buy_signal"], signals["sell_signal"])
+    trades = [
+        {"action": "buy" if side > 0 else "sell", "price": price, "shares": shares}
+        for side, price, shares in zip(sim["trade_side"].tolist(), sim["trade_price"].tolist(), sim["trade_shares"].tolist())
+    ]
+    portfolio_values = sim["equity"].tolist()
+    return lambda: calculate_full_metrics("MA_Crossover", MA_PARAMS, 100000, trades, portfolio_values, 0.02)
+
+
+def _batched_metrics(bars, symbols):
+    from src.backtesting.metrics import equity_metrics
+
+    # one sweep block of equity curves
+    rng = np.random.default_rng(0)
+    curves = 100000 * np.cumprod(1 + rng.normal(0.0002, 0.01, (bars, 256)), axis=0)
+    return lambda: equity_metrics(curves, 0.02, 100000)
+
+
+def _get_stock_data(bars, symbols):
+    from src.database.models import get_stock_data
+
+    name, _ = workspace.symbol(bars)
+    return lambda: get_stock_data(name, columnar=True)
+
+
+def _get_stock_data_universe(bars, symbols):
+    from src.database.models import get_stock_data
+
+    names = [workspace.symbol(bars, seed)[0] for seed in range(symbols)]
+    return lambda: [get_stock_data(name, columnar=True) for name in names]
+
+
+def _price_frame(bars, symbols):
+    from src.database.cache import frame_from_columns
+    from src.database.models import get_stock_data
+
+    name, frame = workspace.symbol(bars)
+    columns = get_stock_data(name, columnar=True)
+    start, end = frame.index[0], frame.index[-1]
+    # what run_backtest builds after the read: the frame, sliced to the range
+    return lambda: frame_from_columns(columns).loc[start:end]
+
+
+def _api_backtest(cached):
+    def setup(bars, symbols):
+        from fastapi.testclient import TestClient
+        from src.api.server import app
+        from src.database.result_cache import result_cache
+
+        name, frame = workspace.symbol(bars)
+        client = TestClient(app)
+        body = {
+            "symbol": name,
+            "start_date": frame.index[0].strftime("%Y-%m-%d"),
+            "end_date": frame.index[-1].strftime("%Y-%m-%d"),
+            "strategy": "Moving Average Crossover",
+            "initial_cash": 100000,
+            "strategy_params": MA_PARAMS,
+        }
+
+        def run():
+            if not cached:
+                result_cache.clear(disk=True)
+            res = client.post("/backtest", json=body)
+            if res.status_code != 200:
+                raise RuntimeError(f"/backtest returned {res.status_code}: {res.text[:200]}")
+            return res
+
+        run()  # warm the price cache (and the result cache for the cached case)
+        return run
+    return setup
+
+
+def _portfolio(bars, symbols):
+    from src.backtesting.portfolio import PortfolioBacktestingEngine
+    from src.strategies.ma_crossover import MA_Crossover
+
+    frames = synthetic_universe(symbols, bars)
+    engine = PortfolioBacktestingEngine(MA_Crossover, MA_PARAMS)
+    return lambda: engine.run(frames)
+
+
+def _sweep(bars, symbols):
+    from src.backtesting.sweep import run_parameter_sweep
+    from src.strategies.ma_crossover import MA_Crossover
+
+    data = synthetic_ohlcv(bars)
+    grid = {"fast_period": list(range(5, 30, 5)), "slow_period": list(range(40, 120, 20))}
+    return lambda: run_parameter_sweep(data, MA_Crossover, grid)
+
+
+def build_cases() -> list:
+    from src.backtesting.kernel import HAVE_NUMBA
+    from src.strategies.registry import registry
+
+    cases = []
+    for name in registry.names():
+        slug = registry.get(name).__name__
+        cases.append(Case(f"signals.{slug}", _strategy_signals(name)))
+        cases.append(Case(f"generate_signals.{slug}", _strategy_frame(name)))
+    cases += [
+        # the python bar loops get the smaller sizes
+        Case("simulate.loop", _simulate("loop"), max_bars=1_000_000),
+        Case("simulate.vectorized", _simulate("vectorized"), max_bars=1_000_000),
+        Case("simulate.kernel", _simulate("kernel"), max_bars=None if HAVE_NUMBA else 1_000_000),
+        Case("metrics.calculate_full_metrics", _calculate_full_metrics),
+        Case("metrics.equity_metrics_batched", _batched_metrics, max_bars=100_000),
+        Case("sweep.ma_crossover_20", _sweep, max_bars=1_000_000),
+        Case("database.get_stock_data", _get_stock_data, max_bars=MAX_DAILY_BARS),
+        Case("api.price_frame", _price_frame, max_bars=MAX_DAILY_BARS),
+        Case("api.backtest", _api_backtest(cached=False), max_bars=MAX_DAILY_BARS),
+        Case("api.backtest_cached", _api_backtest(cached=True), max_bars=MAX_DAILY_BARS),
+        Case("database.get_stock_data", _get_stock_data_universe, axis="symbols"),
+        Case("portfolio.ma_crossover", _portfolio, axis="symbols"),
+    ]
+    return cases
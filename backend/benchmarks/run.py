@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Benchmark runner for the backtest hot paths.
+
+Times every case in benchmarks/cases.py over synthetic data, writes the
+results as JSON and compares them with a stored baseline. Run from backend/:
+
+    python -m benchmarks.run                       # quick profile, compare with benchmarks/baseline.json
+    python -m benchmarks.run --profile full        # up to 10M bars and 500 symbols
+    python -m benchmarks.run -k simulate -o out.json
+    python -m benchmarks.run --save-baseline       # record this machine's numbers as the baseline
+
+A result is a regression when its best time is more than --tolerance
+(default 25%) slower than the baseline's and at least MIN_REGRESSION_SECONDS
+slower in absolute terms; the exit status is 1 if there is any.
+Baselines are machine-specific, so compare runs from the same machine.
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+PROFILES = {
+    "quick": {"bars": [1_000, 10_000, 100_000], "symbols": [1, 10]},
+    "full": {"bars": [1_000, 10_000, 100_000, 1_000_000, 10_000_000], "symbols": [1, 10, 100, 500]},
+}
+
+# timing: at least MIN_REPEATS runs, more until MIN_SECONDS have passed, at most MAX_REPEATS
+MIN_REPEATS = 3
+MAX_REPEATS = 50
+MIN_SECONDS = 0.5
+# differences below this are timer noise, never a regression
+MIN_REGRESSION_SECONDS = 0.001
+
+
+def result_key(result: dict) -> str:
+    return f"{result['name']}[bars={result['bars']},symbols={result['symbols']}]"
+
+
+def time_call(func, min_repeats: int = MIN_REPEATS, max_repeats: int = MAX_REPEATS, min_seconds: float = MIN_SECONDS) -> list:
+    """
+    Wall-clock seconds of repeated func() calls, with the garbage collector
+    paused inside each timed call and the endpoints' request logging muted.
+    """
+    times = []
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        while len(times) < max_repeats and (len(times) < min_repeats or time.perf_counter() - started < min_seconds):
+            gc.collect()
+            gc.disable()
+            try:
+                t0 = time.perf_counter()
+                func()
+                times.append(time.perf_counter() - t0)
+            finally:
+                gc.enable()
+    return times
+
+
+def run_benchmarks(cases, bar_sizes, symbol_counts, pattern: str | None = None, log=print, **timing) -> list:
+    """
+    One result per (case, size): {"name", "bars", "symbols", "repeats",
+    "min", "median", "mean"} in seconds, plus "bars_per_second" (all
+    symbols' bars over the best time)
+    """
+    results = []
+    for case in cases:
+        if pattern and pattern not in case.name:
+            continue
+        if case.axis == "symbols":
+            from benchmarks.cases import SYMBOL_BARS
+            sizes = [(SYMBOL_BARS, symbols) for symbols in symbol_counts]
+        else:
+            sizes = [(bars, 1) for bars in bar_sizes]
+        for bars, symbols in sizes:
+            if not case.accepts(bars, symbols):
+                continue
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                func = case.setup(bars, symbols)
+            times = time_call(func, **timing)
+            del func
+            best = min(times)
+            result = {
+                "name": case.name,
+                "bars": bars,
+                "symbols": symbols,
+                "repeats": len(times),
+                "min": best,
+                "median": statistics.median(times),
+                "mean": statistics.fmean(times),
+                "bars_per_second": bars * symbols / best if best > 0 else None,
+            }
+            results.append(result)
+            log(f"{result_key(result):<60} {best * 1000:>12.3f} ms  (median {result['median'] * 1000:.3f} ms, {len(times)} runs)")
+    return results
+
+
+def compare(results: list, baseline: list, tolerance: float = 0.25) -> dict:
+    """
+    {"regressions", "improvements", "unchanged", "new"} lists of
+    {"key", "baseline", "current", "change"} (best times, change as a
+    fraction of the baseline); "new" holds keys the baseline doesn't have
+    """
+    previous = {result_key(r): r for r in baseline}
+    report = {"regressions": [], "improvements": [], "unchanged": [], "new": []}
+    for result in results:
+        key = result_key(result)
+        if key not in previous:
+            report["new"].append({"key": key, "baseline": None, "current": result["min"], "change": None})
+            continue
+        before, now = previous[key]["min"], result["min"]
+        row = {"key": key, "baseline": before, "current": now, "change": (now - before) / before if before > 0 else None}
+        if now - before > MIN_REGRESSION_SECONDS and now > before * (1 + tolerance):
+            report["regressions"].append(row)
+        elif before - now > MIN_REGRESSION_SECONDS and now < before * (1 - tolerance):
+            report["improvements"].append(row)
+        else:
+            report["unchanged"].append(row)
+    return report
+
+
+def environment() -> dict:
+    import numpy as np
+    import pandas as pd
+    from src.backtesting.kernel import HAVE_NUMBA
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "numba": HAVE_NUMBA,
+    }
+
+
+def _print_report(report: dict, tolerance: float):
+    for label in ("regressions", "improvements"):
+        rows = report[label]
+        if rows:
+            print(f"\n{label} (beyond {tolerance:.0%}):")
+            for row in rows:
+                print(f"  {row['key']:<60} {row['baseline'] * 1000:>10.3f} -> {row['current'] * 1000:.3f} ms ({row['change']:+.1%})")
+    print(f"\n{len(report['regressions'])} regressions, {len(report['improvements'])} improvements, "
+          f"{len(report['unchanged'])} unchanged, {len(report['new'])} not in baseline")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the backtest hot paths over synthetic data")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--bars", type=int, nargs="+", help="series lengths (overrides the profile)")
+    parser.add_argument("--symbols", type=int, nargs="+", help="universe sizes (overrides the profile)")
+    parser.add_argument("-k", "--filter", help="only cases whose name contains this")
+    parser.add_argument("-o", "--output", help="write the results JSON here")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="baseline JSON to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="slowdown that counts as a regression (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    # cases read and write a scratch database, never data/backtester.db,
+    # and stay on the SQLite reads so nothing is exported to Arrow
+    scratch = tempfile.TemporaryDirectory(prefix="backtest-bench-")
+    os.environ["DB_PATH"] = str(Path(scratch.name) / "bench.db")
+    os.environ.pop("PRICE_STORE", None)
+
+    from benchmarks.cases import build_cases
+    from src.database.connection import pool
+    from src.database.models import create_tables
+
+    create_tables()
+    profile = PROFILES[args.profile]
+    try:
+        results = run_benchmarks(
+            build_cases(),
+            args.bars or profile["bars"],
+            args.symbols or profile["symbols"],
+            pattern=args.filter,
+        )
+    finally:
+        pool.close_all()
+        scratch.cleanup()
+
+    payload = {"profile": args.profile, "environment": environment(), "results": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(payload, indent=2) + "\n")
+        print(f"\nWrote {len(results)} results to {args.output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(payload, indent=2) + "\n")
+        print(f"\nSaved baseline to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path}; record one with --save-baseline")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text())
+    report = compare(results, baseline["results"], args.tolerance)
+    if args.output:
+        payload["comparison"] = {"baseline": str(baseline_path), "tolerance": args.tolerance, **report}
+        Path(args.output).write_text(json.dumps(payload, indent=2) + "\n")
+    _print_report(report, args.tolerance)
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
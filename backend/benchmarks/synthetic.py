@@ -0,0 +1,58 @@
+"""
+Synthetic OHLCV data for the benchmarks.
+
+Prices are a seeded geometric random walk, so every run (and every machine)
+times exactly the same input. Up to MAX_DAILY_BARS the bars are daily, which
+is what the database stores; longer series switch to minute bars so the
+dates stay inside pandas' Timestamp range.
+"""
+
+import numpy as np
+import pandas as pd
+
+# daily bars from 1900-01-01 stay well inside pandas' Timestamp range
+MAX_DAILY_BARS = 100_000
+
+
+def synthetic_ohlcv(bars: int, seed: int = 0, start: str | None = None) -> pd.DataFrame:
+    """
+    One symbol's OHLCV frame with a 'date' DatetimeIndex, like
+    get_price_frame returns. start overrides the first date.
+    """
+    rng = np.random.default_rng(seed)
+    daily = bars <= MAX_DAILY_BARS
+    # minute bars get a minute's share of a day's drift and volatility, which
+    # also keeps a 10M-bar walk from overflowing
+    drift, vol = (0.0002, 0.015) if daily else (0.0002 / 390, 0.015 / 390 ** 0.5)
+    close = 100.0 * np.cumprod(1.0 + rng.normal(drift, vol, bars))
+    gap = rng.normal(0.0, 0.003, bars)
+    open_ = close * (1.0 + gap)
+    spread = np.abs(rng.normal(0.0, 0.006, bars)) * close
+    if daily:
+        dates = pd.date_range(start or "1900-01-01", periods=bars, freq="D", name="date")
+    else:
+        dates = pd.date_range(start or "1990-01-01", periods=bars, freq="min", name="date")
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.integers(1_000, 1_000_000, bars),
+    }, index=dates)
+
+
+def synthetic_universe(symbols: int, bars: int, seed: int = 0) -> dict:
+    """
+    {symbol: frame} for `symbols` date-aligned symbols (SYM000, SYM001, ...).
+    """
+    return {f"SYM{i:03d}": synthetic_ohlcv(bars, seed + i) for i in range(symbols)}
+
+
+def price_columns(frame: pd.DataFrame) -> dict:
+    """
+    The frame as the dict of arrays insert_stock_columns takes.
+    """
+    return {
+        "date": frame.index.values.astype("datetime64[ns]"),
+        **{col: frame[col].to_numpy() for col in ("open", "high", "low", "close", "volume")},
+    }
@@ -4,9 +4,12 @@ Clear all data from the database
 """
 
 from src.database.connection import get_db_connection
+from src.database.models import create_tables
 
 def clear_database():
     """Clear all data from the stock_data table"""
+    # Databases from before the symbols catalog don't have it yet
+    create_tables()
     conn = get_db_connection()
     cursor = conn.cursor()
     
@@ -14,8 +17,9 @@ def clear_database():
     cursor.execute("SELECT COUNT(*) FROM stock_data")
     count_before = cursor.fetchone()[0]
     
-    # Clear all data
+    # Clear all data (and the per-symbol catalog that describes it)
     cursor.execute("DELETE FROM stock_data")
+    cursor.execute("DELETE FROM symbols")
     
     # Reset auto-increment counter
     cursor.execute("DELETE FROM sqlite_sequence WHERE name='stock_data'")
@@ -0,0 +1,35 @@
+import pytest
+
+import src.database.connection as connection
+from src.database.cache import ohlcv_cache
+from src.database.models import create_tables, invalidate_symbol_catalog
+from src.database.result_cache import result_cache
+
+
+def _clear_caches():
+    ohlcv_cache.invalidate()
+    result_cache.clear()
+    invalidate_symbol_catalog()
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """
+    Path of a fresh backtester.db under tmp_path that every connection opens
+    instead of data/backtester.db; no tables yet. The process-wide price,
+    result and catalog caches are cleared around the test.
+    """
+    path = tmp_path / "backtester.db"
+    monkeypatch.setattr(connection, "get_db_path", lambda: path)
+    _clear_caches()
+    yield path
+    _clear_caches()
+
+
+@pytest.fixture
+def db(db_path):
+    """
+    db_path with the tables created.
+    """
+    create_tables()
+    return db_path
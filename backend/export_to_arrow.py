@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Export every symbol in the SQLite stock_data table to the columnar
+Arrow store (arrow/<SYMBOL>.arrow beside the database). Run with
+PRICE_STORE=arrow on the server afterwards to read from it.
+"""
+
+import sys
+import time
+
+from src.database.models import create_tables, export_to_columnar_store
+from src.database.columnar_store import get_store_dir
+
+def export_database(symbols=None):
+    create_tables()
+
+    start = time.perf_counter()
+    written = export_to_columnar_store(symbols)
+    elapsed = time.perf_counter() - start
+
+    for symbol, rows in written.items():
+        print(f"{symbol}: {rows} rows")
+    print(f"\nExported {len(written)} symbols ({sum(written.values())} rows) to {get_store_dir()} in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    # Optional symbol list on the command line, default everything
+    export_database([s.upper() for s in sys.argv[1:]] or None)
@@ -3,65 +3,64 @@
 Fetch real stock data from Alpha Vantage and store in database
 """
 
+import json
+import os
+import sys
+from pathlib import Path
+
 from src.data.alpha_vantage_fetcher import AlphaVantageFetcher
-from src.database.models import create_tables
+from src.data.ingest import ingest_symbols
+from src.database.models import create_tables, sync_columnar_store, insert_stock_columns
 from src.database.connection import get_db_connection
 
-def insert_stock_data(data):
-    """Insert stock data into the database"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Insert data (ignore duplicates due to UNIQUE constraint)
-    cursor.executemany('''
-        INSERT OR IGNORE INTO stock_data 
-        (symbol, date, open, high, low, close, volume)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', [
-        (row['symbol'], row['date'], row['open'], row['high'], 
-         row['low'], row['close'], row['volume'])
-        for row in data
-    ])
-    
+def insert_stock_columns_and_commit(conn, symbol, columns):
+    """Bulk insert one symbol's fetched arrays and commit; returns rows inserted"""
+    inserted = insert_stock_columns(conn, symbol, columns)
     conn.commit()
-    conn.close()
-    print(f"Inserted {len(data)} records into database")
+    sync_columnar_store([symbol])
+    print(f"Inserted {inserted} of {len(columns['date'])} records for {symbol}")
+    return inserted
 
-def fetch_and_store_data():
-    """Fetch real data for symbols and store in database"""
+def load_symbol_universe():
+    """Tickers from data/symbols.json"""
+    symbols_path = Path(__file__).parent / "data" / "symbols.json"
+    with symbols_path.open() as f:
+        return [str(s).upper() for s in json.load(f)]
+
+def fetch_and_store_data(symbols=None):
+    """Fetch real data for symbols (default: data/symbols.json) and store in database"""
     
     # Your API key
-    API_KEY = 'TMD1NUWLD8WDMQOV'
+    API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY', 'TMD1NUWLD8WDMQOV')
     
-    # Symbols to fetch (using your original symbols)
-    symbols = ['AAPL', 'MSFT', 'TSLA', 'AMZN', 'NVDA', 'META', 'NFLX', 'AMD']
+    if symbols is None:
+        symbols = load_symbol_universe()
     
     # Create tables if they don't exist
     create_tables()
     
-    # Initialize fetcher
+    # Rate comes from ALPHA_VANTAGE_RPM (default 5/minute, the free tier)
     fetcher = AlphaVantageFetcher(API_KEY)
+    rpm = fetcher.rate_limiter.rate * 60
     
     print(f"Fetching real data for {len(symbols)} symbols...")
-    print("Note: Alpha Vantage free tier allows 5 requests per minute")
-    print("This will take about 2 minutes to complete...")
-    
-    # Fetch data for all symbols
-    all_data = fetcher.fetch_multiple_symbols(symbols, delay=12.0)  # 12 seconds between requests
+    print(f"Rate limit: {rpm:g} requests per minute, about {len(symbols) / rpm:.1f} minutes")
     
-    # Store data in database
-    total_records = 0
-    for symbol, data in all_data.items():
-        if data:
-            print(f"\nStoring {len(data)} records for {symbol}...")
-            insert_stock_data(data)
-            total_records += len(data)
-        else:
-            print(f"No data to store for {symbol}")
+    # Fetches run concurrently; every write goes through this one connection
+    conn = get_db_connection()
+    try:
+        summary = ingest_symbols(
+            fetcher, symbols,
+            lambda symbol, columns: insert_stock_columns_and_commit(conn, symbol, columns),
+        )
+    finally:
+        conn.close()
     
     print(f"\n=== SUMMARY ===")
-    print(f"Successfully fetched data for {len(all_data)} symbols")
-    print(f"Total records stored: {total_records}")
+    print(f"Successfully fetched data for {len(summary['fetched'])} symbols")
+    if summary['failed']:
+        print(f"Failed: {', '.join(summary['failed'])}")
+    print(f"Total records stored: {summary['rows']}")
     
     # Show date ranges for each symbol
     from src.database.models import get_date_range, get_available_symbols
@@ -73,4 +72,5 @@ def fetch_and_store_data():
         print(f"{symbol}: {start} to {end}")
 
 if __name__ == "__main__":
-    fetch_and_store_data()
+    # Optional symbol list on the command line, default the symbols.json universe
+    fetch_and_store_data([s.upper() for s in sys.argv[1:]] or None)
@@ -1,25 +1,96 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+import numpy as np
 import pandas as pd
 from datetime import datetime, date
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
+import contextvars
+import functools
 import json
+import logging
+import math
 import os
 from dotenv import load_dotenv
 
-from src.database.models import get_available_symbols, get_date_range, get_stock_data
-from src.database.connection import get_db_connection
-from src.data.alpha_vantage_fetcher import AlphaVantageFetcher
-from src.strategies.ma_crossover import MA_Crossover
-from src.strategies.bollinger_breakout import BollingerBreakout
+from src.database.models import (
+    get_symbol_info,
+    create_tables, get_available_symbols, get_date_range, symbol_exists,
+    update_symbol_catalog, invalidate_symbol_catalog, sync_columnar_store,
+    insert_stock_columns,
+)
+from src.database.connection import db_session, with_db_session, run_in_db_session, pool
+from src.database.cache import get_price_frame, ohlcv_cache
+from src.database.result_cache import result_cache, result_cache_key
+from src.data.alpha_vantage_fetcher import AlphaVantageFetcher, choose_outputsize
+from src.data.ingest import ingest_symbols
+from src.data.refresher import BackgroundRefresher
+from src.data.singleflight import SingleFlight
+from src.strategies.registry import registry
 from src.backtesting.engine import BacktestingEngine
-
-app = FastAPI()
+from src.backtesting.kernel import check_execution
+from src.backtesting.sweep import MAX_SWEEP_COMBINATIONS, expand_param_values, param_grid_size, run_parameter_sweep
+from src.backtesting.batch import BatchExecutor
+from src.backtesting.walk_forward import WalkForwardEngine
+from src.backtesting.portfolio import PortfolioBacktestingEngine
+from src.jobs.queue import JobQueue, QueueFullError
+from src.monitoring.prometheus import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry as metrics_registry
+from src.monitoring.timing import TimingMiddleware, span
 
 # Load environment variables from backend/.env if present
 load_dotenv()
 
+# LOG_LEVEL=DEBUG also logs every request (parameters, fetches, rows read)
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(levelname)s:     %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Worker processes for sweeps and batches; BATCH_WORKERS defaults to all cores
+batch_executor = BatchExecutor(int(os.getenv("BATCH_WORKERS", "0")) or None)
+
+# Single backtests and sweep dispatch run here, off the event loop and off the
+# threadpool serving DB calls; BACKTEST_WORKERS bounds them (default: cores)
+cpu_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BACKTEST_WORKERS", "0")) or os.cpu_count(),
+    thread_name_prefix="backtest",
+)
+
+async def _run_cpu(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # Carry the request's context over, so timing spans inside func count
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(cpu_executor, context.run, functools.partial(func, *args, **kwargs))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Make sure stock_data and the symbols catalog exist (and backfill the catalog)
+    create_tables()
+    # Pick up jobs the previous process left queued or running
+    resumed = await job_queue.start()
+    if resumed:
+        logger.info("Resumed %d unfinished jobs", resumed)
+    # Keep catalogued symbols current so requests rarely wait on a fetch;
+    # REFRESH_INTERVAL_MINUTES=0 turns it off
+    refresher = None
+    refresh_minutes = float(os.getenv("REFRESH_INTERVAL_MINUTES", "360"))
+    if refresh_minutes > 0 and os.getenv('ALPHA_VANTAGE_API_KEY'):
+        refresher = BackgroundRefresher(refresh_stale_symbols, refresh_minutes * 60).start()
+    yield
+    if refresher is not None:
+        refresher.stop()
+    await job_queue.shutdown()
+    batch_executor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+
 # Add CORS middleware
 frontend_origin = os.getenv("FRONTEND_ORIGIN")
 allowed_origins = ["http://localhost:3000"]
@@ -32,6 +103,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Request latency for /metrics; stage spans and Server-Timing with SERVER_TIMING=1
+app.add_middleware(TimingMiddleware)
 
 class BacktestRequest(BaseModel):
     symbol: str
@@ -40,6 +113,78 @@ class BacktestRequest(BaseModel):
     strategy: str
     initial_cash: float
     strategy_params: dict = {}
+    # "records" (default) or "columnar"; when unset the Accept header decides
+    response_format: str | None = None
+    # Optional exits and sizing (fractions, e.g. 0.05 = 5%); setting any of
+    # them runs the compiled execution kernel (src/backtesting/kernel.py)
+    stop_loss: float | None = None
+    take_profit: float | None = None
+    trailing_stop: float | None = None
+    position_size: float | None = None
+
+class SweepRequest(BaseModel):
+    symbol: str
+    start_date: str
+    end_date: str
+    strategy: str
+    initial_cash: float = 100000
+    # parameter name -> list of values or {"start": .., "stop": .., "step": ..} (stop inclusive)
+    param_grid: dict
+    sort_by: str = "sharpe_ratio"
+    ascending: bool = False
+    top_n: int | None = None
+
+class WalkForwardRequest(BaseModel):
+    symbol: str
+    start_date: str
+    end_date: str
+    strategy: str
+    initial_cash: float = 100000
+    # same format as SweepRequest.param_grid
+    param_grid: dict
+    # bars optimized over, then traded out of sample, per fold
+    train_bars: int = 252
+    test_bars: int = 63
+    # train every fold from the first bar instead of a rolling window
+    anchored: bool = False
+    sort_by: str = "sharpe_ratio"
+    ascending: bool = False
+
+class BatchJobRequest(BaseModel):
+    symbol: str
+    strategy: str
+    strategy_params: dict = {}
+
+class BatchRequest(BaseModel):
+    start_date: str
+    end_date: str
+    initial_cash: float = 100000
+    jobs: list[BatchJobRequest]
+    # include trades and per-bar series in each result (columnar shape)
+    include_series: bool = False
+
+class PortfolioRequest(BaseModel):
+    # None: every curated symbol (data/symbols.json) already in the database
+    symbols: list[str] | None = None
+    start_date: str
+    end_date: str
+    strategy: str
+    initial_cash: float = 100000
+    strategy_params: dict = {}
+    # symbol -> fraction of initial_cash; equal split when omitted
+    weights: dict[str, float] | None = None
+
+class JobRequest(BaseModel):
+    # "backtest", "sweep", "walk_forward", "portfolio" or "batch"
+    kind: str
+    # body of the matching endpoint (POST /backtest, /backtest/sweep, ...)
+    request: dict
+
+# Accept header value that opts into the columnar payload
+COLUMNAR_MEDIA_TYPE = "application/vnd.quantlab.columnar+json"
+RESPONSE_FORMATS = ("records", "columnar")
+# per-bar series in the columnar payload, already plain JSON-ready lists
+COLUMNAR_SERIES_KEYS = ("dates", "portfolio_values", "candles", "fast_ma", "slow_ma", "upper_band", "lower_band")
 
 
 @app.get("/")
@@ -52,6 +197,17 @@ def get_symbols():
     Returns list of all available tickers for selection.
     Prefers curated list from data/symbols.json; falls back to DB symbols.
     '''
+    symbols = _curated_symbols()
+    if symbols is not None:
+        return {"symbols": symbols}
+
+    symbols = get_available_symbols()
+    return {"symbols": symbols}
+
+def _curated_symbols() -> list[str] | None:
+    '''
+    Uppercased tickers from data/symbols.json, or None if it can't be read
+    '''
     try:
         # backend/src/api/server.py -> backend/data/symbols.json
         backend_dir = Path(__file__).parent.parent.parent
@@ -60,63 +216,193 @@ def get_symbols():
             with symbols_path.open("r") as f:
                 symbols = json.load(f)
                 # Ensure list of strings and uppercase
-                symbols = [str(s).upper() for s in symbols if isinstance(s, str)]
-                return {"symbols": symbols}
+                return [str(s).upper() for s in symbols if isinstance(s, str)]
     except Exception:
         # On any issue reading JSON, fall back to DB
         pass
-
-    symbols = get_available_symbols()
-    return {"symbols": symbols}
+    return None
 
 def _insert_ohlcv_rows(rows):
     if not rows:
         return 0
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute('PRAGMA journal_mode=WAL;')
-        cursor.executemany(
-            '''
-            INSERT OR IGNORE INTO stock_data (symbol, date, open, high, low, close, volume)
-            VALUES (:symbol, :date, :open, :high, :low, :close, :volume)
-            ''',
-            rows,
-        )
-        conn.commit()
-        return cursor.rowcount or 0
-    finally:
-        conn.close()
+    with db_session() as conn:
+        # Commits, or rolls back if the insert fails
+        symbols = {row['symbol'] for row in rows}
+        with conn:
+            cursor = conn.executemany(
+                '''
+                INSERT OR IGNORE INTO stock_data (symbol, date, open, high, low, close, volume)
+                VALUES (:symbol, :date, :open, :high, :low, :close, :volume)
+                ''',
+                rows,
+            )
+            inserted = cursor.rowcount or 0
+            update_symbol_catalog(conn, symbols)
+    _prices_written(symbols)
+    return inserted
+
+def _insert_price_columns(symbol: str, columns: dict) -> int:
+    if len(columns['date']) == 0:
+        return 0
+    with db_session() as conn:
+        with conn:
+            inserted = insert_stock_columns(conn, symbol, columns)
+    _prices_written([symbol])
+    return inserted
+
+def _prices_written(symbols):
+    # After commit: refresh the catalog mirror, Arrow replica and cached frames
+    invalidate_symbol_catalog()
+    sync_columnar_store(symbols)
+    for symbol in symbols:
+        ohlcv_cache.invalidate(symbol)
 
-def _fetch_alpha_and_upsert(symbol: str, since_date: str | None = None) -> int:
+# One fetcher per API key, so every request shares its rate limiter
+_fetchers: dict[str, AlphaVantageFetcher] = {}
+
+def _alpha_fetcher() -> AlphaVantageFetcher:
     api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
     if not api_key:
         raise HTTPException(status_code=500, detail='ALPHA_VANTAGE_API_KEY not set')
-    fetcher = AlphaVantageFetcher(api_key)
-    data = fetcher.fetch_stock_data(symbol)
-    if not data:
+    fetcher = _fetchers.get(api_key)
+    if fetcher is None:
+        # A request waits through at most one rate-limit retry
+        fetcher = _fetchers.setdefault(api_key, AlphaVantageFetcher(api_key, max_retries=1))
+    return fetcher
+
+# Alpha Vantage downloads in progress, by symbol
+_fetches = SingleFlight()
+
+PRICE_FETCHES = metrics_registry.counter(
+    "backtester_price_fetches_total",
+    "Requests that waited on an Alpha Vantage download, by kind (full, incremental) and whether they joined one already running",
+    ("kind", "shared"),
+)
+
+async def _fetch_alpha_and_upsert(symbol: str, since_date: str | None = None) -> int:
+    fetcher = _alpha_fetcher()
+    # Only the latest 100 bars when that covers the gap since since_date
+    outputsize = choose_outputsize(since_date)
+    columns = await fetcher.fetch_stock_columns_async(symbol, outputsize)
+    if columns is not None and outputsize == 'compact' and columns['date'][0] > np.datetime64(since_date):
+        columns = await fetcher.fetch_stock_columns_async(symbol)
+    if columns is None or len(columns['date']) == 0:
         raise HTTPException(status_code=400, detail=f"Failed to fetch data for symbol '{symbol}' from Alpha Vantage")
     if since_date:
-        data = [r for r in data if r['date'] >= since_date]
-    return _insert_ohlcv_rows(data)
+        columns = _columns_since(columns, since_date, inclusive=True)
+    return await run_in_db_session(_insert_price_columns, symbol, columns)
+
+async def _ensure_prices(symbol: str, since_date: str | None = None) -> int:
+    '''
+    _fetch_alpha_and_upsert, shared by every request that needs the same
+    symbol while a fetch for it is already running
+    '''
+    PRICE_FETCHES.inc(kind="incremental" if since_date else "full", shared=str(_fetches.in_flight(symbol)).lower())
+    return await _fetches.do(symbol, lambda: _fetch_alpha_and_upsert(symbol, since_date))
+
+def _columns_since(columns: dict, since_date: str, inclusive: bool = False) -> dict:
+    # Dates are ascending, so the cut is one binary search
+    side = 'left' if inclusive else 'right'
+    start = np.searchsorted(columns['date'], np.datetime64(since_date), side=side)
+    return {name: values[start:] for name, values in columns.items()}
+
+def refresh_stale_symbols(today: str | None = None) -> dict:
+    '''
+    Fetch new bars for every catalogued symbol whose last stored date is
+    before the last completed weekday, compact where the gap allows.
+    Symbols already fetched on `today` are skipped, e.g. over holidays.
+    Returns the ingest summary.
+    '''
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    expected = str(np.busday_offset(today, -1, roll='forward'))
+
+    # Sessions cover the catalog read and each write only, never the
+    # downloads in between, so a refresh doesn't pin a pooled connection
+    stale = {}
+    with db_session():
+        for symbol in get_available_symbols():
+            info = get_symbol_info(symbol)
+            # last_fetched_at is an ISO timestamp, so it sorts after its own date
+            if info['last_date'] >= expected or (info['last_fetched_at'] or '') >= today:
+                continue
+            stale[symbol] = info['last_date']
+    if not stale:
+        return {"rows": 0, "fetched": [], "failed": []}
+
+    def write(symbol, columns):
+        return _insert_price_columns(symbol, _columns_since(columns, stale[symbol]))
+
+    outputsizes = {symbol: choose_outputsize(last, today) for symbol, last in stale.items()}
+    summary = ingest_symbols(_alpha_fetcher(), list(stale), write, outputsize=outputsizes)
+    logger.info("Refreshed %d symbols: %d new rows", len(summary['fetched']), summary['rows'])
+    return summary
 
 @app.get("/strategies")
 def get_strategies():
     '''
-    returns list of all available strategies
+    returns list of all available strategies, plus each one's parameters
+    (type, default, valid range)
+    '''
+    names = registry.names()
+    return {"strategies": names, "schemas": {name: registry.schema(name) for name in names}}
+
+def _resolve_strategy(name: str, params: dict):
+    '''
+    (strategy class, every parameter with defaults filled in and validated);
+    unknown strategies and bad parameters are a 400
+    '''
+    try:
+        return registry.get(name), registry.resolve_params(name, params)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    '''
+    hit/miss counters and sizes of the price and backtest result caches
     '''
-    return {"strategies": ["Moving Average Crossover", "Bollinger Breakout"]}
+    return {"prices": ohlcv_cache.stats(), "results": result_cache.stats()}
+
+@metrics_registry.register_collector
+def _component_metrics():
+    # Counters the caches and the connection pool keep themselves, read at scrape time
+    prices, results, connections = ohlcv_cache.stats(), result_cache.stats(), pool.stats()
+    return [
+        ("backtester_price_cache_hits_total", "counter", "Price frame cache hits", [({}, prices["hits"])]),
+        ("backtester_price_cache_misses_total", "counter", "Price frame cache misses (database reads)", [({}, prices["misses"])]),
+        ("backtester_price_cache_hit_ratio", "gauge", "Price frame cache hits over lookups since start", [({}, prices["hit_rate"])]),
+        ("backtester_price_cache_bytes", "gauge", "Memory held by cached price frames", [({}, prices["bytes"])]),
+        ("backtester_price_cache_symbols", "gauge", "Symbols in the price frame cache", [({}, prices["symbols"])]),
+        ("backtester_result_cache_hits_total", "counter", "Backtest result cache hits by tier",
+            [({"tier": "memory"}, results["memory_hits"]), ({"tier": "disk"}, results["disk_hits"])]),
+        ("backtester_result_cache_misses_total", "counter", "Backtest result cache misses", [({}, results["misses"])]),
+        ("backtester_result_cache_hit_ratio", "gauge", "Backtest result cache hits over lookups since start", [({}, results["hit_rate"])]),
+        ("backtester_result_cache_bytes", "gauge", "Memory held by the in-memory result cache tier", [({}, results["bytes"])]),
+        ("backtester_db_connections_created_total", "counter", "SQLite connections opened by the pool", [({}, connections["created"])]),
+        ("backtester_db_connections", "gauge", "Pooled SQLite connections by state",
+            [({"state": "idle"}, connections["idle"]), ({"state": "in_use"}, connections["in_use"])]),
+    ]
+
+@app.get("/metrics")
+def get_metrics():
+    '''
+    prometheus text format: request latency and stage histograms, cache hit
+    rates, database connections and Alpha Vantage fetch counts
+    '''
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
 
 @app.get("/symbols/{symbol}/dates")
+@with_db_session
 def get_symbol_dates(symbol: str):
     '''
     returns available date range for a specific symbol
     '''
-    available_symbols = get_available_symbols()
-    if symbol not in available_symbols:
+    if not symbol_exists(symbol):
         raise HTTPException(
             status_code=404, 
-            detail=f"Symbol '{symbol}' not found. Available symbols: {available_symbols}"
+            detail=f"Symbol '{symbol}' not found. Available symbols: {get_available_symbols()}"
         )
     
     start_date, end_date = get_date_range(symbol)
@@ -126,103 +412,509 @@ def get_symbol_dates(symbol: str):
         "end_date": end_date
     }
 
+def _wants_columnar(response_format: str | None, accept: str | None) -> bool:
+    if response_format is None:
+        return bool(accept) and COLUMNAR_MEDIA_TYPE in accept
+    if response_format not in RESPONSE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown response_format: {response_format}. Available formats: {list(RESPONSE_FORMATS)}")
+    return response_format == "columnar"
+
+def _columnar_response(results: dict) -> JSONResponse:
+    # Skip jsonable_encoder for the long float lists, it walks every element
+    series = {key: results.pop(key) for key in COLUMNAR_SERIES_KEYS if key in results}
+    return JSONResponse(content={**jsonable_encoder(results), **series})
+
+async def _load_price_data(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+    '''
+    OHLCV frame (date index) for symbol between start_date and end_date,
+    fetching from Alpha Vantage first if the symbol or recent bars are missing.
+    Raises HTTPException for anything the caller got wrong.
+    '''
+    start_str, end_str = await _resolve_price_range(symbol, start_date, end_date)
+    return await _price_frame(symbol, start_str, end_str)
+
+async def _resolve_price_range(symbol: str, start_date: str, end_date: str) -> tuple[str, str]:
+    '''
+    Make sure symbol's bars are stored and current, validate the requested
+    range and clamp its end to the last stored bar. Returns (start, end).
+    '''
+    # Ensure data exists; if symbol missing, fetch all history first
+    with span("date_range"):
+        stored = await run_in_db_session(symbol_exists, symbol)
+    if not stored:
+        with span("fetch"):
+            inserted = await _ensure_prices(symbol)
+        logger.debug("Fetched full history for %s via Alpha Vantage: %d rows", symbol, inserted)
+        if not await run_in_db_session(symbol_exists, symbol):
+            raise HTTPException(status_code=400, detail=f"Symbol '{symbol}' still not available after fetch")
+
+    # Current available range after ensuring presence
+    with span("date_range"):
+        start_available, end_available = await run_in_db_session(get_date_range, symbol)
+    
+    # Validate requested dates
+    try:
+        start_requested = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_requested = datetime.strptime(end_date, '%Y-%m-%d').date()
+        start_available_dt = datetime.strptime(start_available, '%Y-%m-%d').date()
+        end_available_dt = datetime.strptime(end_available, '%Y-%m-%d').date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    # If missing recent dates, fetch only newer data and upsert
+    if end_requested > end_available_dt:
+        since_date = (end_available_dt.strftime('%Y-%m-%d'))
+        with span("fetch"):
+            inserted = await _ensure_prices(symbol, since_date=since_date)
+        logger.debug("Incremental fetch for %s since %s: %d rows", symbol, since_date, inserted)
+        with span("date_range"):
+            start_available, end_available = await run_in_db_session(get_date_range, symbol)
+        start_available_dt = datetime.strptime(start_available, '%Y-%m-%d').date()
+        end_available_dt = datetime.strptime(end_available, '%Y-%m-%d').date()
+
+    # Final guards after fetch attempts
+    if start_requested < start_available_dt:
+        raise HTTPException(status_code=400, detail=f"Start date {start_date} is before available data. Earliest available: {start_available}")
+    # If requested end date is beyond latest available (e.g., today's data not yet posted),
+    # clamp to latest available instead of erroring
+    if end_requested > end_available_dt:
+        end_requested = end_available_dt
+    
+    # Use possibly clamped dates for downstream steps
+    return start_requested.strftime('%Y-%m-%d'), end_requested.strftime('%Y-%m-%d')
+
+async def _price_frame(symbol: str, start_str: str, end_str: str) -> pd.DataFrame:
+    # Get data from the in-process cache (database only on a miss)
+    data = await run_in_db_session(get_price_frame, symbol, start_str, end_str)
+    
+    if data.empty:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"No data found for {symbol} in the specified date range"
+        )
+    
+    logger.debug("Retrieved %d records for %s from %s to %s", len(data), symbol, start_str, end_str)
+    return data
+
+def _backtest_response(engine: BacktestingEngine, data: pd.DataFrame, columnar: bool, execution: dict | None = None) -> JSONResponse:
+    # Simulation and JSON encoding both run on cpu_executor; stops and sizing
+    # need the bar-by-bar kernel, plain signal runs stay vectorized
+    if execution:
+        results = engine.run(data, mode="kernel", columnar=columnar, **execution)
+    else:
+        results = engine.run(data, mode="vectorized", columnar=columnar)
+    with span("encode"):
+        if columnar:
+            return _columnar_response(results)
+        return JSONResponse(content=jsonable_encoder(results))
+
+# Part of every result cache key; bump when backtest output changes so
+# responses stored by older code are no longer served
+RESULT_CACHE_VERSION = 1
+
+def _execution_options(request: BacktestRequest) -> dict:
+    '''
+    the request's stop/sizing options that are set; bad values are a 400
+    '''
+    execution = {
+        name: getattr(request, name)
+        for name in ("stop_loss", "take_profit", "trailing_stop", "position_size")
+        if getattr(request, name) is not None
+    }
+    try:
+        check_execution(**execution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return execution
+
+async def _backtest_cache_key(symbol: str, start_str: str, end_str: str, request: BacktestRequest, params: dict, execution: dict, columnar: bool) -> str:
+    '''
+    Hash of the normalized request (effective range, resolved parameters,
+    response shape) and the symbol's data version, so newly stored bars
+    change the key
+    '''
+    info = await run_in_db_session(get_symbol_info, symbol)
+    return result_cache_key({
+        "version": RESULT_CACHE_VERSION,
+        "symbol": symbol,
+        "start_date": start_str,
+        "end_date": end_str,
+        "strategy": request.strategy,
+        "params": params,
+        "execution": execution,
+        "initial_cash": request.initial_cash or 100000,
+        "columnar": columnar,
+        "data": [info["first_date"], info["last_date"], info["row_count"]],
+    })
+
 @app.post("/backtest")
-def run_backtest(request: BacktestRequest):
+async def run_backtest(request: BacktestRequest, accept: str | None = Header(default=None)):
     try:
-        print(f"Backtest request: {request}")
+        logger.debug("Backtest request: %s", request)
         symbol = request.symbol.upper()
+        columnar = _wants_columnar(request.response_format, accept)
+
+        start_str, end_str = await _resolve_price_range(symbol, request.start_date, request.end_date)
 
-        # Ensure data exists; if symbol missing, fetch all history first
-        available_symbols = get_available_symbols()
-        if symbol not in available_symbols:
-            inserted = _fetch_alpha_and_upsert(symbol)
-            print(f"Fetched full history for {symbol} via Alpha Vantage: {inserted} rows")
-            available_symbols = get_available_symbols()
-            if symbol not in available_symbols:
-                raise HTTPException(status_code=400, detail=f"Symbol '{symbol}' still not available after fetch")
-
-        # Current available range after ensuring presence
-        start_available, end_available = get_date_range(symbol)
-        
-        # Validate requested dates
-        try:
-            start_requested = datetime.strptime(request.start_date, '%Y-%m-%d').date()
-            end_requested = datetime.strptime(request.end_date, '%Y-%m-%d').date()
-            start_available_dt = datetime.strptime(start_available, '%Y-%m-%d').date()
-            end_available_dt = datetime.strptime(end_available, '%Y-%m-%d').date()
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-        
-        # If missing recent dates, fetch only newer data and upsert
-        if end_requested > end_available_dt:
-            since_date = (end_available_dt.strftime('%Y-%m-%d'))
-            inserted = _fetch_alpha_and_upsert(symbol, since_date=since_date)
-            print(f"Incremental fetch for {symbol} since {since_date}: {inserted} rows")
-            start_available, end_available = get_date_range(symbol)
-            start_available_dt = datetime.strptime(start_available, '%Y-%m-%d').date()
-            end_available_dt = datetime.strptime(end_available, '%Y-%m-%d').date()
-
-        # Final guards after fetch attempts
-        if start_requested < start_available_dt:
-            raise HTTPException(status_code=400, detail=f"Start date {request.start_date} is before available data. Earliest available: {start_available}")
-        # If requested end date is beyond latest available (e.g., today's data not yet posted),
-        # clamp to latest available instead of erroring
-        if end_requested > end_available_dt:
-            end_requested = end_available_dt
-        
-        # Use possibly clamped dates for downstream steps
-        start_str = start_requested.strftime('%Y-%m-%d')
-        end_str = end_requested.strftime('%Y-%m-%d')
-        
-        # Get data from database
-        data_list = get_stock_data(symbol, start_str, end_str)
-        
-        if not data_list:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"No data found for {request.symbol} in the specified date range"
-            )
-        
-        # Convert to DataFrame
-        data = pd.DataFrame(data_list)
-        data['date'] = pd.to_datetime(data['date'])
-        data = data.set_index('date').sort_index()
-        
-        print(f"Retrieved {len(data)} records for {symbol} from {start_str} to {end_str}")
-        
         # Initialize strategy based on request
-        if request.strategy == "Moving Average Crossover":
-            # Extract strategy parameters with defaults
-            fast_period = request.strategy_params.get('fast_period', 10)
-            slow_period = request.strategy_params.get('slow_period', 30)
-            initial_cash = request.initial_cash or 100000
-            
-            strategy = MA_Crossover(fast_period=fast_period, slow_period=slow_period, initial_cash=initial_cash)
-        elif request.strategy == "Bollinger Breakout":
-            period = request.strategy_params.get('period', 20)
-            std = request.strategy_params.get('std', 2)
-            initial_cash = request.initial_cash or 100000
-            
-            strategy = BollingerBreakout(period=period, std=std, initial_cash=initial_cash)
-        else:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Unknown strategy: {request.strategy}. Available strategies: ['Moving Average Crossover', 'Bollinger Breakout']"
-            )
-        
+        strategy_cls, params = _resolve_strategy(request.strategy, request.strategy_params)
+        strategy = strategy_cls(**params, initial_cash=request.initial_cash or 100000)
+        execution = _execution_options(request)
+
+        # Identical request on the same stored bars: replay the stored response
+        with span("cache_lookup"):
+            cache_key = await _backtest_cache_key(symbol, start_str, end_str, request, params, execution, columnar)
+            cached = result_cache.get_memory(cache_key) or await run_in_db_session(result_cache.get, cache_key)
+        if cached is not None:
+            body, media_type = cached
+            return Response(content=body, media_type=media_type, headers={"X-Cache": "hit"})
+
+        data = await _price_frame(symbol, start_str, end_str)
+
         # Run backtest
         engine = BacktestingEngine(strategy)
-        results = engine.run(data)
-    
-        return results
+        response = await _run_cpu(_backtest_response, engine, data, columnar, execution)
+        with span("cache_store"):
+            await run_in_db_session(result_cache.put, cache_key, response.body, response.media_type)
+        response.headers["X-Cache"] = "miss"
+        return response
         
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        print(f"Unexpected error: {str(e)}")
+        logger.exception("Unexpected error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@app.post("/backtest/sweep")
+async def run_backtest_sweep(request: SweepRequest):
+    '''
+    runs every combination of param_grid over one symbol and date range and
+    returns the combinations ranked by sort_by
+    '''
+    return await _run_sweep(request)
+
+def _validate_param_grid(strategy: str, param_grid: dict) -> dict:
+    '''
+    param_grid with every value checked against the strategy's parameter
+    specs; parameters left out are held at their default
+    '''
+    specs = {spec.name: spec for spec in registry.params(strategy)}
+    unknown = set(param_grid) - set(specs)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown parameters for {strategy}: {sorted(unknown)}. Accepted: {list(specs)}")
+    try:
+        # sizes come from the axis lengths, so an oversized range is refused
+        # before any of its values are built
+        size = param_grid_size(param_grid)
+        if size > MAX_SWEEP_COMBINATIONS:
+            raise ValueError(f"Grid has {size} combinations, the limit is {MAX_SWEEP_COMBINATIONS}")
+        return {
+            name: [spec.validate(v) for v in expand_param_values(param_grid[name])] if name in param_grid else [spec.default]
+            for name, spec in specs.items()
+        }
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid sweep: {str(e)}")
+
+async def _run_sweep(request: SweepRequest, progress=None) -> dict:
+    # progress(done, total) is passed through to run_parameter_sweep
+    try:
+        symbol = request.symbol.upper()
+        strategy_cls = _resolve_strategy(request.strategy, {})[0]
+        param_grid = _validate_param_grid(request.strategy, request.param_grid)
+
+        data = await _load_price_data(symbol, request.start_date, request.end_date)
+
+        try:
+            results = await _run_cpu(
+                run_parameter_sweep,
+                data,
+                strategy_cls,
+                param_grid,
+                initial_cash=request.initial_cash or 100000,
+                sort_by=request.sort_by,
+                ascending=request.ascending,
+                executor=batch_executor,
+                progress=progress,
+            )
+        except (ValueError, TypeError, KeyError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid sweep: {str(e)}")
+
+        return {
+            "symbol": symbol,
+            "strategy": request.strategy,
+            "start_date": data.index[0].strftime('%Y-%m-%d'),
+            "end_date": data.index[-1].strftime('%Y-%m-%d'),
+            "combinations": len(results),
+            "sort_by": request.sort_by,
+            "results": results[:request.top_n] if request.top_n else results,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@app.post("/backtest/walk-forward")
+async def run_walk_forward(request: WalkForwardRequest):
+    '''
+    optimizes param_grid on each rolling train window, trades the winner on
+    the test window after it, and returns the chosen params per fold plus the
+    stitched out-of-sample equity curve
+    '''
+    return await _run_walk_forward(request)
+
+async def _run_walk_forward(request: WalkForwardRequest, progress=None) -> JSONResponse:
+    # progress(done, total) is passed through to WalkForwardEngine.run
+    try:
+        symbol = request.symbol.upper()
+        strategy_cls = _resolve_strategy(request.strategy, {})[0]
+        param_grid = _validate_param_grid(request.strategy, request.param_grid)
+
+        data = await _load_price_data(symbol, request.start_date, request.end_date)
+
+        engine = WalkForwardEngine(
+            strategy_cls,
+            param_grid,
+            train_bars=request.train_bars,
+            test_bars=request.test_bars,
+            anchored=request.anchored,
+            sort_by=request.sort_by,
+            ascending=request.ascending,
+            initial_cash=request.initial_cash or 100000,
+        )
+        try:
+            results = await _run_cpu(engine.run, data, executor=batch_executor, progress=progress)
+        except (ValueError, TypeError, KeyError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid walk-forward: {str(e)}")
+
+        results = {"symbol": symbol, "strategy": request.strategy, **results}
+        return await _run_cpu(_columnar_response, results)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@app.post("/backtest/portfolio")
+async def run_portfolio_backtest(request: PortfolioRequest):
+    '''
+    runs one strategy over several symbols with per-symbol allocations and
+    returns the combined equity curve and its metrics
+    '''
+    return await _run_portfolio(request)
+
+async def _run_portfolio(request: PortfolioRequest) -> JSONResponse:
+    try:
+        strategy_cls, params = _resolve_strategy(request.strategy, request.strategy_params)
+
+        if request.symbols:
+            symbols = list(dict.fromkeys(s.upper() for s in request.symbols))
+        else:
+            in_db = set(await run_in_db_session(get_available_symbols))
+            symbols = [s for s in (_curated_symbols() or sorted(in_db)) if s in in_db]
+            if not symbols:
+                raise HTTPException(status_code=400, detail="No symbols given and none of the curated symbols are stored yet")
+
+        # Load (and if needed fetch) every symbol concurrently
+        loaded = await asyncio.gather(*(_load_price_data(symbol, request.start_date, request.end_date) for symbol in symbols))
+        frames = dict(zip(symbols, loaded))
+        weights = {k.upper(): v for k, v in request.weights.items()} if request.weights else None
+
+        engine = PortfolioBacktestingEngine(strategy_cls, params, initial_cash=request.initial_cash or 100000, weights=weights)
+        try:
+            results = await _run_cpu(engine.run, frames)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return await _run_cpu(_columnar_response, results)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+def _finite_row(row: dict) -> dict:
+    # inf/NaN metrics would make the row invalid JSON
+    result = row.get("result")
+    if result:
+        row["result"] = {
+            k: (None if isinstance(v, float) and not math.isfinite(v) else v)
+            for k, v in result.items()
+        }
+    return row
+
+def _ndjson_line(row: dict) -> str:
+    return json.dumps(jsonable_encoder(_finite_row(row))) + "\n"
+
+@app.post("/backtest/batch")
+async def run_backtest_batch(request: BatchRequest):
+    '''
+    runs many (symbol, strategy, params) backtests across worker processes and
+    streams one JSON line per job (application/x-ndjson) as each finishes
+    '''
+    frames, jobs = await _prepare_batch(request)
+    rows = batch_executor.run_backtests(frames, jobs, include_series=request.include_series)
+    return StreamingResponse((_ndjson_line(row) for row in rows), media_type="application/x-ndjson")
+
+async def _prepare_batch(request: BatchRequest) -> tuple[dict, list]:
+    '''
+    executor jobs for the request and the price frame of each symbol they use
+    '''
+    try:
+        jobs = []
+        for i, job in enumerate(request.jobs):
+            strategy_cls, params = _resolve_strategy(job.strategy, job.strategy_params)
+            jobs.append({
+                "id": i,
+                "symbol": job.symbol.upper(),
+                "strategy": strategy_cls,
+                "params": params,
+                "initial_cash": request.initial_cash or 100000,
+            })
+
+        # Load each symbol once, before streaming starts, so bad input is still a 400
+        symbols = list(dict.fromkeys(job["symbol"] for job in jobs))
+        loaded = await asyncio.gather(*(_load_price_data(symbol, request.start_date, request.end_date) for symbol in symbols))
+        frames = dict(zip(symbols, loaded))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+    return frames, jobs
+
+def _encode_result(payload) -> str:
+    if isinstance(payload, Response):
+        return payload.body.decode()
+    return JSONResponse(content=jsonable_encoder(payload)).body.decode()
+
+async def _job_backtest(request: dict, ctx) -> str:
+    ctx.report(0.0, "running backtest")
+    response = await run_backtest(BacktestRequest(**request), accept=None)
+    return response.body.decode()
+
+async def _job_sweep(request: dict, ctx) -> str:
+    def progress(done, total):
+        ctx.report(done / total if total else 1.0, f"{done}/{total} combinations")
+
+    payload = await _run_sweep(SweepRequest(**request), progress=progress)
+    return await _run_cpu(_encode_result, payload)
+
+async def _job_walk_forward(request: dict, ctx) -> str:
+    def progress(done, total):
+        ctx.report(done / total if total else 1.0, f"{done}/{total} combinations")
+
+    response = await _run_walk_forward(WalkForwardRequest(**request), progress=progress)
+    return response.body.decode()
+
+async def _job_portfolio(request: dict, ctx) -> str:
+    ctx.report(0.0, "running portfolio backtest")
+    response = await _run_portfolio(PortfolioRequest(**request))
+    return response.body.decode()
+
+async def _job_batch(request: dict, ctx) -> str:
+    batch = BatchRequest(**request)
+    frames, jobs = await _prepare_batch(batch)
+
+    def collect():
+        rows = []
+        results = batch_executor.run_backtests(frames, jobs, include_series=batch.include_series)
+        try:
+            for row in results:
+                rows.append(_finite_row(row))
+                ctx.report(len(rows) / len(jobs), f"{len(rows)}/{len(jobs)} backtests")
+        finally:
+            # on cancel: drops queued backtests and frees the shared prices
+            results.close()
+        rows.sort(key=lambda row: row["id"])
+        return _encode_result({"results": rows})
+
+    return await _run_cpu(collect)
+
+# Request model per job kind; the job's request is validated on submit
+JOB_REQUEST_MODELS = {
+    "backtest": BacktestRequest,
+    "sweep": SweepRequest,
+    "walk_forward": WalkForwardRequest,
+    "portfolio": PortfolioRequest,
+    "batch": BatchRequest,
+}
+
+# JOB_WORKERS jobs run at once (default 2), at most MAX_PENDING_JOBS accepted
+job_queue = JobQueue(
+    {
+        "backtest": _job_backtest,
+        "sweep": _job_sweep,
+        "walk_forward": _job_walk_forward,
+        "portfolio": _job_portfolio,
+        "batch": _job_batch,
+    },
+    max_concurrent=int(os.getenv("JOB_WORKERS", "2")),
+    max_pending=int(os.getenv("MAX_PENDING_JOBS", "100")),
+)
+
+@app.post("/jobs", status_code=202)
+async def submit_job(job: JobRequest):
+    '''
+    queues a backtest, sweep, walk-forward, portfolio or batch run and returns
+    its job record right away; poll GET /jobs/{id} and fetch GET /jobs/{id}/result
+    '''
+    model = JOB_REQUEST_MODELS.get(job.kind)
+    if model is None:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {job.kind}. Available kinds: {list(JOB_REQUEST_MODELS)}")
+    try:
+        request = model(**job.request)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+    try:
+        job_id = await job_queue.submit(job.kind, request.model_dump())
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=f"Job queue is full: {str(e)}")
+    return await job_queue.get(job_id)
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    '''
+    status (queued, running, succeeded, failed, cancelled), progress 0..1 and
+    timestamps of a job
+    '''
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    '''
+    the finished job's payload, the same JSON its endpoint would have returned
+    '''
+    job = await job_queue.result(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    if job["status"] != "succeeded":
+        detail = f"Job is {job['status']}"
+        if job["error"]:
+            detail += f": {job['error']}"
+        raise HTTPException(status_code=409, detail=detail)
+    return Response(content=job["result"], media_type="application/json")
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    '''
+    cancels a queued or running job; finished jobs are returned unchanged
+    '''
+    job = await job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
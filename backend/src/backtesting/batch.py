@@ -0,0 +1,268 @@
+'''
+batch executor
+
+spreads (symbol, strategy, params) backtests, sweep chunks and walk-forward
+searches across a pool of worker processes. each symbol's price arrays are
+written once into a SharedMemory block and workers attach to it by name, so a
+task only pickles a small spec instead of a whole DataFrame. results are
+yielded as they finish.
+'''
+
+import os
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from src.backtesting.engine import BacktestingEngine
+from src.backtesting.sweep import evaluate_combinations, rank_results
+from src.backtesting.walk_forward import best_train_rows, evaluate_folds
+
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# per-bar keys left out of batch results unless include_series is set
+SERIES_KEYS = ("trades", "dates", "portfolio_values", "candles", "fast_ma", "slow_ma", "upper_band", "lower_band", "format")
+
+
+class SharedPriceArrays:
+    '''
+    one symbol's dates and OHLCV columns in a SharedMemory block.
+    layout: int64 dates (ns) followed by a (columns x length) float64 matrix.
+    the creating process owns the block and must close() it.
+    '''
+    def __init__(self, data: pd.DataFrame):
+        columns = [c for c in PRICE_COLUMNS if c in data.columns]
+        length = len(data)
+        nbytes = max(length * 8 * (1 + len(columns)), 1)
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+
+        dates = np.ndarray((length,), dtype=np.int64, buffer=self.shm.buf)
+        dates[:] = np.asarray(data.index.values, dtype='datetime64[ns]').view(np.int64)
+        values = np.ndarray((len(columns), length), dtype=np.float64, buffer=self.shm.buf, offset=length * 8)
+        for i, col in enumerate(columns):
+            values[i] = data[col].to_numpy(dtype=np.float64)
+        del dates, values
+
+        self.spec = {"name": self.shm.name, "length": length, "columns": columns}
+
+    def close(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# worker-side: attached blocks and the frames viewing them, most recent last
+_ATTACHED = OrderedDict()
+_MAX_ATTACHED = 8
+
+
+def _frame_from_spec(spec: Dict) -> pd.DataFrame:
+    name = spec["name"]
+    if name in _ATTACHED:
+        _ATTACHED.move_to_end(name)
+        return _ATTACHED[name][1]
+
+    # spawned workers share the parent's resource tracker, which keeps
+    # ownership (and the unlink) with the parent
+    shm = shared_memory.SharedMemory(name=name)
+
+    length, columns = spec["length"], spec["columns"]
+    dates = np.ndarray((length,), dtype=np.int64, buffer=shm.buf)
+    values = np.ndarray((len(columns), length), dtype=np.float64, buffer=shm.buf, offset=length * 8)
+    frame = pd.DataFrame(
+        values.T,
+        columns=columns,
+        index=pd.DatetimeIndex(dates.view('datetime64[ns]'), name='date'),
+        copy=False,
+    )
+    _ATTACHED[name] = (shm, frame)
+
+    while len(_ATTACHED) > _MAX_ATTACHED:
+        _, (old_shm, old_frame) = _ATTACHED.popitem(last=False)
+        del old_frame
+        try:
+            old_shm.close()
+        except BufferError:
+            # something still views the buffer; the mapping goes away with the process
+            pass
+    return frame
+
+
+def _run_backtest_job(spec: Dict, job: Dict, include_series: bool) -> Dict:
+    data = _frame_from_spec(spec)
+    strategy = job["strategy"](**job.get("params", {}), initial_cash=job.get("initial_cash", 100000))
+    result = BacktestingEngine(strategy).run(data, mode="vectorized", columnar=True)
+    if not include_series:
+        result = {k: v for k, v in result.items() if k not in SERIES_KEYS}
+    return result
+
+
+def _run_sweep_chunk(spec: Dict, strategy_cls, combinations: List[Dict], initial_cash: float, risk_free_rate: float) -> List[Dict]:
+    return evaluate_combinations(_frame_from_spec(spec), strategy_cls, combinations, initial_cash, risk_free_rate)
+
+
+def _run_walk_forward_chunk(spec: Dict, strategy_cls, combinations: List[Dict], folds: List[tuple], offset: int, *args) -> List[Dict]:
+    return best_train_rows(_frame_from_spec(spec), strategy_cls, combinations, folds, *args, offset=offset)
+
+
+class BatchExecutor:
+    '''
+    process pool for batches of backtests. the pool starts lazily on first
+    use and is reused across batches; call shutdown() when done.
+    jobs are dicts: {"symbol", "strategy" (a BaseStrategy subclass),
+    "params", "initial_cash", optional "id"}
+    '''
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs server threads is not safe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def run_backtests(self, frames: Dict[str, pd.DataFrame], jobs: List[Dict], include_series: bool = False) -> Iterator[Dict]:
+        '''
+        run every job against frames[job["symbol"]], yielding
+        {"id", "symbol", "strategy", "params", "status", "result" | "error"}
+        in completion order
+        '''
+        shared = {symbol: SharedPriceArrays(frames[symbol]) for symbol in {job["symbol"] for job in jobs}}
+        pool = self._get_pool()
+        futures = {}
+        try:
+            for i, job in enumerate(jobs):
+                future = pool.submit(_run_backtest_job, shared[job["symbol"]].spec, job, include_series)
+                futures[future] = (i, job)
+
+            for future in as_completed(futures):
+                i, job = futures[future]
+                row = {
+                    "id": job.get("id", i),
+                    "symbol": job["symbol"],
+                    "strategy": job["strategy"].__name__,
+                    "params": job.get("params", {}),
+                }
+                try:
+                    row.update(status="ok", result=future.result())
+                except Exception as e:
+                    row.update(status="error", error=str(e))
+                yield row
+        finally:
+            # consumer stopped early (e.g. client went away): drop queued work
+            for future in futures:
+                future.cancel()
+            for arrays in shared.values():
+                arrays.close()
+
+    def run_sweep(
+        self,
+        data: pd.DataFrame,
+        strategy_cls,
+        combinations: List[Dict],
+        initial_cash: float = 100000,
+        risk_free_rate: float = 0.02,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> List[Dict]:
+        '''
+        evaluate_combinations split into one chunk per worker; each worker
+        builds its own IndicatorCache for its chunk. progress(done, total) is
+        called as chunks finish; if it raises, unstarted chunks are cancelled
+        '''
+        if not combinations:
+            return []
+        arrays = SharedPriceArrays(data)
+        futures = {}
+        try:
+            pool = self._get_pool()
+            chunk_size = -(-len(combinations) // self.max_workers)
+            futures = {
+                pool.submit(_run_sweep_chunk, arrays.spec, strategy_cls, combinations[i:i + chunk_size], initial_cash, risk_free_rate): i
+                for i in range(0, len(combinations), chunk_size)
+            }
+            chunks = {}
+            done = 0
+            for future in as_completed(futures):
+                chunks[futures[future]] = future.result()
+                done += len(chunks[futures[future]])
+                if progress is not None:
+                    progress(done, len(combinations))
+            # back in combination order
+            return [row for i in sorted(chunks) for row in chunks[i]]
+        finally:
+            for future in futures:
+                future.cancel()
+            arrays.close()
+
+    def run_walk_forward(
+        self,
+        data: pd.DataFrame,
+        strategy_cls,
+        combinations: List[Dict],
+        folds: List[tuple],
+        initial_cash: float = 100000,
+        risk_free_rate: float = 0.02,
+        sort_by: str = "sharpe_ratio",
+        ascending: bool = False,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> List[Dict]:
+        '''
+        walk_forward.evaluate_folds with the train-window search split into
+        one chunk of combinations per worker: each worker streams its chunk
+        through every fold and sends back only the per-fold winners, which
+        are merged here before the winners' test windows run in-process.
+        progress(done, total) counts combinations; progress and
+        cancellation work as in run_sweep
+        '''
+        if not folds or not combinations:
+            return []
+        arrays = SharedPriceArrays(data)
+        futures = {}
+        try:
+            pool = self._get_pool()
+            chunk_size = -(-len(combinations) // self.max_workers)
+            futures = {
+                pool.submit(
+                    _run_walk_forward_chunk, arrays.spec, strategy_cls, combinations[i:i + chunk_size], folds, i,
+                    initial_cash, risk_free_rate, sort_by, ascending,
+                ): i
+                for i in range(0, len(combinations), chunk_size)
+            }
+            chunks = {}
+            done = 0
+            for future in as_completed(futures):
+                i = futures[future]
+                chunks[i] = future.result()
+                done += len(combinations[i:i + chunk_size])
+                if progress is not None:
+                    progress(done, len(combinations))
+        finally:
+            for future in futures:
+                future.cancel()
+            arrays.close()
+
+        # chunks in combination order, so ties go to the earlier combination as in-process
+        ordered = [chunks[i] for i in sorted(chunks)]
+        best = [rank_results([chunk[f] for chunk in ordered], sort_by, ascending)[0] for f in range(len(folds))]
+        return evaluate_folds(data, strategy_cls, combinations, folds, initial_cash, risk_free_rate, sort_by, ascending, best=best)
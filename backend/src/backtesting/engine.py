@@ -5,14 +5,67 @@ should take in a strategy and return backtest result and visualizations
 '''
 
 import pandas as pd
+from src.monitoring.timing import span
 from src.strategies.base_strategy import BaseStrategy
 
+# "loop" walks the signals row by row, "vectorized" derives the same trades in bulk,
+# "kernel" runs the compiled bar loop, the only one that takes execution options
+SIMULATION_MODES = ("loop", "vectorized", "kernel")
+
 class BacktestingEngine:
     def __init__(self, strategy: BaseStrategy):
         self.strategy = strategy
+        self._signal_parts = []  # new-bar frames returned by extend()
+
+    def run(self, data: pd.DataFrame, mode: str = "loop", columnar: bool = False, **execution):
+        '''
+        execution: stop_loss, take_profit, trailing_stop, position_size for
+        mode="kernel" (see src.backtesting.kernel)
+        '''
+        if mode not in SIMULATION_MODES:
+            raise ValueError(f"Unknown simulation mode: {mode}. Available modes: {list(SIMULATION_MODES)}")
+        if execution and mode != "kernel":
+            raise ValueError(f"Execution options {sorted(execution)} need mode='kernel'")
 
-    def run(self, data: pd.DataFrame):
-        signals = self.strategy.generate_signals(data)
-        trade_results = self.strategy.simulate_trades(data, signals)
+        with span("signals"):
+            if type(self.strategy).compute_signals is BaseStrategy.compute_signals:
+                # written against the DataFrame contract only: hand its frame
+                # through, its own simulate_trades override may expect one
+                signals = self.strategy.generate_signals(data)
+            else:
+                # dict of arrays; data itself is never copied
+                signals = self.strategy.compute_signals(data)
+        # simulation, metrics and payload spans are recorded by the strategy
+        if mode == "kernel":
+            return self.strategy.simulate_trades_kernel(data, signals, columnar=columnar, **execution)
+        simulate = self.strategy.simulate_trades_vectorized if mode == "vectorized" else self.strategy.simulate_trades
+        # only pass the flag when asked, strategies may override simulate_trades(data, signals)
+        if columnar:
+            trade_results = simulate(data, signals, columnar=True)
+        else:
+            trade_results = simulate(data, signals)
         
         return trade_results
+
+    def extend(self, data: pd.DataFrame) -> pd.DataFrame:
+        '''
+        incremental run: feeds only the bars of data newer than the previous
+        call through the strategy's running state (see BaseStrategy.extend),
+        so keeping a backtest current costs O(new bars). the engine pickles,
+        so a stored one can be resumed later. returns the new bars' signals
+        '''
+        new_signals = self.strategy.extend(data)
+        if len(new_signals):
+            self._signal_parts.append(new_signals)
+        return new_signals
+
+    def results(self, columnar: bool = False):
+        '''
+        payload for every bar extend() has seen, same shape as run()
+        '''
+        if not self._signal_parts:
+            raise ValueError("No bars yet, call extend() first")
+        if len(self._signal_parts) > 1:
+            self._signal_parts = [pd.concat(self._signal_parts)]
+        signals = self._signal_parts[0]
+        return self.strategy._build_results(signals, signals, columnar=columnar)
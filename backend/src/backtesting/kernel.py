@@ -0,0 +1,211 @@
+'''
+compiled bar-by-bar execution kernel
+
+the long/flat simulation of BaseStrategy.simulate_trades extended with
+path-dependent exits that don't vectorize: stop-loss, take-profit and
+trailing stops, plus partial position sizing. the loop is compiled with numba
+when it is installed (pip install numba) and runs as plain python otherwise;
+both give the same results.
+
+semantics per bar, in order:
+1. while long (from the bar after the entry), exits are checked against the
+   bar's range: stop-loss and trailing stop first (the pessimistic
+   assumption when one bar touches both), then take-profit. a bar that opens
+   beyond the level fills at the open instead.
+2. at the close, like buy()/sell(): a buy signal when flat buys with
+   position_size of the cash (1.0 = all in: shares = cash / price, cash = 0),
+   a sell signal when long sells every share. a bar that already exited on
+   a stop doesn't buy again.
+with no stops and position_size=1.0 the fills are exactly simulate_trades'.
+'''
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        # no numba: the kernel runs as ordinary python
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# trade_reason codes
+REASON_SIGNAL = 0
+REASON_STOP_LOSS = 1
+REASON_TAKE_PROFIT = 2
+REASON_TRAILING_STOP = 3
+REASON_NAMES = {
+    REASON_SIGNAL: "signal",
+    REASON_STOP_LOSS: "stop_loss",
+    REASON_TAKE_PROFIT: "take_profit",
+    REASON_TRAILING_STOP: "trailing_stop",
+}
+
+
+@njit(cache=True)
+def _execute(open_, high, low, close, buy_signal, sell_signal, initial_cash,
+             stop_loss, take_profit, trailing_stop, position_size):
+    # stop_loss / take_profit / trailing_stop are fractions of the entry (or
+    # peak) price, <= 0 means off
+    n = close.shape[0]
+    trade_index = np.empty(2 * n, dtype=np.int64)
+    trade_side = np.empty(2 * n, dtype=np.int64)
+    trade_price = np.empty(2 * n, dtype=np.float64)
+    trade_shares = np.empty(2 * n, dtype=np.float64)
+    trade_reason = np.empty(2 * n, dtype=np.int64)
+    cash_path = np.empty(n, dtype=np.float64)
+    shares_path = np.empty(n, dtype=np.float64)
+
+    cash = initial_cash
+    shares = 0.0
+    long = False
+    entry_price = 0.0
+    peak = 0.0
+    entry_bar = -1
+    num_trades = 0
+
+    for i in range(n):
+        exited = False
+        if long and i > entry_bar:
+            exit_price = 0.0
+            reason = -1
+            if stop_loss > 0.0:
+                level = entry_price * (1.0 - stop_loss)
+                if low[i] <= level:
+                    exit_price = min(open_[i], level)
+                    reason = 1
+            if reason < 0 and trailing_stop > 0.0:
+                level = peak * (1.0 - trailing_stop)
+                if low[i] <= level:
+                    exit_price = min(open_[i], level)
+                    reason = 3
+            if reason < 0 and take_profit > 0.0:
+                level = entry_price * (1.0 + take_profit)
+                if high[i] >= level:
+                    exit_price = max(open_[i], level)
+                    reason = 2
+            if reason >= 0:
+                trade_index[num_trades] = i
+                trade_side[num_trades] = -1
+                trade_price[num_trades] = exit_price
+                trade_shares[num_trades] = shares
+                trade_reason[num_trades] = reason
+                num_trades += 1
+                cash += shares * exit_price
+                shares = 0.0
+                long = False
+                exited = True
+            elif high[i] > peak:
+                peak = high[i]
+
+        price = close[i]
+        if buy_signal[i] == 1.0 and not long and not exited:
+            if position_size >= 1.0:
+                shares = cash / price
+                cash = 0.0
+            else:
+                spend = cash * position_size
+                shares = spend / price
+                cash = cash - spend
+            trade_index[num_trades] = i
+            trade_side[num_trades] = 1
+            trade_price[num_trades] = price
+            trade_shares[num_trades] = shares
+            trade_reason[num_trades] = 0
+            num_trades += 1
+            long = True
+            entry_price = price
+            peak = price
+            entry_bar = i
+        elif sell_signal[i] == 1.0 and long:
+            trade_index[num_trades] = i
+            trade_side[num_trades] = -1
+            trade_price[num_trades] = price
+            trade_shares[num_trades] = shares
+            trade_reason[num_trades] = 0
+            num_trades += 1
+            cash += shares * price
+            shares = 0.0
+            long = False
+
+        cash_path[i] = cash
+        shares_path[i] = shares
+
+    return (
+        trade_index[:num_trades], trade_side[:num_trades], trade_price[:num_trades],
+        trade_shares[:num_trades], trade_reason[:num_trades], cash_path, shares_path,
+    )
+
+
+def check_execution(stop_loss=None, take_profit=None, trailing_stop=None, position_size=1.0):
+    '''
+    raises ValueError for execution options execute_bars can't use
+    '''
+    if not 0 < position_size <= 1:
+        raise ValueError(f"position_size must be in (0, 1], got {position_size}")
+    for name, value in (("stop_loss", stop_loss), ("trailing_stop", trailing_stop)):
+        if value is not None and not 0 < value < 1:
+            raise ValueError(f"{name} must be between 0 and 1, got {value}")
+    if take_profit is not None and take_profit <= 0:
+        raise ValueError(f"take_profit must be positive, got {take_profit}")
+
+
+def _contiguous(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def execute_bars(
+    close,
+    buy_signal,
+    sell_signal,
+    initial_cash: float = 100000,
+    open_=None,
+    high=None,
+    low=None,
+    stop_loss: float | None = None,
+    take_profit: float | None = None,
+    trailing_stop: float | None = None,
+    position_size: float = 1.0,
+) -> dict:
+    '''
+    run the kernel over one symbol. prices and signals are converted to
+    contiguous float64 arrays; open/high/low default to close (so stops
+    then trigger on closes).
+
+    returns a dict of arrays, like vectorized.simulate_long_flat:
+    - trade_index, trade_side (+1 buy, -1 sell), trade_price, trade_shares,
+      trade_reason (see REASON_NAMES)
+    - cash, shares, equity: per bar, after that bar's fills
+    - final_cash, final_shares: scalars
+    '''
+    check_execution(stop_loss, take_profit, trailing_stop, position_size)
+    close = _contiguous(close)
+    (trade_index, trade_side, trade_price, trade_shares, trade_reason, cash, shares) = _execute(
+        _contiguous(close if open_ is None else open_),
+        _contiguous(close if high is None else high),
+        _contiguous(close if low is None else low),
+        close,
+        _contiguous(buy_signal),
+        _contiguous(sell_signal),
+        float(initial_cash),
+        float(stop_loss or 0.0),
+        float(take_profit or 0.0),
+        float(trailing_stop or 0.0),
+        float(position_size),
+    )
+    return {
+        "trade_index": trade_index,
+        "trade_side": trade_side,
+        "trade_price": trade_price,
+        "trade_shares": trade_shares,
+        "trade_reason": trade_reason,
+        "cash": cash,
+        "shares": shares,
+        "equity": cash + shares * close,
+        "final_cash": float(cash[-1]) if len(cash) else float(initial_cash),
+        "final_shares": float(shares[-1]) if len(shares) else 0.0,
+    }
@@ -0,0 +1,162 @@
+'''
+trade ledger and equity curve
+
+compact columnar storage for a strategy's account history: trades as
+parallel side / price / shares / reason arrays and the equity curve as one
+float64 array, both growable and reset in place so a strategy reused across
+many runs keeps its buffers instead of rebuilding lists of dicts. they are
+turned into the API's list-of-dicts format only when a payload is built.
+'''
+
+import numpy as np
+
+from src.backtesting.kernel import REASON_NAMES, REASON_SIGNAL
+
+SIDE_BUY = 1
+SIDE_SELL = -1
+
+
+def _grown(array: np.ndarray, needed: int) -> np.ndarray:
+    # array copied into a buffer of at least `needed` entries (doubling)
+    capacity = max(needed, 2 * len(array), 16)
+    grown = np.empty(capacity, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class TradeLedger:
+    '''
+    executed trades: date (any index value, kept in a list), side (+1 buy,
+    -1 sell), price, shares and reason (kernel REASON_* code)
+    '''
+    __slots__ = ("dates", "_side", "_price", "_shares", "_reason", "size")
+
+    def __init__(self):
+        self.dates = []
+        self._side = np.empty(0, dtype=np.int8)
+        self._price = np.empty(0, dtype=np.float64)
+        self._shares = np.empty(0, dtype=np.float64)
+        self._reason = np.empty(0, dtype=np.int8)
+        self.size = 0
+
+    def reset(self):
+        '''
+        drop every trade, keeping the allocated buffers
+        '''
+        self.dates.clear()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, date, side: int, price: float, shares: float, reason: int = REASON_SIGNAL):
+        i = self.size
+        if i == len(self._side):
+            self._side = _grown(self._side[:i], i + 1)
+            self._price = _grown(self._price[:i], i + 1)
+            self._shares = _grown(self._shares[:i], i + 1)
+            self._reason = _grown(self._reason[:i], i + 1)
+        self._side[i] = side
+        self._price[i] = price
+        self._shares[i] = shares
+        self._reason[i] = reason
+        self.dates.append(date)
+        self.size = i + 1
+
+    def load(self, dates, side, price, shares, reason=None):
+        '''
+        replace the contents with whole arrays (e.g. a simulator's trade_*),
+        copied into the existing buffers when they are big enough
+        '''
+        n = len(side)
+        if n > len(self._side):
+            self._side = np.empty(n, dtype=np.int8)
+            self._price = np.empty(n, dtype=np.float64)
+            self._shares = np.empty(n, dtype=np.float64)
+            self._reason = np.empty(n, dtype=np.int8)
+        self._side[:n] = side
+        self._price[:n] = price
+        self._shares[:n] = shares
+        self._reason[:n] = REASON_SIGNAL if reason is None else reason
+        self.dates = list(dates)
+        self.size = n
+
+    @property
+    def side(self) -> np.ndarray:
+        return self._side[:self.size]
+
+    @property
+    def price(self) -> np.ndarray:
+        return self._price[:self.size]
+
+    @property
+    def shares(self) -> np.ndarray:
+        return self._shares[:self.size]
+
+    @property
+    def reason(self) -> np.ndarray:
+        return self._reason[:self.size]
+
+    def to_records(self) -> list:
+        '''
+        API format: {"date", "action", "price", "shares"} per trade, plus
+        "reason" for exits that weren't signals
+        '''
+        records = []
+        for date, side, price, shares, reason in zip(
+            self.dates, self.side.tolist(), self.price.tolist(), self.shares.tolist(), self.reason.tolist()
+        ):
+            trade = {"date": date, "action": "buy" if side > 0 else "sell", "price": price, "shares": shares}
+            if reason != REASON_SIGNAL:
+                trade["reason"] = REASON_NAMES[reason]
+            records.append(trade)
+        return records
+
+
+class EquityCurve:
+    '''
+    portfolio value after each bar; the dates are the bars the values were
+    recorded for and are supplied when the curve is serialized
+    '''
+    __slots__ = ("_values", "size")
+
+    def __init__(self):
+        self._values = np.empty(0, dtype=np.float64)
+        self.size = 0
+
+    def reset(self, capacity: int = 0):
+        '''
+        empty the curve, making room for `capacity` values up front
+        '''
+        if capacity > len(self._values):
+            self._values = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, value: float):
+        i = self.size
+        if i == len(self._values):
+            self._values = _grown(self._values[:i], i + 1)
+        self._values[i] = value
+        self.size = i + 1
+
+    def load(self, values):
+        '''
+        replace the contents with a whole array, copied into the existing
+        buffer when it is big enough
+        '''
+        self.reset(len(values))
+        self._values[:len(values)] = values
+        self.size = len(values)
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values[:self.size]
+
+    def to_records(self, dates) -> list:
+        '''
+        API format: {"date", "portfolio_value"} per bar
+        '''
+        return [{"date": d, "portfolio_value": v} for d, v in zip(dates, self.values.tolist())]
@@ -1,4 +1,164 @@
-import pandas as pd
+'''
+performance metrics
+
+equity_metrics() computes every equity-curve metric (final value, total
+return, sharpe, sortino, max drawdown, volatility) from one array, deriving the
+daily returns once. a 2-D (bars x curves) array gives one value per curve, so
+a whole block of sweep combinations is scored in a single call.
+trade_metrics() derives the round-trip statistics from a trade ledger held as
+side / price / shares arrays. the get_* functions and calculate_full_metrics
+keep the original list-based interface on top of them.
+'''
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+def _column_std(values, valid, count):
+    # sample std (ddof=1) of each column over its valid entries, the way
+    # pandas does it: mean first, then the summed squared deviations
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(valid, values, 0.0).sum(axis=0) / count
+        squares = np.where(valid, (mean - values) ** 2, 0.0).sum(axis=0)
+        return mean, np.sqrt(np.where(count > 1, squares / (count - 1), np.nan))
+
+
+def equity_metrics(portfolio_values, risk_free_rate: float = 0.02, initial_cash: float | None = None) -> dict:
+    '''
+    equity-curve metrics, single pass. portfolio_values is one curve (1-D,
+    values are floats) or a (bars x curves) array (values are arrays, one
+    entry per curve). returns are daily and annualized over 252 days.
+    final_portfolio_value and total_return are included when initial_cash
+    is given (an empty curve counts as still holding initial_cash)
+    '''
+    values = np.asarray(portfolio_values, dtype=np.float64)
+    single = values.ndim == 1
+    if single:
+        values = values[:, None]
+    bars, curves = values.shape
+    zeros = np.zeros(curves)
+    metrics = {}
+
+    if initial_cash is not None:
+        final = values[-1] if bars else np.full(curves, float(initial_cash))
+        metrics["final_portfolio_value"] = final
+        metrics["total_return"] = (final - initial_cash) / initial_cash if initial_cash > 0 else zeros
+
+    if bars < 2:
+        sharpe = sortino = volatility = zeros
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = values[1:] / values[:-1] - 1.0
+        valid = ~np.isnan(returns)
+        count = valid.sum(axis=0)
+        mean, std = _column_std(returns, valid, count)
+
+        annualized_return = mean * TRADING_DAYS
+        volatility = np.where(count > 0, std * TRADING_DAYS ** 0.5, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(
+                (count > 0) & (std != 0),
+                (annualized_return - risk_free_rate) / (std * TRADING_DAYS ** 0.5),
+                0.0,
+            )
+
+            # downside deviation over the negative returns only; none (or no
+            # spread) means unbounded sortino if the return beats the risk-free rate
+            negative = valid & (returns < 0)
+            downside_count = negative.sum(axis=0)
+            _, downside_std = _column_std(returns, negative, downside_count)
+            no_downside = (downside_count == 0) | (downside_std == 0)
+            sortino = np.where(
+                no_downside,
+                np.where(annualized_return > risk_free_rate, np.inf, 0.0),
+                (annualized_return - risk_free_rate) / (downside_std * TRADING_DAYS ** 0.5),
+            )
+            sortino = np.where(count > 0, sortino, 0.0)
+
+    if bars:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = values / np.maximum.accumulate(values, axis=0) - 1.0
+        max_drawdown = np.abs(np.nanmin(drawdown, axis=0))
+    else:
+        max_drawdown = zeros
+
+    metrics.update({
+        "sharpe_ratio": sharpe,
+        "sortino_ratio": sortino,
+        "max_drawdown": max_drawdown,
+        "volatility": volatility,
+    })
+    if single:
+        return {key: float(value[0]) for key, value in metrics.items()}
+    return metrics
+
+
+def trade_metrics(trade_side, trade_price, trade_shares) -> dict:
+    '''
+    round-trip statistics of one trade ledger (side +1 buy / -1 sell, as
+    simulate_long_flat returns it). a sell closes the most recent buy since
+    the previous sell, for min(buy shares, sell shares); sells with nothing
+    to close are ignored
+    '''
+    side = np.asarray(trade_side)
+    price = np.asarray(trade_price, dtype=np.float64)
+    shares = np.asarray(trade_shares, dtype=np.float64)
+    positions = np.arange(len(side))
+
+    is_sell = side < 0
+    last_buy = np.maximum.accumulate(np.where(side > 0, positions, -1)) if len(side) else positions
+    # last sell strictly before each trade
+    prev_sell = np.concatenate(([-1], np.maximum.accumulate(np.where(is_sell, positions, -1))[:-1])) if len(side) else positions
+    closing = is_sell & (last_buy > prev_sell)
+
+    sells = np.flatnonzero(closing)
+    buys = last_buy[sells]
+    buy_price = price[buys]
+    size = np.minimum(shares[buys], shares[sells])
+    pnl = (price[sells] - buy_price) * size
+    cost = np.where(buy_price > 0, buy_price * size, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(cost > 0, pnl / cost, 0.0)
+
+    round_trips = len(sells)
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl <= 0]
+    return {
+        "total_trades": int(len(side)),
+        "round_trips": int(round_trips),
+        "win_rate": (len(wins) / round_trips) if round_trips > 0 else 0.0,
+        "avg_win": float(wins.sum() / len(wins)) if len(wins) else 0.0,
+        "avg_loss": float(losses.sum() / len(losses)) if len(losses) else 0.0,
+        "avg_trade_return": float(returns.sum() / round_trips) if round_trips > 0 else 0.0,
+    }
+
+
+def trade_ledger(trades: list):
+    '''
+    (side, price, shares) arrays of a list of trade dicts; actions other
+    than buy/sell get side 0
+    '''
+    side = np.array([1 if t.get("action") == "buy" else -1 if t.get("action") == "sell" else 0 for t in trades], dtype=np.int64)
+    price = np.array([t.get("price", 0.0) for t in trades], dtype=np.float64)
+    shares = np.array([t.get("shares", 0.0) for t in trades], dtype=np.float64)
+    return side, price, shares
+
+
+def metrics_from_arrays(initial_cash: float, portfolio_values, trade_side, trade_price, trade_shares, risk_free_rate: float = 0.02) -> dict:
+    '''
+    every metric of calculate_full_metrics, from an equity array and a
+    trade ledger as arrays
+    '''
+    curve = equity_metrics(portfolio_values, risk_free_rate, initial_cash)
+    return {
+        "initial_cash": float(initial_cash),
+        "final_portfolio_value": curve.pop("final_portfolio_value"),
+        "total_return": curve.pop("total_return"),
+        **trade_metrics(trade_side, trade_price, trade_shares),
+        **curve,
+    }
+
 
 def get_basic_metrics(
     initial_cash: float,
@@ -8,136 +168,39 @@ def get_basic_metrics(
     '''
     calculate basic metrics
     '''
-    metrics = {
+    curve = equity_metrics(portfolio_values, initial_cash=initial_cash)
+    return {
         "initial_cash": float(initial_cash),
-        "final_portfolio_value": float(portfolio_values[-1]) if portfolio_values else float(initial_cash),
+        "final_portfolio_value": curve["final_portfolio_value"],
+        "total_return": curve["total_return"],
+        **trade_metrics(*trade_ledger(trades)),
     }
 
-    # Total return based on portfolio values time series
-    final_value = metrics["final_portfolio_value"]
-    total_return = 0.0
-    if initial_cash > 0:
-        total_return = (final_value - initial_cash) / initial_cash
-    metrics["total_return"] = float(total_return)
-
-    # Derive round-trip trade PnLs from trades list (buy followed by sell)
-    round_trip_pnls = []
-    last_buy = None
-    for t in trades:
-        action = t.get("action")
-        if action == "buy":
-            last_buy = t
-        elif action == "sell" and last_buy is not None:
-            buy_price = float(last_buy.get("price", 0.0))
-            sell_price = float(t.get("price", 0.0))
-            shares = float(min(last_buy.get("shares", 0.0), t.get("shares", 0.0)))
-            pnl = (sell_price - buy_price) * shares
-            # Return for the trade relative to cost basis
-            cost = buy_price * shares if buy_price > 0 else 0.0
-            ret = (pnl / cost) if cost > 0 else 0.0
-            round_trip_pnls.append({
-                "pnl": pnl,
-                "return": ret
-            })
-            last_buy = None
-
-    num_round_trips = len(round_trip_pnls)
-    wins = [p for p in round_trip_pnls if p["pnl"] > 0]
-    losses = [p for p in round_trip_pnls if p["pnl"] <= 0]
-
-    metrics.update({
-        "total_trades": int(len(trades)),
-        "round_trips": int(num_round_trips),
-        "win_rate": (len(wins) / num_round_trips) if num_round_trips > 0 else 0.0,
-        "avg_win": float(sum(p["pnl"] for p in wins) / len(wins)) if wins else 0.0,
-        "avg_loss": float(sum(p["pnl"] for p in losses) / len(losses)) if losses else 0.0,
-        "avg_trade_return": float(sum(p["return"] for p in round_trip_pnls) / num_round_trips) if num_round_trips > 0 else 0.0,
-    })
-
-    return metrics
-
 def get_sharpe_ratio(portfolio_values: list, risk_free_rate: float) -> float:
     '''
     calculate sharpe ratio
     risk_free_rate: annual risk-free rate
     '''
-    if len(portfolio_values) < 2:
-        return 0.0
-    
-    # Convert portfolio values to returns
-    portfolio_series = pd.Series(portfolio_values)
-    returns = portfolio_series.pct_change().dropna()
-    
-    if len(returns) == 0 or returns.std() == 0:
-        return 0.0
-    
-    # Calculate annualized metrics
-    # Assuming daily data, annualize by multiplying by 252 trading days
-    annualized_return = returns.mean() * 252
-    annualized_volatility = returns.std() * (252 ** 0.5)
-    
-    # Sharpe ratio = (Portfolio Return - Risk-Free Rate) / Portfolio Volatility
-    sharpe_ratio = (annualized_return - risk_free_rate) / annualized_volatility
-    
-    return sharpe_ratio
+    return equity_metrics(portfolio_values, risk_free_rate)["sharpe_ratio"]
 
 def get_sortino_ratio(portfolio_values: list, risk_free_rate: float) -> float:
     '''
     calculate sortino ratio
     risk_free_rate: annual risk-free rate (default 2%)
     '''
-    if len(portfolio_values) < 2:
-        return 0.0
-    
-    # Convert portfolio values to returns
-    portfolio_series = pd.Series(portfolio_values)
-    returns = portfolio_series.pct_change().dropna()
-    
-    if len(returns) == 0:
-        return 0.0
-    
-    # Calculate annualized return
-    annualized_return = returns.mean() * 252
-    
-    # Calculate downside deviation (only negative returns)
-    negative_returns = returns[returns < 0]
-    
-    if len(negative_returns) == 0 or negative_returns.std() == 0:
-        # If no negative returns, Sortino ratio is infinite (perfect downside protection)
-        return float('inf') if annualized_return > risk_free_rate else 0.0
-    
-    # Calculate annualized downside deviation
-    downside_deviation = negative_returns.std() * (252 ** 0.5)
-    
-    # Sortino ratio = (Portfolio Return - Risk-Free Rate) / Downside Deviation
-    sortino_ratio = (annualized_return - risk_free_rate) / downside_deviation
-    
-    return sortino_ratio
+    return equity_metrics(portfolio_values, risk_free_rate)["sortino_ratio"]
 
 def get_max_drawdown(portfolio_values: list) -> float:
     '''
     calculate max drawdown
     '''
-    if not portfolio_values:
-        return 0.0
-    s = pd.Series(portfolio_values, dtype="float64")
-    running_max = s.cummax()
-    drawdown = s / running_max - 1.0
-    max_dd = drawdown.min()  # most negative
-    return float(abs(max_dd))
+    return equity_metrics(portfolio_values)["max_drawdown"]
 
 def get_volatility(portfolio_values: list) -> float:
     '''
     calculate volatility
     '''
-    if len(portfolio_values) < 2:
-        return 0.0
-    s = pd.Series(portfolio_values, dtype="float64")
-    rets = s.pct_change().dropna()
-    if len(rets) == 0:
-        return 0.0
-    annualized_vol = rets.std() * (252 ** 0.5)
-    return float(annualized_vol)
+    return equity_metrics(portfolio_values)["volatility"]
 
 def calculate_full_metrics(
     strategy: str,
@@ -150,15 +213,4 @@ def calculate_full_metrics(
     '''
     calculate all metrics
     '''
-    basic_metrics = get_basic_metrics(initial_cash, trades, portfolio_values)
-    sharpe_ratio = get_sharpe_ratio(portfolio_values, risk_free_rate)
-    sortino_ratio = get_sortino_ratio(portfolio_values, risk_free_rate)
-    max_drawdown = get_max_drawdown(portfolio_values)
-    volatility = get_volatility(portfolio_values)
-    return {
-        **basic_metrics,
-        "sharpe_ratio": sharpe_ratio,
-        "sortino_ratio": sortino_ratio,
-        "max_drawdown": max_drawdown,
-        "volatility": volatility
-    }
\ No newline at end of file
+    return metrics_from_arrays(initial_cash, portfolio_values, *trade_ledger(trades), risk_free_rate=risk_free_rate)
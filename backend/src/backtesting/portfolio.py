@@ -0,0 +1,156 @@
+'''
+multi-symbol portfolio backtesting engine
+
+runs one strategy over N symbols at once. prices are aligned on the dates
+every symbol has, each symbol gets its own slice of the starting cash and
+trades it long/flat all-in (like BaseStrategy does for one stock), and the
+slices add up to one combined equity curve. signals, positions and equity are
+all (dates x symbols) arrays, so the whole portfolio is one vectorized pass.
+'''
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.backtesting.metrics import calculate_full_metrics
+from src.backtesting.sweep import IndicatorCache
+from src.backtesting.vectorized import long_flat_positions
+
+
+def align_frames(frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    '''
+    restrict every frame to the dates all of them share (sorted ascending)
+    '''
+    if not frames:
+        raise ValueError("Portfolio needs at least one symbol")
+    common = None
+    for frame in frames.values():
+        common = frame.index if common is None else common.intersection(frame.index)
+    common = common.sort_values()
+    if len(common) == 0:
+        raise ValueError("Symbols have no dates in common")
+    return {symbol: frame.loc[common] for symbol, frame in frames.items()}
+
+
+def normalize_weights(symbols: List[str], weights: Dict[str, float] | None = None) -> np.ndarray:
+    '''
+    per-symbol fraction of the starting cash, equal split by default.
+    weights may sum to less than 1; the rest stays in cash
+    '''
+    if not weights:
+        return np.full(len(symbols), 1.0 / len(symbols))
+    unknown = set(weights) - set(symbols)
+    if unknown:
+        raise ValueError(f"Weights given for symbols not in the portfolio: {sorted(unknown)}")
+    w = np.array([float(weights.get(symbol, 0.0)) for symbol in symbols])
+    if (w < 0).any():
+        raise ValueError("Weights must be non-negative")
+    if w.sum() > 1 + 1e-9:
+        raise ValueError(f"Weights sum to {w.sum():.4f}, must be at most 1")
+    return w
+
+
+def simulate_portfolio(close: np.ndarray, buy_signal: np.ndarray, sell_signal: np.ndarray, allocations: np.ndarray) -> dict:
+    '''
+    long/flat all-in simulation per column of (dates x symbols) arrays
+
+    a column's value only moves on bars it was long going into, by the close
+    to close ratio, so value = allocation * cumulative product of those ratios.
+    returns position, per-symbol equity, and the fills as flat arrays
+    (trade_row, trade_col, trade_side, trade_price, trade_shares) in date order.
+    '''
+    close = np.asarray(close, dtype=np.float64)
+    position = long_flat_positions(buy_signal, sell_signal)
+
+    growth = np.ones_like(close)
+    held = position[:-1] == 1
+    growth[1:] = np.where(held, close[1:] / close[:-1], 1.0)
+    equity = allocations * np.cumprod(growth, axis=0)
+
+    change = np.diff(position.astype(np.int8), axis=0, prepend=np.zeros((1, close.shape[1]), dtype=np.int8))
+    trade_row, trade_col = np.nonzero(change)
+    trade_price = close[trade_row, trade_col]
+
+    return {
+        "position": position,
+        "equity": equity,
+        "trade_row": trade_row,
+        "trade_col": trade_col,
+        "trade_side": change[trade_row, trade_col],
+        "trade_price": trade_price,
+        # all-in: the shares bought (or still held when selling) are worth the slice's equity
+        "trade_shares": equity[trade_row, trade_col] / trade_price,
+    }
+
+
+class PortfolioBacktestingEngine:
+    def __init__(self, strategy_cls, params: dict, initial_cash: float = 100000, weights: Dict[str, float] | None = None):
+        self.strategy_cls = strategy_cls
+        self.params = params
+        self.initial_cash = initial_cash
+        self.weights = weights
+
+    def run(self, frames: Dict[str, pd.DataFrame], risk_free_rate: float = 0.02) -> Dict:
+        '''
+        frames: symbol -> OHLCV frame with a date index
+        returns the combined curve, per-symbol summary, trades and metrics
+        '''
+        aligned = align_frames(frames)
+        symbols = list(aligned)
+        dates = aligned[symbols[0]].index
+        allocations = normalize_weights(symbols, self.weights) * self.initial_cash
+
+        cache = IndicatorCache([aligned[symbol] for symbol in symbols])
+        buy, sell = self.strategy_cls.sweep_signals(cache, self.params)
+        sim = simulate_portfolio(cache.close, buy, sell, allocations)
+
+        idle_cash = self.initial_cash - allocations.sum()
+        portfolio_values = sim["equity"].sum(axis=1) + idle_cash
+
+        trade_dates = dates[sim["trade_row"]]
+        trades = [
+            {
+                "date": date,
+                "symbol": symbols[col],
+                "action": "buy" if side > 0 else "sell",
+                "price": float(price),
+                "shares": float(shares),
+            }
+            for date, col, side, price, shares in zip(
+                trade_dates, sim["trade_col"], sim["trade_side"], sim["trade_price"], sim["trade_shares"]
+            )
+        ]
+
+        # round trips are paired per symbol, so hand metrics the trades symbol by symbol
+        by_symbol = sorted(trades, key=lambda t: t["symbol"])
+        metrics = calculate_full_metrics(
+            strategy=self.strategy_cls.__name__,
+            params=self.params,
+            initial_cash=self.initial_cash,
+            trades=by_symbol,
+            portfolio_values=portfolio_values.tolist(),
+            risk_free_rate=risk_free_rate,
+        )
+
+        final_equity = sim["equity"][-1]
+        final_position = sim["position"][-1]
+        per_symbol = {
+            symbol: {
+                "allocation": float(allocations[j]),
+                "final_value": float(final_equity[j]),
+                "return": float(final_equity[j] / allocations[j] - 1) if allocations[j] > 0 else 0.0,
+                "trades": int((sim["trade_col"] == j).sum()),
+                "position": "long" if final_position[j] == 1 else "flat",
+            }
+            for j, symbol in enumerate(symbols)
+        }
+
+        return {
+            "symbols": symbols,
+            "dates": list(dates.strftime('%Y-%m-%d')),
+            "portfolio_values": portfolio_values.tolist(),
+            "per_symbol": per_symbol,
+            "trades": trades,
+            **metrics,
+        }
@@ -0,0 +1,225 @@
+'''
+parameter sweep / grid search
+
+runs every combination of a parameter grid over one price series. the series
+is loaded once, each distinct rolling window is computed once in an
+IndicatorCache, and every combination goes through the vectorized simulator
+before blocks of equity curves are scored together by equity_metrics and
+ranked.
+'''
+
+import itertools
+import math
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.backtesting.metrics import equity_metrics, trade_metrics
+from src.backtesting.vectorized import simulate_long_flat
+from src.indicators.moving_average import sma
+from src.indicators.volatility import rolling_std
+
+MAX_SWEEP_COMBINATIONS = 20000
+# combinations whose equity curves are scored together (bounds the bars x
+# combinations array equity_metrics works on)
+METRICS_BLOCK = 256
+CURVE_METRICS = ("sharpe_ratio", "sortino_ratio", "max_drawdown", "volatility")
+# below this a sweep runs in-process even when an executor is given
+PARALLEL_SWEEP_MIN_COMBINATIONS = 64
+
+
+class IndicatorCache:
+    '''
+    memoized rolling statistics over one close series, shared by all the
+    combinations of a sweep so e.g. the 50-bar mean is computed only once.
+    data is one OHLCV frame, or a list of date-aligned frames for a
+    portfolio, in which case close and every statistic are (dates x symbols).
+    '''
+    def __init__(self, data):
+        self.data = data
+        if isinstance(data, pd.DataFrame):
+            self.close = data['close'].to_numpy(dtype=np.float64)
+        else:
+            self.close = np.column_stack([frame['close'].to_numpy(dtype=np.float64) for frame in data])
+        self._means = {}
+        self._stds = {}
+
+    def rolling_mean(self, window: int) -> np.ndarray:
+        window = int(window)
+        if window not in self._means:
+            self._means[window] = sma(self.close, window)
+        return self._means[window]
+
+    def rolling_std(self, window: int) -> np.ndarray:
+        # population std (ddof=0), same as the Bollinger strategy
+        window = int(window)
+        if window not in self._stds:
+            self._stds[window] = rolling_std(self.close, window)
+        return self._stds[window]
+
+
+def _range_bounds(spec: Dict) -> tuple:
+    try:
+        start, stop = spec["start"], spec["stop"]
+    except KeyError:
+        raise ValueError(f"Range must have 'start' and 'stop': {spec}")
+    step = spec.get("step", 1)
+    if step <= 0:
+        raise ValueError(f"Range step must be positive: {spec}")
+    return start, stop, step
+
+
+def param_axis_length(spec) -> int:
+    '''
+    number of values expand_param_values(spec) would return, without
+    building them
+    '''
+    if isinstance(spec, dict):
+        start, stop, step = _range_bounds(spec)
+        if all(isinstance(v, int) for v in (start, stop, step)):
+            return len(range(start, stop + 1, step))
+        count = math.floor((stop - start) / step + 1e-9) + 1 if math.isfinite((stop - start) / step) else math.inf
+        return max(count, 0)
+    if isinstance(spec, (list, tuple)):
+        return len(spec)
+    return 1
+
+
+def expand_param_values(spec, limit: int = MAX_SWEEP_COMBINATIONS) -> list:
+    '''
+    one grid axis -> list of values
+    accepts a list of values, a {"start", "stop", "step"} range (stop inclusive)
+    or a single scalar. an axis of more than `limit` values is a ValueError,
+    raised before any of them are built
+    '''
+    length = param_axis_length(spec)
+    if length > limit:
+        raise ValueError(f"Grid axis has {length} values, the limit is {limit}")
+    if isinstance(spec, dict):
+        start, stop, step = _range_bounds(spec)
+        if all(isinstance(v, int) for v in (start, stop, step)):
+            return list(range(start, stop + 1, step))
+        return [round(start + i * step, 10) for i in range(length)]
+    if isinstance(spec, (list, tuple)):
+        return list(spec)
+    return [spec]
+
+
+def param_grid_size(param_grid: Dict) -> int:
+    '''
+    number of combinations in the grid (before accepts_params filtering),
+    from the axis lengths alone
+    '''
+    return math.prod(param_axis_length(spec) for spec in param_grid.values())
+
+
+def expand_param_grid(param_grid: Dict, limit: int = MAX_SWEEP_COMBINATIONS) -> List[Dict]:
+    '''
+    cartesian product of every axis in the grid, as a list of param dicts.
+    a grid of more than `limit` combinations is a ValueError, raised from
+    the axis lengths before any dict is built
+    '''
+    size = param_grid_size(param_grid)
+    if size > limit:
+        raise ValueError(f"Grid has {size} combinations, the limit is {limit}")
+    names = list(param_grid)
+    axes = [expand_param_values(param_grid[name]) for name in names]
+    return [dict(zip(names, values)) for values in itertools.product(*axes)]
+
+
+def _finite_or_none(value):
+    # inf/NaN metrics (e.g. sortino with no losing days) are not valid JSON
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def evaluate_combinations(
+    data: pd.DataFrame,
+    strategy_cls,
+    combinations: List[Dict],
+    initial_cash: float = 100000,
+    risk_free_rate: float = 0.02,
+    progress: Callable[[int, int], None] | None = None,
+) -> List[Dict]:
+    '''
+    unranked {"params": {...}, **metrics} rows for the given combinations,
+    all sharing one IndicatorCache. progress(done, total) is called after
+    each block of combinations; an exception it raises aborts the sweep
+    '''
+    cache = IndicatorCache(data)
+    results = []
+    for start in range(0, len(combinations), METRICS_BLOCK):
+        if progress is not None:
+            progress(len(results), len(combinations))
+        block = combinations[start:start + METRICS_BLOCK]
+        signal_sets = [strategy_cls.sweep_signals(cache, params) for params in block]
+        results.extend(evaluate_signal_sets(cache.close, signal_sets, block, initial_cash, risk_free_rate))
+    return results
+
+
+def evaluate_signal_sets(close, signal_sets: List[tuple], combinations: List[Dict], initial_cash: float = 100000, risk_free_rate: float = 0.02) -> List[Dict]:
+    '''
+    {"params": {...}, **metrics} per (buy, sell) signal pair over one close
+    series, simulated with the vectorized long/flat simulator. the equity
+    curves are stacked and scored in one batched equity_metrics call
+    (non-finite metrics become None)
+    '''
+    if not signal_sets:
+        return []
+    sims = [simulate_long_flat(close, buy, sell, initial_cash) for buy, sell in signal_sets]
+    curves = equity_metrics(np.column_stack([sim["equity"] for sim in sims]), risk_free_rate, initial_cash)
+    rows = []
+    for k, (params, sim) in enumerate(zip(combinations, sims)):
+        metrics = {
+            "initial_cash": float(initial_cash),
+            "final_portfolio_value": float(curves["final_portfolio_value"][k]),
+            "total_return": float(curves["total_return"][k]),
+            **trade_metrics(sim["trade_side"], sim["trade_price"], sim["trade_shares"]),
+            **{key: float(curves[key][k]) for key in CURVE_METRICS},
+        }
+        rows.append({"params": params, **{key: _finite_or_none(v) for key, v in metrics.items()}})
+    return rows
+
+
+def rank_results(results: List[Dict], sort_by: str = "sharpe_ratio", ascending: bool = False) -> List[Dict]:
+    '''
+    sort rows on one metric; rows where it is None always go last
+    '''
+    if results and sort_by not in results[0]:
+        raise ValueError(f"Unknown sort metric: {sort_by}")
+
+    ranked = [r for r in results if r[sort_by] is not None]
+    ranked.sort(key=lambda r: r[sort_by], reverse=not ascending)
+    return ranked + [r for r in results if r[sort_by] is None]
+
+
+def run_parameter_sweep(
+    data: pd.DataFrame,
+    strategy_cls,
+    param_grid: Dict,
+    initial_cash: float = 100000,
+    sort_by: str = "sharpe_ratio",
+    ascending: bool = False,
+    risk_free_rate: float = 0.02,
+    executor=None,
+    progress: Callable[[int, int], None] | None = None,
+) -> List[Dict]:
+    '''
+    evaluate every accepted combination of param_grid on data
+    returns one row per combination: {"params": {...}, **metrics}, ranked on
+    sort_by (non-finite metrics become None and always rank last).
+    with a BatchExecutor, large grids are split across its worker processes.
+    progress(done, total) reports combinations evaluated so far.
+    '''
+    combinations = [p for p in expand_param_grid(param_grid) if strategy_cls.accepts_params(p)]
+
+    if executor is not None and len(combinations) >= PARALLEL_SWEEP_MIN_COMBINATIONS:
+        results = executor.run_sweep(data, strategy_cls, combinations, initial_cash, risk_free_rate, progress=progress)
+    else:
+        results = evaluate_combinations(data, strategy_cls, combinations, initial_cash, risk_free_rate, progress=progress)
+    if progress is not None:
+        progress(len(results), len(combinations))
+
+    return rank_results(results, sort_by, ascending)
@@ -0,0 +1,106 @@
+'''
+vectorized long/flat trade simulation
+
+derives the same state machine as BaseStrategy.simulate_trades (buy all-in at
+the close when flat, sell everything at the close when long) from whole
+buy_signal / sell_signal / close arrays instead of walking rows one at a time.
+'''
+
+import numpy as np
+
+
+def long_flat_positions(buy_signal, sell_signal) -> np.ndarray:
+    '''
+    position held after each bar: 1 = long, 0 = flat
+
+    a bar with only a buy (or only a sell) signal forces the state to long
+    (or flat) no matter what it was before. a bar with both signals always
+    flips the state, because the loop buys when flat and sells when long.
+    so the state is the last forced state xor the parity of flips since then.
+    works along axis 0, so 2-D (dates x symbols) inputs are fine too.
+    '''
+    buy = np.asarray(buy_signal) == 1
+    sell = np.asarray(sell_signal) == 1
+    n = buy.shape[0]
+
+    forced = buy ^ sell
+    flips_seen = np.cumsum(buy & sell, axis=0)
+
+    rows = np.arange(n).reshape((n,) + (1,) * (buy.ndim - 1))
+    last_forced = np.maximum.accumulate(np.where(forced, rows, -1), axis=0)
+    has_forced = last_forced >= 0
+    safe_idx = np.maximum(last_forced, 0)
+
+    # at a forced bar the state is simply "was it a buy"
+    forced_state = has_forced & np.take_along_axis(buy, safe_idx, axis=0)
+    flips_at_forced = np.where(has_forced, np.take_along_axis(flips_seen, safe_idx, axis=0), 0)
+    flipped = ((flips_seen - flips_at_forced) & 1).astype(bool)
+
+    return (forced_state ^ flipped).astype(np.int8)
+
+
+def simulate_long_flat(close, buy_signal, sell_signal, initial_cash: float = 100000) -> dict:
+    '''
+    simulate the all-in long/flat strategy for one symbol
+
+    the position path and the per-bar cash/shares are computed in bulk; only
+    the fills themselves (a handful per series) are walked in python so the
+    cash and share amounts use exactly the same arithmetic as buy()/sell().
+
+    returns a dict of arrays:
+    - position: 1/0 per bar
+    - trade_index, trade_side (+1 buy, -1 sell), trade_price, trade_shares
+    - cash, shares, equity: per bar, after that bar's fill
+    - final_cash, final_shares: scalars
+    '''
+    close = np.asarray(close, dtype=np.float64)
+    position = long_flat_positions(buy_signal, sell_signal)
+
+    change = np.diff(position.astype(np.int8), prepend=np.int8(0))
+    trade_index = np.flatnonzero(change)
+    trade_side = change[trade_index]
+    trade_price = close[trade_index]
+
+    num_trades = len(trade_index)
+    trade_shares = np.empty(num_trades, dtype=np.float64)
+    cash_after = np.empty(num_trades, dtype=np.float64)
+    shares_after = np.empty(num_trades, dtype=np.float64)
+
+    cash = initial_cash
+    shares = 0
+    for k in range(num_trades):
+        price = trade_price[k]
+        if trade_side[k] > 0:
+            shares = cash / price
+            cash = 0
+            trade_shares[k] = shares
+        else:
+            trade_shares[k] = shares
+            cash += shares * price
+            shares = 0
+        cash_after[k] = cash
+        shares_after[k] = shares
+
+    # carry each fill's cash/shares forward to every bar until the next fill
+    last_fill = np.searchsorted(trade_index, np.arange(len(close)), side='right') - 1
+    has_fill = last_fill >= 0
+    safe_fill = np.maximum(last_fill, 0)
+    if num_trades:
+        cash_path = np.where(has_fill, cash_after[safe_fill], float(initial_cash))
+        shares_path = np.where(has_fill, shares_after[safe_fill], 0.0)
+    else:
+        cash_path = np.full(len(close), float(initial_cash))
+        shares_path = np.zeros(len(close))
+
+    return {
+        "position": position,
+        "trade_index": trade_index,
+        "trade_side": trade_side,
+        "trade_price": trade_price,
+        "trade_shares": trade_shares,
+        "cash": cash_path,
+        "shares": shares_path,
+        "equity": cash_path + shares_path * close,
+        "final_cash": cash,
+        "final_shares": shares,
+    }
@@ -0,0 +1,284 @@
+'''
+walk-forward analysis
+
+rolls a train/test split through one price series: on each fold the
+parameter grid is optimized over the train window (like a sweep), and the
+winning combination is then traded on the test window that follows. the test
+windows don't overlap, so stitched together they form one out-of-sample
+equity curve.
+
+signals are computed once per combination over the whole series, from one
+IndicatorCache, and every fold slices them; indicator warmup for a window
+therefore comes from the bars before it, and overlapping train windows share
+all of their rolling statistics. combinations are streamed in blocks: a
+block's signals are scored on every fold's train window and dropped before
+the next block, so memory doesn't grow with the grid. with a BatchExecutor
+the combinations are split across its worker processes, and the per-fold
+winners of every chunk are merged.
+'''
+
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.backtesting.metrics import calculate_full_metrics
+from src.backtesting.sweep import (
+    METRICS_BLOCK, PARALLEL_SWEEP_MIN_COMBINATIONS, IndicatorCache, _finite_or_none,
+    evaluate_signal_sets, expand_param_grid, rank_results,
+)
+from src.backtesting.vectorized import simulate_long_flat
+
+# below this many (combination, fold) train-window evaluations a walk-forward
+# runs in-process even when an executor is given. one evaluation costs about a
+# third of a full-series sweep combination (2520 bars, 252-bar train windows),
+# so this is the work of a PARALLEL_SWEEP_MIN_COMBINATIONS sweep
+PARALLEL_WALK_FORWARD_MIN_EVALUATIONS = 3 * PARALLEL_SWEEP_MIN_COMBINATIONS
+
+
+def walk_forward_folds(length: int, train_bars: int, test_bars: int, anchored: bool = False) -> List[tuple]:
+    '''
+    (train_start, train_end, test_end) bar indices of every fold, ends
+    exclusive; the test window is [train_end, test_end). folds advance by
+    test_bars and the last test window may be shorter. anchored folds all
+    train from bar 0 instead of over a rolling train_bars window
+    '''
+    if train_bars < 2 or test_bars < 1:
+        raise ValueError(f"Need train_bars >= 2 and test_bars >= 1, got {train_bars} and {test_bars}")
+    if length < train_bars + 1:
+        raise ValueError(f"Need more than {train_bars} bars for one fold, got {length}")
+    folds = []
+    for train_end in range(train_bars, length, test_bars):
+        train_start = 0 if anchored else train_end - train_bars
+        folds.append((train_start, train_end, min(train_end + test_bars, length)))
+    return folds
+
+
+def best_train_rows(
+    data: pd.DataFrame,
+    strategy_cls,
+    combinations: List[Dict],
+    folds: List[tuple],
+    initial_cash: float = 100000,
+    risk_free_rate: float = 0.02,
+    sort_by: str = "sharpe_ratio",
+    ascending: bool = False,
+    offset: int = 0,
+    progress: Callable[[int, int], None] | None = None,
+) -> List[Dict]:
+    '''
+    per fold, the best combination on its train window (ranked like
+    run_parameter_sweep): its {"params", "index", **train metrics} row,
+    index being its position in combinations plus offset. only one
+    METRICS_BLOCK of signals is alive at a time. progress(done, total) is
+    called after each block; an exception it raises aborts the search
+    '''
+    cache = IndicatorCache(data)
+    close = cache.close
+    best = [None] * len(folds)
+    for start in range(0, len(combinations), METRICS_BLOCK):
+        block = combinations[start:start + METRICS_BLOCK]
+        signals = []
+        for params in block:
+            buy, sell = strategy_cls.sweep_signals(cache, params)
+            signals.append((np.asarray(buy, dtype=np.int8), np.asarray(sell, dtype=np.int8)))
+
+        for f, (train_start, train_end, _) in enumerate(folds):
+            train = slice(train_start, train_end)
+            block_rows = evaluate_signal_sets(close[train], [(buy[train], sell[train]) for buy, sell in signals], block, initial_cash, risk_free_rate)
+            candidates = [{**row, "index": offset + start + k} for k, row in enumerate(block_rows)]
+            # the sort is stable, so on ties the earlier combination stays best
+            best[f] = rank_results(([best[f]] if best[f] is not None else []) + candidates, sort_by, ascending)[0]
+        if progress is not None:
+            progress(start + len(block), len(combinations))
+    return best
+
+
+def evaluate_folds(
+    data: pd.DataFrame,
+    strategy_cls,
+    combinations: List[Dict],
+    folds: List[tuple],
+    initial_cash: float = 100000,
+    risk_free_rate: float = 0.02,
+    sort_by: str = "sharpe_ratio",
+    ascending: bool = False,
+    best: List[Dict] | None = None,
+    progress: Callable[[int, int], None] | None = None,
+) -> List[Dict]:
+    '''
+    one row per fold: the best combination on its train window with its
+    train metrics, and that combination's test window simulation
+    (simulate_long_flat arrays, starting from initial_cash) and test
+    metrics. best is best_train_rows' result when it was already computed
+    (e.g. by worker processes); otherwise it is computed here, passing
+    progress through
+    '''
+    if best is None:
+        best = best_train_rows(data, strategy_cls, combinations, folds, initial_cash, risk_free_rate, sort_by, ascending, progress=progress)
+
+    # only the winners' signals are needed again, once each
+    cache = IndicatorCache(data)
+    close = cache.close
+    winners = {}
+    name = strategy_cls.__name__
+    rows = []
+    for (train_start, train_end, test_end), row in zip(folds, best):
+        train_metrics = dict(row)
+        index = train_metrics.pop("index")
+        params = train_metrics.pop("params")
+        if index not in winners:
+            buy, sell = strategy_cls.sweep_signals(cache, combinations[index])
+            winners[index] = (np.asarray(buy, dtype=np.int8), np.asarray(sell, dtype=np.int8))
+        buy, sell = winners[index]
+
+        test = slice(train_end, test_end)
+        sim = simulate_long_flat(close[test], buy[test], sell[test], initial_cash)
+        rows.append({
+            "fold": (train_start, train_end, test_end),
+            "params": params,
+            "train_metrics": train_metrics,
+            "test": sim,
+            "test_metrics": _sim_metrics(sim, close[test], name, initial_cash, risk_free_rate),
+        })
+    return rows
+
+
+def _sim_metrics(sim: Dict, close: np.ndarray, strategy_name: str, initial_cash: float, risk_free_rate: float) -> Dict:
+    metrics = calculate_full_metrics(
+        strategy=strategy_name,
+        params={},
+        initial_cash=initial_cash,
+        trades=_trade_records(sim, close),
+        portfolio_values=sim["equity"].tolist(),
+        risk_free_rate=risk_free_rate,
+    )
+    return {k: _finite_or_none(v) for k, v in metrics.items()}
+
+
+def _trade_records(sim: Dict, close: np.ndarray, scale: float = 1.0, dates=None, offset: int = 0) -> List[Dict]:
+    # fills of one test window, shares scaled by `scale`; a position still
+    # open at the end is sold at the window's last close. dates[offset + i]
+    # is the date of the window's bar i
+    fills = list(zip(sim["trade_index"].tolist(), sim["trade_side"].tolist(), sim["trade_price"].tolist(), sim["trade_shares"].tolist()))
+    if sim["final_shares"] > 0:
+        fills.append((len(close) - 1, -1, float(close[-1]), float(sim["final_shares"])))
+    trades = []
+    for index, side, price, shares in fills:
+        trade = {"action": "buy" if side > 0 else "sell", "price": price, "shares": shares * scale}
+        if dates is not None:
+            trade["date"] = dates[offset + index]
+        trades.append(trade)
+    return trades
+
+
+class WalkForwardEngine:
+    '''
+    rolling (or anchored) train/test walk-forward optimization of one
+    strategy's parameter grid over one symbol
+    '''
+    def __init__(
+        self,
+        strategy_cls,
+        param_grid: Dict,
+        train_bars: int = 252,
+        test_bars: int = 63,
+        anchored: bool = False,
+        sort_by: str = "sharpe_ratio",
+        ascending: bool = False,
+        initial_cash: float = 100000,
+        risk_free_rate: float = 0.02,
+    ):
+        self.strategy_cls = strategy_cls
+        self.param_grid = param_grid
+        self.train_bars = int(train_bars)
+        self.test_bars = int(test_bars)
+        self.anchored = anchored
+        self.sort_by = sort_by
+        self.ascending = ascending
+        self.initial_cash = initial_cash
+        self.risk_free_rate = risk_free_rate
+
+    def combinations(self) -> List[Dict]:
+        # expand_param_grid refuses grids over MAX_SWEEP_COMBINATIONS before building them
+        combinations = [p for p in expand_param_grid(self.param_grid) if self.strategy_cls.accepts_params(p)]
+        if not combinations:
+            raise ValueError("Parameter grid has no valid combinations")
+        return combinations
+
+    def run(self, data: pd.DataFrame, executor=None, progress: Callable[[int, int], None] | None = None) -> Dict:
+        '''
+        returns
+        - folds: per fold the train/test dates, the chosen params and the
+          train and test metrics
+        - dates, portfolio_values: the stitched out-of-sample equity curve,
+          each test window starting from the previous one's final equity
+        - trades: the out-of-sample trades (a position still open at the end
+          of a test window is sold at its last close)
+        - the metrics of the stitched curve (non-finite ones become None)
+        with a BatchExecutor, the combinations are split across its worker
+        processes. progress(done, total) reports combinations searched so
+        far (each over every train window)
+        '''
+        combinations = self.combinations()
+        folds = walk_forward_folds(len(data), self.train_bars, self.test_bars, self.anchored)
+
+        args = (combinations, folds, self.initial_cash, self.risk_free_rate, self.sort_by, self.ascending)
+        if executor is not None and len(combinations) * len(folds) >= PARALLEL_WALK_FORWARD_MIN_EVALUATIONS:
+            rows = executor.run_walk_forward(data, self.strategy_cls, *args, progress=progress)
+        else:
+            rows = evaluate_folds(data, self.strategy_cls, *args, progress=progress)
+        if progress is not None:
+            progress(len(combinations), len(combinations))
+        return self._stitch(data, rows)
+
+    def _stitch(self, data: pd.DataFrame, rows: List[Dict]) -> Dict:
+        # long/flat all-in trading is linear in capital, so a test window run
+        # from initial_cash is rescaled to the equity carried into it
+        dates = data.index.strftime('%Y-%m-%d')
+        close = data['close'].to_numpy(dtype=np.float64)
+        capital = float(self.initial_cash)
+        equity_parts = []
+        trades = []
+        folds = []
+        for row in rows:
+            train_start, train_end, test_end = row["fold"]
+            sim = row["test"]
+            scale = capital / self.initial_cash
+            equity = sim["equity"] * scale
+            equity_parts.append(equity)
+
+            trades.extend(_trade_records(sim, close[train_end:test_end], scale, dates, train_end))
+            capital = float(equity[-1])
+
+            folds.append({
+                "train_start": dates[train_start],
+                "train_end": dates[train_end - 1],
+                "test_start": dates[train_end],
+                "test_end": dates[test_end - 1],
+                "params": row["params"],
+                "train_metrics": row["train_metrics"],
+                "test_metrics": row["test_metrics"],
+            })
+
+        portfolio_values = np.concatenate(equity_parts).tolist()
+        first_test = rows[0]["fold"][1]
+        metrics = calculate_full_metrics(
+            strategy=self.strategy_cls.__name__,
+            params={},
+            initial_cash=self.initial_cash,
+            trades=trades,
+            portfolio_values=portfolio_values,
+            risk_free_rate=self.risk_free_rate,
+        )
+        return {
+            **{k: _finite_or_none(v) for k, v in metrics.items()},
+            "train_bars": self.train_bars,
+            "test_bars": self.test_bars,
+            "anchored": self.anchored,
+            "sort_by": self.sort_by,
+            "folds": folds,
+            "dates": dates[first_test:].tolist(),
+            "portfolio_values": portfolio_values,
+            "trades": trades,
+        }
@@ -1,118 +1,401 @@
+import asyncio
+import httpx
 import requests
+import os
+import re
+import threading
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from src.monitoring.prometheus import registry
+
+DEFAULT_BASE_URL = "https://www.alphavantage.co/query"
+
+# Every request made, served at /metrics
+FETCH_REQUESTS = registry.counter(
+    "backtester_alpha_vantage_requests_total",
+    "Alpha Vantage TIME_SERIES_DAILY requests by outputsize and outcome (ok, error, rate_limited)",
+    ("outputsize", "outcome"),
+)
+
+# outputsize=compact returns the latest 100 bars
+COMPACT_MAX_GAP = 100
+
+
+def choose_outputsize(last_date: Optional[str], today: Optional[str] = None) -> str:
+    """
+    'compact' when the business days after last_date (YYYY-MM-DD) up to
+    today fit in a compact response, else 'full'. Weekday counting ignores
+    holidays, so it over-counts trading days and errs towards 'full'.
+    """
+    if not last_date:
+        return 'full'
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    gap = np.busday_count(np.datetime64(last_date, 'D') + 1, np.datetime64(today, 'D') + 1)
+    return 'compact' if gap < COMPACT_MAX_GAP else 'full'
+
+
+# Columns produced by the streaming parser, in order
+SERIES_COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume')
+
+# One day of a TIME_SERIES_DAILY body; all values are quoted strings
+_DAY_PATTERN = re.compile(
+    rb'"(\d{4}-\d{2}-\d{2})"\s*:\s*\{\s*'
+    rb'"1\. open"\s*:\s*"([^"]*)"\s*,\s*'
+    rb'"2\. high"\s*:\s*"([^"]*)"\s*,\s*'
+    rb'"3\. low"\s*:\s*"([^"]*)"\s*,\s*'
+    rb'"4\. close"\s*:\s*"([^"]*)"\s*,\s*'
+    rb'"5\. volume"\s*:\s*"([^"]*)"\s*\}'
+)
+
+
+class AlphaVantageError(Exception):
+    """Alpha Vantage answered without a usable time series."""
+
+
+class RateLimitError(AlphaVantageError):
+    """Alpha Vantage answered with a rate-limit notice instead of data."""
+
+
+class DailySeriesParser:
+    """
+    Incremental TIME_SERIES_DAILY parser: feed() response body chunks as
+    they arrive, then finish(). Each chunk's complete day objects are
+    converted in one vectorized step into preallocated arrays (grown by
+    doubling), so the body is never decoded as a whole and no per-day dicts
+    are built.
+    """
+
+    def __init__(self, capacity: int = 8192):
+        self.columns = {
+            'date': np.empty(capacity, dtype='datetime64[ns]'),
+            **{name: np.empty(capacity, dtype=np.float64) for name in ('open', 'high', 'low', 'close')},
+            'volume': np.empty(capacity, dtype=np.int64),
+        }
+        self.n = 0
+        self._buffer = b''
+
+    def feed(self, chunk: bytes):
+        self._buffer += chunk
+        matches = list(_DAY_PATTERN.finditer(self._buffer))
+        if not matches:
+            return
+        # Everything up to the last complete day is consumed; keep the tail
+        self._buffer = self._buffer[matches[-1].end():]
+        fields = np.array([m.groups() for m in matches])
+        n, k = self.n, len(fields)
+        if n + k > len(self.columns['date']):
+            size = max(2 * len(self.columns['date']), n + k)
+            self.columns = {name: np.resize(values, size) for name, values in self.columns.items()}
+        for j, name in enumerate(SERIES_COLUMNS):
+            self.columns[name][n:n + k] = fields[:, j].astype(self.columns[name].dtype)
+        self.n = n + k
+
+    def finish(self) -> Dict[str, np.ndarray]:
+        """
+        Columns keyed by SERIES_COLUMNS (date as datetime64[ns]) in ascending
+        date order. Raises RateLimitError / AlphaVantageError when the body
+        was an API notice instead of a series.
+        """
+        n = self.n
+        if n == 0:
+            # Errors and notices are small JSON objects, left whole in the buffer
+            _raise_for_notice(json.loads(self._buffer or b'{}'))
+
+        columns = {name: values[:n] for name, values in self.columns.items()}
+        dates = columns['date']
+        if n > 1 and dates[0] > dates[-1] and (dates[:-1] >= dates[1:]).all():
+            # The API lists newest first
+            return {name: values[::-1].copy() for name, values in columns.items()}
+        if (dates[:-1] > dates[1:]).any():
+            order = np.argsort(dates, kind='stable')
+            return {name: values[order] for name, values in columns.items()}
+        return columns
+
+
+def parse_daily_series(chunks: Iterable[bytes], capacity: int = 8192) -> Dict[str, np.ndarray]:
+    """
+    Parse a TIME_SERIES_DAILY response body from an iterable of byte chunks
+    with DailySeriesParser.
+    """
+    parser = DailySeriesParser(capacity)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.finish()
+
+
+def _raise_for_notice(data: Dict):
+    if 'Error Message' in data:
+        raise AlphaVantageError(data['Error Message'])
+    if 'Note' in data:
+        raise RateLimitError(data['Note'])
+    if 'Information' in data and 'rate limit' in data['Information'].lower():
+        raise RateLimitError(data['Information'])
+    if 'Information' in data:
+        raise AlphaVantageError(f"API info: {data['Information']}")
+    raise AlphaVantageError("No time series data found")
+
+
+def columns_to_rows(symbol: str, columns: Dict[str, np.ndarray]) -> List[Dict]:
+    """
+    Row dicts (the fetch_stock_data format) from parsed columns.
+    """
+    dates = np.datetime_as_string(columns['date'], unit='D').tolist()
+    return [
+        {'symbol': symbol, 'date': d, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+        for d, o, h, l, c, v in zip(
+            dates, *(columns[name].tolist() for name in SERIES_COLUMNS[1:])
+        )
+    ]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: refills at rate tokens per second up to
+    capacity, acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """acquire() for coroutines: waits with asyncio.sleep instead of blocking"""
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def _take(self) -> float:
+        # Take a token and return 0, or return the seconds until one is due
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+def _counted(outputsize: str, columns: Optional[Dict[str, np.ndarray]]) -> Optional[Dict[str, np.ndarray]]:
+    # _fetch_once* return None for every failure other than a rate limit
+    FETCH_REQUESTS.inc(outputsize=outputsize, outcome="error" if columns is None else "ok")
+    return columns
+
 
 class AlphaVantageFetcher:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        requests_per_minute: Optional[float] = None,
+        burst: int = 1,
+        max_retries: int = 3,
+        retry_backoff: float = 15.0,
+    ):
+        """
+        Args:
+            api_key: Alpha Vantage API key
+            base_url: Query endpoint (override for tests or proxies)
+            requests_per_minute: Request quota; defaults to ALPHA_VANTAGE_RPM
+                or 5 (free tier). Premium keys allow 75 and up.
+            burst: Requests allowed back to back before the rate applies
+            max_retries: Retries after a rate-limit response
+            retry_backoff: Seconds before the first retry, doubled each time
+        """
         self.api_key = api_key
-        self.base_url = "https://www.alphavantage.co/query"
-        
-    def fetch_stock_data(self, symbol: str) -> Optional[List[Dict]]:
+        self.base_url = base_url or DEFAULT_BASE_URL
+        if requests_per_minute is None:
+            requests_per_minute = float(os.getenv('ALPHA_VANTAGE_RPM', '5'))
+        self.rate_limiter = TokenBucket(requests_per_minute / 60.0, burst)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    def fetch_stock_data(self, symbol: str, outputsize: str = 'full') -> Optional[List[Dict]]:
         """
         Fetch daily stock data for a symbol from Alpha Vantage.
+        Waits for the rate limiter before each request and retries with
+        exponential backoff when the API reports a rate limit.
         
         Args:
             symbol: Stock symbol (e.g., 'AAPL', 'MSFT')
+            outputsize: 'full' for all history, 'compact' for the latest 100 bars
             
         Returns:
-            List of dictionaries with OHLCV data, or None if error
+            List of dictionaries with OHLCV data (oldest first), or None if error
+        """
+        columns = self.fetch_stock_columns(symbol, outputsize)
+        if columns is None:
+            return None
+        return columns_to_rows(symbol, columns)
+
+    def fetch_stock_columns(self, symbol: str, outputsize: str = 'full') -> Optional[Dict[str, np.ndarray]]:
+        """
+        Like fetch_stock_data, but returns the parsed arrays from
+        parse_daily_series (oldest first) without building row dicts.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                return _counted(outputsize, self._fetch_once(symbol, outputsize))
+            except RateLimitError as e:
+                FETCH_REQUESTS.inc(outputsize=outputsize, outcome="rate_limited")
+                if attempt == self.max_retries:
+                    print(f"API limit reached for {symbol}, giving up: {e}")
+                    return None
+                wait = self.retry_backoff * 2 ** attempt
+                print(f"API limit reached for {symbol}, retrying in {wait:.0f}s: {e}")
+                time.sleep(wait)
+
+    async def fetch_stock_columns_async(self, symbol: str, outputsize: str = 'full') -> Optional[Dict[str, np.ndarray]]:
+        """
+        fetch_stock_columns for the event loop: httpx streaming request,
+        rate limiter and retry backoff all awaited instead of blocking, and
+        the body parsed chunk by chunk on a worker thread.
         """
-        params = {
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire_async()
+            try:
+                return _counted(outputsize, await self._fetch_once_async(symbol, outputsize))
+            except RateLimitError as e:
+                FETCH_REQUESTS.inc(outputsize=outputsize, outcome="rate_limited")
+                if attempt == self.max_retries:
+                    print(f"API limit reached for {symbol}, giving up: {e}")
+                    return None
+                wait = self.retry_backoff * 2 ** attempt
+                print(f"API limit reached for {symbol}, retrying in {wait:.0f}s: {e}")
+                await asyncio.sleep(wait)
+
+    def _params(self, symbol: str, outputsize: str) -> Dict[str, str]:
+        return {
             'function': 'TIME_SERIES_DAILY',
             'symbol': symbol,
-            'outputsize': 'full',  # Get maximum historical data
+            'outputsize': outputsize,
             'apikey': self.api_key
         }
+
+    async def _fetch_once_async(self, symbol: str, outputsize: str) -> Optional[Dict[str, np.ndarray]]:
+        try:
+            print(f"Fetching data for {symbol}...")
+            parser = DailySeriesParser()
+            async with httpx.AsyncClient(timeout=30) as client:
+                async with client.stream('GET', self.base_url, params=self._params(symbol, outputsize)) as response:
+                    response.raise_for_status()
+                    # Each chunk is parsed on a worker thread as it arrives, so
+                    # neither the event loop nor memory holds the whole body
+                    async for chunk in response.aiter_bytes(64 * 1024):
+                        await asyncio.to_thread(parser.feed, chunk)
+            columns = await asyncio.to_thread(parser.finish)
+
+            print(f"Successfully fetched {len(columns['date'])} records for {symbol}")
+            return columns
+
+        except RateLimitError:
+            raise
+        except AlphaVantageError as e:
+            print(f"Error for {symbol}: {e}")
+            return None
+        except httpx.HTTPError as e:
+            print(f"Request error for {symbol}: {e}")
+            return None
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"Parse error for {symbol}: {e}")
+            return None
+        except Exception as e:
+            print(f"Unexpected error for {symbol}: {e}")
+            return None
+
+    def _fetch_once(self, symbol: str, outputsize: str) -> Optional[Dict[str, np.ndarray]]:
+        params = self._params(symbol, outputsize)
         
         try:
             print(f"Fetching data for {symbol}...")
-            response = requests.get(self.base_url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
+            with requests.get(self.base_url, params=params, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                columns = parse_daily_series(response.iter_content(chunk_size=64 * 1024))
             
-            # Check for API errors
-            if 'Error Message' in data:
-                print(f"Error for {symbol}: {data['Error Message']}")
-                return None
-                
-            if 'Note' in data:
-                print(f"API limit reached: {data['Note']}")
-                return None
-                
-            if 'Information' in data:
-                print(f"API info: {data['Information']}")
-                return None
-            
-            # Extract time series data
-            time_series = data.get('Time Series (Daily)', {})
-            if not time_series:
-                print(f"No time series data found for {symbol}")
-                return None
-            
-            # Convert to our format
-            stock_data = []
-            for date_str, values in time_series.items():
-                try:
-                    # Parse date
-                    date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                    
-                    stock_data.append({
-                        'symbol': symbol,
-                        'date': date_str,
-                        'open': float(values['1. open']),
-                        'high': float(values['2. high']),
-                        'low': float(values['3. low']),
-                        'close': float(values['4. close']),
-                        'volume': int(values['5. volume'])
-                    })
-                except (ValueError, KeyError) as e:
-                    print(f"Error parsing data for {symbol} on {date_str}: {e}")
-                    continue
-            
-            # Sort by date (oldest first)
-            stock_data.sort(key=lambda x: x['date'])
-            
-            print(f"Successfully fetched {len(stock_data)} records for {symbol}")
-            return stock_data
+            print(f"Successfully fetched {len(columns['date'])} records for {symbol}")
+            return columns
             
+        except RateLimitError:
+            raise
+        except AlphaVantageError as e:
+            print(f"Error for {symbol}: {e}")
+            return None
         except requests.exceptions.RequestException as e:
             print(f"Request error for {symbol}: {e}")
             return None
-        except json.JSONDecodeError as e:
-            print(f"JSON decode error for {symbol}: {e}")
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"Parse error for {symbol}: {e}")
             return None
         except Exception as e:
             print(f"Unexpected error for {symbol}: {e}")
             return None
     
-    def fetch_multiple_symbols(self, symbols: List[str], delay: float = 12.0) -> Dict[str, List[Dict]]:
+    def iter_fetch(
+        self,
+        symbols: List[str],
+        max_workers: Optional[int] = None,
+        outputsize: Union[str, Mapping[str, str]] = 'full',
+        columnar: bool = False,
+    ) -> Iterator[Tuple[str, Optional[Union[List[Dict], Dict[str, np.ndarray]]]]]:
         """
-        Fetch data for multiple symbols with delay between requests.
+        Fetch symbols concurrently, yielding (symbol, data or None) in the
+        order they finish. Throughput is bounded by the rate limiter, the
+        worker threads only overlap network I/O and parsing.
+        outputsize is one value for every symbol or a per-symbol mapping.
+        With columnar=True data is the arrays from fetch_stock_columns.
+        """
+        if not symbols:
+            return
+        sizes = outputsize if isinstance(outputsize, Mapping) else dict.fromkeys(symbols, outputsize)
+        pool = ThreadPoolExecutor(max_workers=max_workers or min(8, len(symbols)))
+        try:
+            fetch = self.fetch_stock_columns if columnar else self.fetch_stock_data
+            futures = {pool.submit(fetch, symbol, sizes[symbol]): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # Consumer stopped early: don't start the remaining requests
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def fetch_multiple_symbols(self, symbols: List[str], delay: Optional[float] = None, max_workers: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """
+        Fetch data for multiple symbols concurrently under the rate limit.
         
         Args:
             symbols: List of stock symbols
-            delay: Delay between requests in seconds (Alpha Vantage free tier: 5 requests/minute)
+            delay: Optional minimum seconds between requests; replaces the
+                configured rate (e.g. 12.0 for the free tier's 5 requests/minute)
+            max_workers: Concurrent requests in flight
             
         Returns:
             Dictionary mapping symbol to data list
         """
+        if delay:
+            self.rate_limiter = TokenBucket(1.0 / delay, 1)
+
         results = {}
-        
-        for i, symbol in enumerate(symbols):
-            print(f"\nFetching {symbol} ({i+1}/{len(symbols)})...")
-            
-            data = self.fetch_stock_data(symbol)
+        for symbol, data in self.iter_fetch(symbols, max_workers):
             if data:
                 results[symbol] = data
             else:
                 print(f"Failed to fetch data for {symbol}")
-            
-            # Add delay between requests (except for last one)
-            if i < len(symbols) - 1:
-                print(f"Waiting {delay} seconds before next request...")
-                time.sleep(delay)
-        
         return results
@@ -0,0 +1,36 @@
+from typing import Callable, Dict, List, Mapping, Optional, Union
+
+import numpy as np
+
+from .alpha_vantage_fetcher import AlphaVantageFetcher
+
+
+def ingest_symbols(
+    fetcher: AlphaVantageFetcher,
+    symbols: List[str],
+    write: Callable[[str, Dict[str, np.ndarray]], int],
+    max_workers: Optional[int] = None,
+    outputsize: Union[str, Mapping[str, str]] = 'full',
+) -> Dict:
+    """
+    Fetch symbols concurrently and pass each parsed payload to
+    write(symbol, columns) as soon as it arrives. The columns are the typed
+    arrays from AlphaVantageFetcher.fetch_stock_columns.
+
+    write is only ever called from this thread, so the database sees a
+    single writer while fetches for other symbols continue. outputsize is
+    passed through to AlphaVantageFetcher.iter_fetch.
+
+    Returns:
+        {"rows": rows written, "fetched": [symbols], "failed": [symbols]}
+    """
+    summary = {"rows": 0, "fetched": [], "failed": []}
+    for i, (symbol, data) in enumerate(fetcher.iter_fetch(symbols, max_workers, outputsize, columnar=True), start=1):
+        if data is None or len(data['date']) == 0:
+            print(f"Failed to fetch data for {symbol} ({i}/{len(symbols)})")
+            summary["failed"].append(symbol)
+            continue
+        summary["rows"] += write(symbol, data)
+        summary["fetched"].append(symbol)
+        print(f"Stored {symbol} ({i}/{len(symbols)})")
+    return summary
@@ -0,0 +1,39 @@
+import threading
+from typing import Callable
+
+
+class BackgroundRefresher:
+    """
+    Calls refresh() on a daemon thread right away and then every interval
+    seconds until stop(). Errors are logged and the schedule carries on.
+    """
+
+    def __init__(self, refresh: Callable[[], object], interval: float):
+        self.refresh = refresh
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="price-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Ask the thread to exit. A refresh in progress (possibly waiting on the
+        rate limiter) is not interrupted; being a daemon it won't block exit.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Background refresh failed: {e}")
+            self._stop.wait(self.interval)
@@ -0,0 +1,140 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from src.monitoring.timing import span
+from .models import get_stock_data
+
+# Columns kept in cached frames (id/symbol are dropped, the key is the symbol)
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class OHLCVCache:
+    """
+    Per-symbol cache of full-history OHLCV DataFrames (date index, sorted),
+    bounded by total memory with least-recently-used eviction.
+    Thread-safe; frames handed out must be treated as read-only.
+
+    invalidate() bumps the symbol's generation. A loader takes
+    generation(symbol) before reading the database and passes it to put(),
+    which drops the frame if an invalidation happened in between, so a
+    read that raced a write never caches the pre-write bars.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()  # symbol -> (frame, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._epoch = 0  # bumped by invalidate() of everything
+        self._generations = {}  # symbol -> invalidations of that symbol
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, symbol):
+        with self._lock:
+            entry = self._frames.get(symbol)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(symbol)
+            self.hits += 1
+            return entry[0]
+
+    def generation(self, symbol):
+        with self._lock:
+            return (self._epoch, self._generations.get(symbol, 0))
+
+    def put(self, symbol, frame, generation=None):
+        """
+        Cache frame for symbol; with generation (from generation(), taken
+        before the frame was read) the frame is dropped if symbol has been
+        invalidated since.
+        """
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(symbol, 0)):
+                return
+            old = self._frames.pop(symbol, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if nbytes > self.max_bytes:
+                # Bigger than the whole budget; serve it uncached
+                return
+            self._frames[symbol] = (frame, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._frames.popitem(last=False)
+                self._bytes -= evicted_bytes
+
+    def invalidate(self, symbol=None):
+        """
+        Drop one symbol, or everything when symbol is None.
+        """
+        with self._lock:
+            if symbol is None:
+                self._frames.clear()
+                self._bytes = 0
+                self._epoch += 1
+                return
+            self._generations[symbol] = self._generations.get(symbol, 0) + 1
+            old = self._frames.pop(symbol, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "symbols": len(self._frames),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+# Process-wide cache; OHLCV_CACHE_MB sets the budget (default 256 MB)
+ohlcv_cache = OHLCVCache(int(os.getenv("OHLCV_CACHE_MB", "256")) * 1024 * 1024)
+
+
+def frame_from_columns(columns):
+    """
+    OHLCV DataFrame (date index) over the arrays of a columnar
+    get_stock_data result.
+    """
+    return pd.DataFrame(
+        {col: columns[col] for col in PRICE_COLUMNS},
+        index=pd.DatetimeIndex(columns['date'], name='date'),
+    )
+
+
+def load_price_frame(symbol):
+    """
+    Read a symbol's full history from the database into a DataFrame.
+    """
+    with span("db_read"):
+        columns = get_stock_data(symbol, columnar=True)
+    with span("frame"):
+        return frame_from_columns(columns)
+
+
+def get_price_frame(symbol, start_date=None, end_date=None):
+    """
+    Cached OHLCV frame for a symbol, sliced to [start_date, end_date]
+    (either bound may be None). Only a cache miss touches the database.
+    """
+    frame = ohlcv_cache.get(symbol)
+    if frame is None:
+        # taken before the read: a write committed meanwhile invalidates it
+        generation = ohlcv_cache.generation(symbol)
+        frame = load_price_frame(symbol)
+        if not frame.empty:
+            ohlcv_cache.put(symbol, frame, generation)
+    if start_date is None and end_date is None:
+        return frame
+    with span("slice"):
+        return frame.loc[start_date:end_date]
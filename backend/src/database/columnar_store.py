@@ -0,0 +1,111 @@
+"""
+Columnar price store: one Arrow IPC (Feather v2) file per symbol in an
+arrow/ directory beside the SQLite database (data/arrow/ by default),
+written uncompressed as a single record batch so reads can memory-map the
+file and hand out NumPy views without copying or parsing.
+
+SQLite stays the system of record; these files are a read-optimized replica
+that writers refresh after committing (see models.sync_columnar_store).
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pyarrow as pa
+
+from . import connection
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+SCHEMA = pa.schema([
+    ('date', pa.timestamp('ns')),
+    ('open', pa.float64()),
+    ('high', pa.float64()),
+    ('low', pa.float64()),
+    ('close', pa.float64()),
+    ('volume', pa.int64()),
+])
+
+
+def get_store_dir():
+    """
+    Directory holding the per-symbol Arrow files (created if missing): arrow/
+    beside the database they mirror, so a DB_PATH elsewhere gets its own store.
+    """
+    store_dir = connection.get_db_path().parent / "arrow"
+    store_dir.mkdir(parents=True, exist_ok=True)
+    return store_dir
+
+
+def symbol_path(symbol):
+    return get_store_dir() / f"{symbol}.arrow"
+
+
+def has_symbol(symbol):
+    return symbol_path(symbol).exists()
+
+
+def write_symbol(symbol, columns):
+    """
+    Replace a symbol's file with columns (dict of equal-length arrays keyed
+    like SCHEMA, sorted by date). Written to a temp file and renamed, so
+    readers never see a partial file.
+    """
+    table = pa.table(
+        {
+            'date': np.asarray(columns['date'], dtype='datetime64[ns]'),
+            **{col: np.asarray(columns[col]) for col in PRICE_COLUMNS},
+        },
+        schema=SCHEMA,
+    )
+    path = symbol_path(symbol)
+    # A temp name of its own, so concurrent exports of one symbol (refresher
+    # and a request) never write into each other's file
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f'{symbol}.', suffix='.arrow.tmp', delete=False) as tmp:
+        tmp_path = tmp.name
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, SCHEMA) as writer:
+                writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return table.num_rows
+
+
+def read_symbol(symbol, start_date=None, end_date=None):
+    """
+    Memory-mapped read of a symbol's file, sliced to [start_date, end_date]
+    (YYYY-MM-DD, either may be None). Returns a dict of NumPy arrays that
+    view the mapped file, or None if the symbol has no file.
+    """
+    path = symbol_path(symbol)
+    if not path.exists():
+        return None
+
+    source = pa.memory_map(str(path), 'r')
+    table = pa.ipc.open_file(source).read_all()
+    arrays = {
+        name: _column_view(table.column(name))
+        for name in SCHEMA.names
+    }
+
+    dates = arrays['date']
+    lo = 0 if start_date is None else np.searchsorted(dates, np.datetime64(start_date, 'ns'), side='left')
+    hi = len(dates) if end_date is None else np.searchsorted(dates, np.datetime64(end_date, 'ns'), side='right')
+    return {name: values[lo:hi] for name, values in arrays.items()}
+
+
+def _column_view(column):
+    if column.num_chunks == 1:
+        return column.chunk(0).to_numpy(zero_copy_only=True)
+    # Only happens for files not written by write_symbol
+    return column.to_numpy()
+
+
+def delete_symbol(symbol):
+    path = symbol_path(symbol)
+    if path.exists():
+        path.unlink()
@@ -1,30 +1,52 @@
+import asyncio
 import sqlite3
 import os
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
 
+# Applied to every connection when it is opened
+STARTUP_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256 MB
+    "PRAGMA cache_size=-32768",    # 32 MB (negative = KiB)
+)
+
 def get_db_path():
     """
-    Get the path to the SQLite database file.
-    Creates the data directory if it doesn't exist.
+    Get the path to the SQLite database file: DB_PATH if set, otherwise
+    data/backtester.db. Creates the data directory if it doesn't exist.
     """
+    if os.getenv("DB_PATH"):
+        return Path(os.getenv("DB_PATH"))
+
     # Get the backend directory (parent of src)
     backend_dir = Path(__file__).parent.parent.parent
     data_dir = backend_dir / "data"
-    
+
     # Create data directory if it doesn't exist
     data_dir.mkdir(exist_ok=True)
-    
+
     # Return path to database file
     return data_dir / "backtester.db"
 
+def _open_connection(db_path, check_same_thread=True):
+    conn = sqlite3.connect(str(db_path), check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row  # This allows us to access columns by name
+    for pragma in STARTUP_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
 def get_db_connection():
     """
-    Create and return a connection to the SQLite database.
+    Create and return a new connection to the SQLite database.
+    The caller owns it and must close it; request code should use db_session().
     """
-    db_path = get_db_path()
-    conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row  # This allows us to access columns by name
-    return conn
+    return _open_connection(get_db_path())
 
 def close_db_connection(conn):
     """
@@ -33,6 +55,116 @@ def close_db_connection(conn):
     if conn:
         conn.close()
 
+
+class ConnectionPool:
+    """
+    Thread-safe pool of persistent SQLite connections.
+    Keeps up to max_idle connections open between uses; more can be checked
+    out at once, the extras are closed on release. If get_db_path() starts
+    pointing somewhere else, idle connections to the old file are dropped.
+    """
+
+    def __init__(self, max_idle=8):
+        self.max_idle = max_idle
+        self._idle = []
+        self._path = None
+        self._paths = {}  # checked-out connection -> database file it points at
+        self._lock = threading.Lock()
+        self.created = 0
+        self.in_use = 0
+
+    def acquire(self):
+        path = str(get_db_path())
+        stale = []
+        with self._lock:
+            if path != self._path:
+                stale, self._idle = self._idle, []
+                self._path = path
+            conn = self._idle.pop() if self._idle else None
+            self.in_use += 1
+            if conn is not None:
+                self._paths[conn] = path
+        for old in stale:
+            old.close()
+        if conn is None:
+            try:
+                # Connections move between request threads, one user at a time
+                conn = _open_connection(path, check_same_thread=False)
+            except Exception:
+                with self._lock:
+                    self.in_use -= 1
+                raise
+            with self._lock:
+                self.created += 1
+                self._paths[conn] = path
+        return conn
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self.in_use -= 1
+            path = self._paths.pop(conn, None)
+            if path == self._path and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {"created": self.created, "idle": len(self._idle), "in_use": self.in_use}
+
+
+# Process-wide pool; DB_POOL_SIZE sets how many idle connections are kept
+pool = ConnectionPool(max_idle=int(os.getenv("DB_POOL_SIZE", "8")))
+
+_session_conn = ContextVar("db_session_conn", default=None)
+
+@contextmanager
+def db_session():
+    """
+    Pooled connection for the current context. Nested db_session() blocks
+    (e.g. every models.py call made while handling one request) share the
+    outermost block's connection; it goes back to the pool when that exits.
+    """
+    conn = _session_conn.get()
+    if conn is not None:
+        yield conn
+        return
+
+    conn = pool.acquire()
+    token = _session_conn.set(conn)
+    try:
+        yield conn
+    finally:
+        _session_conn.reset(token)
+        pool.release(conn)
+
+def with_db_session(func):
+    """
+    Run func inside db_session(), so every database call it makes shares one
+    pooled connection.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with db_session():
+            return func(*args, **kwargs)
+    return wrapper
+
+async def run_in_db_session(func, *args, **kwargs):
+    """
+    Call blocking database code from a coroutine: func runs on a worker
+    thread inside its own db_session(), so the event loop never waits on
+    SQLite.
+    """
+    return await asyncio.to_thread(with_db_session(func), *args, **kwargs)
+
 # Example usage:
 if __name__ == "__main__":
     # Test the connection
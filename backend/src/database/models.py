@@ -1,105 +1,365 @@
-from .connection import get_db_connection
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .connection import db_session, get_db_path
 
 def create_tables():
     """
     Create the stock_data table if it doesn't exist.
     This is the main table that stores all stock price data.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with db_session() as conn:
+        cursor = conn.cursor()
     
-    # Create the stock_data table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS stock_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            symbol TEXT NOT NULL,
-            date DATE NOT NULL,
-            open REAL NOT NULL,
-            high REAL NOT NULL,
-            low REAL NOT NULL,
-            close REAL NOT NULL,
-            volume INTEGER NOT NULL,
-            UNIQUE(symbol, date)
-        )
-    ''')
+        # Create the stock_data table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stock_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                symbol TEXT NOT NULL,
+                date DATE NOT NULL,
+                open REAL NOT NULL,
+                high REAL NOT NULL,
+                low REAL NOT NULL,
+                close REAL NOT NULL,
+                volume INTEGER NOT NULL,
+                UNIQUE(symbol, date)
+            )
+        ''')
     
-    # Create indexes for better query performance
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_symbol_date 
-        ON stock_data(symbol, date)
-    ''')
+        # Create indexes for better query performance
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_symbol_date 
+            ON stock_data(symbol, date)
+        ''')
     
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_date 
-        ON stock_data(date)
-    ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_date 
+            ON stock_data(date)
+        ''')
+
+        # Per-symbol catalog, kept in step with stock_data by every writer
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS symbols (
+                symbol TEXT PRIMARY KEY,
+                first_date DATE NOT NULL,
+                last_date DATE NOT NULL,
+                row_count INTEGER NOT NULL,
+                last_fetched_at TEXT
+            )
+        ''')
+
+        # Background jobs (see src/jobs); request/result are JSON text
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                request TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_jobs_status
+            ON jobs(status)
+        ''')
+
+        # Disk tier of the response cache (see result_cache.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS result_cache (
+                key TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                media_type TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                last_used_at TEXT NOT NULL
+            )
+        ''')
+
+        # Databases created before the catalog existed: build it once from stock_data
+        if cursor.execute('SELECT 1 FROM symbols LIMIT 1').fetchone() is None:
+            cursor.execute('''
+                INSERT INTO symbols (symbol, first_date, last_date, row_count)
+                SELECT symbol, MIN(date), MAX(date), COUNT(*)
+                FROM stock_data
+                GROUP BY symbol
+            ''')
     
-    conn.commit()
-    conn.close()
+        conn.commit()
+    invalidate_symbol_catalog()
     print("Database tables created successfully!")
 
+def update_symbol_catalog(conn, symbols, fetched=True):
+    """
+    Recompute the catalog rows for symbols from stock_data.
+    Runs on the caller's connection without committing, so it lands in the
+    same transaction as the insert that changed those symbols. Call
+    invalidate_symbol_catalog() once that transaction has committed.
+    """
+    fetched_at = datetime.now(timezone.utc).isoformat(timespec='seconds') if fetched else None
+    for symbol in symbols:
+        conn.execute('''
+            INSERT INTO symbols (symbol, first_date, last_date, row_count, last_fetched_at)
+            SELECT symbol, MIN(date), MAX(date), COUNT(*), ?
+            FROM stock_data
+            WHERE symbol = ?
+            GROUP BY symbol
+            ON CONFLICT(symbol) DO UPDATE SET
+                first_date = excluded.first_date,
+                last_date = excluded.last_date,
+                row_count = excluded.row_count,
+                last_fetched_at = COALESCE(excluded.last_fetched_at, symbols.last_fetched_at)
+        ''', (fetched_at, symbol))
+
+def insert_stock_columns(conn, symbol, columns):
+    """
+    Bulk insert one symbol's price arrays (dict keyed date/open/high/low/
+    close/volume, date as datetime64) straight from the arrays, skipping
+    dates already stored, and update its catalog row. Runs on the caller's
+    connection without committing. Returns the number of rows inserted.
+    """
+    cursor = conn.executemany('''
+        INSERT OR IGNORE INTO stock_data (symbol, date, open, high, low, close, volume)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', zip(
+        itertools.repeat(symbol),
+        np.datetime_as_string(columns['date'], unit='D').tolist(),
+        columns['open'].tolist(),
+        columns['high'].tolist(),
+        columns['low'].tolist(),
+        columns['close'].tolist(),
+        columns['volume'].tolist(),
+    ))
+    inserted = cursor.rowcount or 0
+    update_symbol_catalog(conn, [symbol])
+    return inserted
+
+# In-memory mirror of the symbols table: (db path, loaded at, {symbol: row dict})
+_catalog = None
+_catalog_lock = threading.Lock()
+# Bumped by every invalidation; a reload that raced one is not kept
+_catalog_generation = 0
+# Seconds a mirror is trusted before it is reloaded, so rows committed by
+# another process (e.g. fetch_real_data.py) reach a running server
+CATALOG_TTL_SECONDS = float(os.getenv("SYMBOL_CATALOG_TTL", "5"))
+
+def invalidate_symbol_catalog():
+    """
+    Drop the in-memory catalog mirror; the next lookup reloads it.
+    """
+    global _catalog, _catalog_generation
+    with _catalog_lock:
+        _catalog = None
+        _catalog_generation += 1
+
+def _symbol_catalog():
+    global _catalog
+    path = str(get_db_path())
+    catalog = _catalog
+    if catalog is not None and catalog[0] == path and time.monotonic() - catalog[1] < CATALOG_TTL_SECONDS:
+        return catalog[2]
+
+    with _catalog_lock:
+        generation = _catalog_generation
+    loaded_at = time.monotonic()
+    with db_session() as conn:
+        rows = conn.execute('SELECT * FROM symbols ORDER BY symbol').fetchall()
+    entries = {row['symbol']: dict(row) for row in rows}
+    with _catalog_lock:
+        # A write invalidated the catalog while these rows were read; they
+        # may predate it, so answer this lookup but don't install them
+        if generation == _catalog_generation:
+            _catalog = (path, loaded_at, entries)
+    return entries
+
+def get_symbol_info(symbol):
+    """
+    Catalog entry for a symbol (symbol, first_date, last_date, row_count,
+    last_fetched_at) or None if it has no data.
+    """
+    return _symbol_catalog().get(symbol)
+
+def symbol_exists(symbol):
+    """
+    Whether any bars are stored for the symbol.
+    """
+    return symbol in _symbol_catalog()
+
 def get_available_symbols():
     """
     Get all unique symbols in the database.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT DISTINCT symbol FROM stock_data ORDER BY symbol')
-    symbols = [row['symbol'] for row in cursor.fetchall()]
-    
-    conn.close()
-    return symbols
+    return sorted(_symbol_catalog())
 
 def get_date_range(symbol):
     """
     Get the available date range for a specific symbol.
     Returns (start_date, end_date) or (None, None) if no data.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT MIN(date) as start_date, MAX(date) as end_date 
-        FROM stock_data 
-        WHERE symbol = ?
-    ''', (symbol,))
-    
-    result = cursor.fetchone()
-    conn.close()
-    
-    if result and result['start_date']:
-        return result['start_date'], result['end_date']
+    info = get_symbol_info(symbol)
+    if info:
+        return info['first_date'], info['last_date']
     else:
         return None, None
 
-def get_stock_data(symbol, start_date=None, end_date=None):
+def get_price_store():
+    """
+    Backend for columnar reads: 'sqlite' (default) or 'arrow', from PRICE_STORE.
+    SQLite is always written; 'arrow' also keeps arrow/<SYMBOL>.arrow
+    files beside the database in step and serves columnar reads from them.
+    """
+    return os.getenv("PRICE_STORE", "sqlite").lower()
+
+def get_stock_data(symbol, start_date=None, end_date=None, columnar=False):
     """
     Get stock data for a symbol within a date range.
     If no dates provided, returns all data for the symbol.
+    With columnar=True returns a dict of NumPy arrays (date as datetime64[ns],
+    open/high/low/close, volume) instead of one dict per row.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    if start_date and end_date:
-        cursor.execute('''
-            SELECT * FROM stock_data 
-            WHERE symbol = ? AND date BETWEEN ? AND ?
-            ORDER BY date
-        ''', (symbol, start_date, end_date))
-    else:
-        cursor.execute('''
-            SELECT * FROM stock_data 
-            WHERE symbol = ?
-            ORDER BY date
-        ''', (symbol,))
-    
-    rows = cursor.fetchall()
-    conn.close()
+    if columnar:
+        return _get_stock_columns(symbol, start_date, end_date)
+
+    with db_session() as conn:
+        if start_date and end_date:
+            cursor = conn.execute('''
+                SELECT * FROM stock_data 
+                WHERE symbol = ? AND date BETWEEN ? AND ?
+                ORDER BY date
+            ''', (symbol, start_date, end_date))
+        else:
+            cursor = conn.execute('''
+                SELECT * FROM stock_data 
+                WHERE symbol = ?
+                ORDER BY date
+            ''', (symbol,))
+        rows = cursor.fetchall()
     
     # Convert to list of dictionaries for easier use
     return [dict(row) for row in rows]
 
+def _get_stock_columns(symbol, start_date=None, end_date=None):
+    if get_price_store() == "arrow":
+        from . import columnar_store
+
+        columns = columnar_store.read_symbol(symbol, start_date, end_date)
+        if columns is None and symbol_exists(symbol):
+            # Not exported yet; build the file from SQLite on first use
+            export_to_columnar_store([symbol])
+            columns = columnar_store.read_symbol(symbol, start_date, end_date)
+        if columns is not None:
+            return columns
+    return _read_sqlite_columns(symbol, start_date, end_date)
+
+def _read_sqlite_columns(symbol, start_date=None, end_date=None):
+    query = 'SELECT date, open, high, low, close, volume FROM stock_data WHERE symbol = ?'
+    params = [symbol]
+    if start_date:
+        query += ' AND date >= ?'
+        params.append(start_date)
+    if end_date:
+        query += ' AND date <= ?'
+        params.append(end_date)
+    query += ' ORDER BY date'
+
+    with db_session() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None  # plain tuples, transposed below
+        rows = cursor.execute(query, params).fetchall()
+
+    if not rows:
+        dates, opens, highs, lows, closes, volumes = (), (), (), (), (), ()
+    else:
+        dates, opens, highs, lows, closes, volumes = zip(*rows)
+    return {
+        'date': np.array(dates, dtype='datetime64[ns]'),
+        'open': np.array(opens, dtype=np.float64),
+        'high': np.array(highs, dtype=np.float64),
+        'low': np.array(lows, dtype=np.float64),
+        'close': np.array(closes, dtype=np.float64),
+        'volume': np.array(volumes, dtype=np.int64),
+    }
+
+def export_to_columnar_store(symbols=None):
+    """
+    Write the Arrow file for each symbol (default: every catalogued symbol)
+    from SQLite. Returns {symbol: rows written}.
+    """
+    from . import columnar_store
+
+    if symbols is None:
+        symbols = get_available_symbols()
+    return {
+        symbol: columnar_store.write_symbol(symbol, _read_sqlite_columns(symbol))
+        for symbol in symbols
+    }
+
+def sync_columnar_store(symbols):
+    """
+    Refresh the Arrow files for symbols after a committed write; a no-op
+    unless PRICE_STORE=arrow.
+    """
+    if get_price_store() == "arrow":
+        export_to_columnar_store(symbols)
+
+# Columns update_job may set
+JOB_FIELDS = ('status', 'progress', 'message', 'result', 'error', 'started_at', 'finished_at')
+
+def insert_job(job_id, kind, request):
+    """
+    Record a new queued job; request is the JSON-encoded request body.
+    """
+    with db_session() as conn:
+        with conn:
+            conn.execute('''
+                INSERT INTO jobs (id, kind, status, request, progress, created_at)
+                VALUES (?, ?, 'queued', ?, 0, ?)
+            ''', (job_id, kind, request, datetime.now(timezone.utc).isoformat(timespec='seconds')))
+
+def update_job(job_id, **fields):
+    """
+    Set some of JOB_FIELDS on a job and commit.
+    """
+    unknown = set(fields) - set(JOB_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+    assignments = ', '.join(f'{name} = ?' for name in fields)
+    with db_session() as conn:
+        with conn:
+            conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*fields.values(), job_id))
+
+def get_job(job_id, with_result=False):
+    """
+    Job row as a dict, or None. The (possibly large) result column is only
+    read when with_result is set.
+    """
+    columns = '*' if with_result else 'id, kind, status, request, progress, message, error, created_at, started_at, finished_at'
+    with db_session() as conn:
+        row = conn.execute(f'SELECT {columns} FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    return dict(row) if row else None
+
+def get_unfinished_jobs():
+    """
+    Queued and running jobs, oldest first (used to resume after a restart).
+    """
+    with db_session() as conn:
+        rows = conn.execute('''
+            SELECT id, kind, status, request FROM jobs
+            WHERE status IN ('queued', 'running')
+            ORDER BY created_at, rowid
+        ''').fetchall()
+    return [dict(row) for row in rows]
+
 # Example usage:
 if __name__ == "__main__":
     # Create tables
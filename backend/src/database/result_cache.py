@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from .connection import db_session
+
+
+def result_cache_key(payload):
+    """
+    Content hash of a normalized request (any JSON-able dict): key order and
+    integral floats (10.0 vs 10) don't change the key.
+    """
+    canonical = json.dumps(_canonical(payload), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class ResultCache:
+    """
+    Serialized responses by key in two tiers: an in-memory LRU bounded by
+    total bytes, backed by the result_cache table so entries outlive the
+    process. The disk tier keeps the max_disk_entries most recently used.
+    Thread-safe; the disk tier goes through db_session().
+    """
+
+    # Prune the disk tier once every this many writes
+    PRUNE_EVERY = 100
+
+    def __init__(self, max_bytes: int, max_disk_entries: int = 10000):
+        self.max_bytes = max_bytes
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()  # key -> (body, media_type)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_memory(self, key):
+        """
+        (body, media_type) from the memory tier, or None. Never touches the
+        database, so it is safe to call on the event loop.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return entry
+
+    def get(self, key):
+        """
+        (body, media_type) from memory, else from disk (promoted to memory),
+        else None.
+        """
+        entry = self.get_memory(key)
+        if entry is not None:
+            return entry
+
+        with db_session() as conn:
+            with conn:
+                row = conn.execute('SELECT body, media_type FROM result_cache WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    conn.execute('UPDATE result_cache SET last_used_at = ? WHERE key = ?', (_now(), key))
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        entry = (bytes(row['body']), row['media_type'])
+        with self._lock:
+            self.disk_hits += 1
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key, body: bytes, media_type: str = 'application/json'):
+        self._remember(key, (body, media_type))
+        with db_session() as conn:
+            with conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO result_cache (key, body, media_type, created_at, last_used_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (key, body, media_type, _now(), _now()))
+                with self._lock:
+                    self._writes += 1
+                    prune = self._writes % self.PRUNE_EVERY == 0
+                if prune:
+                    conn.execute('''
+                        DELETE FROM result_cache WHERE key NOT IN (
+                            SELECT key FROM result_cache ORDER BY last_used_at DESC LIMIT ?
+                        )
+                    ''', (self.max_disk_entries,))
+
+    def clear(self, disk: bool = False):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if disk:
+            with db_session() as conn:
+                with conn:
+                    conn.execute('DELETE FROM result_cache')
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": ((self.memory_hits + self.disk_hits) / lookups) if lookups else 0.0,
+            }
+
+    def _remember(self, key, entry):
+        nbytes = len(entry[0])
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec='microseconds')
+
+
+# Process-wide cache of /backtest responses; RESULT_CACHE_MB sizes the memory
+# tier (default 64 MB), RESULT_CACHE_DISK_ENTRIES the disk tier (default 10000)
+result_cache = ResultCache(
+    int(os.getenv("RESULT_CACHE_MB", "64")) * 1024 * 1024,
+    int(os.getenv("RESULT_CACHE_DISK_ENTRIES", "10000")),
+)
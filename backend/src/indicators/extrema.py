@@ -0,0 +1,76 @@
+'''
+rolling maximum / minimum (batch functions plus streaming classes, see
+moving_average.py). the streaming versions keep a monotonic deque of the
+window's candidates, so each bar costs O(1) amortized
+'''
+
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def rolling_max(values, period: int) -> np.ndarray:
+    '''
+    highest value of the last `period` bars, NaN until the window is full.
+    works along axis 0, so (dates x symbols) arrays are fine too.
+    inputs must not be NaN
+    '''
+    return _rolling_extreme(values, period, np.max)
+
+
+def rolling_min(values, period: int) -> np.ndarray:
+    '''
+    lowest value of the last `period` bars, see rolling_max
+    '''
+    return _rolling_extreme(values, period, np.min)
+
+
+def _rolling_extreme(values, period, reduce):
+    values = np.asarray(values, dtype=np.float64)
+    period = int(period)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= period:
+        windows = sliding_window_view(values, period, axis=0)
+        out[period - 1:] = reduce(windows, axis=-1)
+    return out
+
+
+class RollingMax:
+    '''
+    streaming rolling_max()
+    '''
+    def __init__(self, period: int):
+        self.period = int(period)
+        self.count = 0
+        self.window = deque()  # (bar number, value), values decreasing
+
+    def update(self, value: float) -> float:
+        window = self.window
+        while window and window[-1][1] <= value:
+            window.pop()
+        window.append((self.count, value))
+        if window[0][0] <= self.count - self.period:
+            window.popleft()
+        self.count += 1
+        return window[0][1] if self.count >= self.period else float('nan')
+
+
+class RollingMin:
+    '''
+    streaming rolling_min()
+    '''
+    def __init__(self, period: int):
+        self.period = int(period)
+        self.count = 0
+        self.window = deque()  # (bar number, value), values increasing
+
+    def update(self, value: float) -> float:
+        window = self.window
+        while window and window[-1][1] >= value:
+            window.pop()
+        window.append((self.count, value))
+        if window[0][0] <= self.count - self.period:
+            window.popleft()
+        self.count += 1
+        return window[0][1] if self.count >= self.period else float('nan')
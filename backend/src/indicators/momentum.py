@@ -0,0 +1,67 @@
+'''
+relative strength index (batch function plus streaming class, see
+moving_average.py)
+'''
+
+import math
+
+import numpy as np
+
+from .moving_average import ema
+
+
+def rsi(values, period: int = 14) -> np.ndarray:
+    '''
+    Wilder's RSI in [0, 100]: average gain and loss over the first `period`
+    changes, then smoothed as avg = (avg * (period - 1) + x) / period, i.e.
+    an ema with alpha = 1 / period. NaN for the first `period` bars; works
+    along axis 0 like sma
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if len(values) < 2:
+        return out
+    changes = np.diff(values, axis=0)
+    avg_gain = ema(np.maximum(changes, 0.0), period, alpha=1.0 / period)
+    avg_loss = ema(np.maximum(-changes, 0.0), period, alpha=1.0 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        index = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    # no losses at all: 100, or 50 when prices didn't move either
+    out[1:] = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), index)
+    return out
+
+
+class RSI:
+    '''
+    streaming rsi(); inputs must not be NaN
+    '''
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self.changes = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.prev = None
+
+    def update(self, value: float) -> float:
+        prev, self.prev = self.prev, value
+        if prev is None:
+            return math.nan
+        change = value - prev
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+
+        self.changes += 1
+        if self.changes < self.period:
+            self.avg_gain += gain
+            self.avg_loss += loss
+            return math.nan
+        if self.changes == self.period:
+            self.avg_gain = (self.avg_gain + gain) / self.period
+            self.avg_loss = (self.avg_loss + loss) / self.period
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        if self.avg_loss == 0:
+            return 50.0 if self.avg_gain == 0 else 100.0
+        return 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
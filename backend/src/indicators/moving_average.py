@@ -0,0 +1,148 @@
+'''
+simple and exponential moving averages
+
+every indicator in src/indicators comes twice: a batch function over a whole
+NumPy array (vectorized with NumPy/pandas), and a class whose update() takes
+one bar at a time in O(1) and returns that bar's value. both give the same
+values (sma and the rolling extrema bit for bit, the rest to rounding
+error), so a strategy can be run over history in bulk and then kept current
+bar by bar.
+'''
+
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+def sma(values, period: int) -> np.ndarray:
+    '''
+    simple moving average over `period` bars, NaN until the window is full.
+    same values as Series.rolling(period).mean(); works along axis 0, so
+    (dates x symbols) arrays are fine too
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    frame = pd.Series(values) if values.ndim == 1 else pd.DataFrame(values)
+    return frame.rolling(window=int(period)).mean().to_numpy()
+
+
+class SMA:
+    '''
+    streaming sma(). repeats the add/remove steps of pandas' rolling mean
+    (Kahan-compensated running sum, same special cases) so it matches the
+    batch values exactly. NaN inputs are skipped but still take a slot in
+    the window
+    '''
+    def __init__(self, period: int):
+        self.period = int(period)
+        self.values = deque()
+        self.nobs = 0
+        self.sum = 0.0
+        self.neg_ct = 0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.same_value_run = 0
+        self.prev_value = math.nan
+
+    def update(self, value: float) -> float:
+        value = float(value)
+        if self.period <= 1 or not self.values:
+            # pandas starts over when consecutive windows don't overlap
+            self._reset(value)
+        elif len(self.values) == self.period:
+            self._remove(self.values.popleft())
+        self.values.append(value)
+        self._add(value)
+        return self._mean()
+
+    def _reset(self, first_value):
+        self.values.clear()
+        self.nobs = 0
+        self.sum = 0.0
+        self.neg_ct = 0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.same_value_run = 0
+        self.prev_value = first_value
+
+    def _add(self, value):
+        if value != value:
+            return
+        self.nobs += 1
+        y = value - self.compensation_add
+        t = self.sum + y
+        self.compensation_add = t - self.sum - y
+        self.sum = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct += 1
+        # runs of one repeated value return that value exactly
+        if value == self.prev_value:
+            self.same_value_run += 1
+        else:
+            self.same_value_run = 1
+        self.prev_value = value
+
+    def _remove(self, value):
+        if value != value:
+            return
+        self.nobs -= 1
+        y = -value - self.compensation_remove
+        t = self.sum + y
+        self.compensation_remove = t - self.sum - y
+        self.sum = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct -= 1
+
+    def _mean(self):
+        if self.nobs < self.period or self.nobs == 0:
+            return math.nan
+        result = self.sum / self.nobs
+        if self.same_value_run >= self.nobs:
+            return self.prev_value
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.0
+        return result
+
+
+def ema(values, period: int, alpha: float | None = None) -> np.ndarray:
+    '''
+    exponential moving average with alpha = 2 / (period + 1) unless given,
+    seeded with the simple average of the first `period` bars (NaN before
+    that). works along axis 0 like sma; inputs must not be NaN
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    period = int(period)
+    out = np.full(values.shape, np.nan)
+    if period < 1 or len(values) < period:
+        return out
+    frame = pd.Series(values) if values.ndim == 1 else pd.DataFrame(values)
+    seeded = frame.iloc[period - 1:].copy()
+    seeded.iloc[0] = frame.iloc[:period].mean()
+    alpha = 2.0 / (period + 1) if alpha is None else float(alpha)
+    out[period - 1:] = seeded.ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return out
+
+
+class EMA:
+    '''
+    streaming ema(); inputs must not be NaN
+    '''
+    def __init__(self, period: int, alpha: float | None = None):
+        self.period = int(period)
+        self.alpha = 2.0 / (self.period + 1) if alpha is None else float(alpha)
+        self.count = 0
+        self.value = 0.0
+
+    def update(self, value: float) -> float:
+        self.count += 1
+        if self.count < self.period:
+            self.value += value
+            return math.nan
+        if self.count == self.period:
+            self.value = (self.value + value) / self.period
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
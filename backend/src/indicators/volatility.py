@@ -0,0 +1,169 @@
+'''
+rolling standard deviation, Bollinger bands and average true range
+(batch functions plus streaming classes, see moving_average.py)
+'''
+
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .moving_average import SMA, ema, sma
+
+
+def rolling_std(values, period: int) -> np.ndarray:
+    '''
+    population (ddof=0) standard deviation over `period` bars, NaN until the
+    window is full: Series.rolling(period).std(ddof=0). works along axis 0,
+    so (dates x symbols) arrays are fine too
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    frame = pd.Series(values) if values.ndim == 1 else pd.DataFrame(values)
+    return frame.rolling(window=int(period)).std(ddof=0).to_numpy()
+
+
+class RollingStd:
+    '''
+    streaming rolling_std(): Welford's update with a Kahan-compensated mean,
+    adding the new bar and removing the one leaving the window, the way
+    pandas' rolling variance does; agrees with the batch values to rounding
+    error. NaN inputs are skipped but still take a slot in the window
+    '''
+    def __init__(self, period: int):
+        self.period = int(period)
+        self.values = deque()
+        self.nobs = 0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.same_value_run = 0
+        self.prev_value = math.nan
+
+    def update(self, value: float) -> float:
+        value = float(value)
+        if self.period <= 1 or not self.values:
+            self._reset(value)
+        elif len(self.values) == self.period:
+            self._remove(self.values.popleft())
+        self.values.append(value)
+        self._add(value)
+        return self._std()
+
+    def _reset(self, first_value):
+        self.values.clear()
+        self.nobs = 0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.same_value_run = 0
+        self.prev_value = first_value
+
+    def _add(self, value):
+        if value != value:
+            return
+        self.nobs += 1
+        if value == self.prev_value:
+            self.same_value_run += 1
+        else:
+            self.same_value_run = 1
+        self.prev_value = value
+
+        prev_mean = self.mean - self.compensation_add
+        y = value - self.compensation_add
+        t = y - self.mean
+        self.compensation_add = t + self.mean - y
+        self.mean = self.mean + t / self.nobs
+        self.ssqdm = self.ssqdm + (value - prev_mean) * (value - self.mean)
+
+    def _remove(self, value):
+        if value != value:
+            return
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean - self.compensation_remove
+            y = value - self.compensation_remove
+            t = y - self.mean
+            self.compensation_remove = t + self.mean - y
+            self.mean = self.mean - t / self.nobs
+            self.ssqdm = self.ssqdm - (value - prev_mean) * (value - self.mean)
+        else:
+            self.mean = 0.0
+            self.ssqdm = 0.0
+
+    def _std(self):
+        if self.nobs < max(self.period, 1):
+            return math.nan
+        if self.nobs == 1 or self.same_value_run >= self.nobs:
+            return 0.0
+        variance = self.ssqdm / self.nobs
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+def bollinger(values, period: int = 20, num_std: float = 2.0):
+    '''
+    (middle, upper, lower) bands: sma +/- num_std * rolling_std
+    '''
+    middle = sma(values, period)
+    spread = float(num_std) * rolling_std(values, period)
+    return middle, middle + spread, middle - spread
+
+
+class Bollinger:
+    '''
+    streaming bollinger(); update() returns (middle, upper, lower)
+    '''
+    def __init__(self, period: int = 20, num_std: float = 2.0):
+        self.num_std = float(num_std)
+        self.mean = SMA(period)
+        self.std = RollingStd(period)
+
+    def update(self, value: float):
+        middle = self.mean.update(value)
+        spread = self.num_std * self.std.update(value)
+        return middle, middle + spread, middle - spread
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    '''
+    Wilder's average true range: the mean true range of the first `period`
+    bars, then atr = (atr * (period - 1) + tr) / period, i.e. an ema with
+    alpha = 1 / period. NaN before that
+    '''
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    true_range = high - low
+    if len(close) > 1:
+        prev_close = close[:-1]
+        true_range[1:] = np.maximum.reduce([true_range[1:], np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)])
+    return ema(true_range, period, alpha=1.0 / period)
+
+
+class ATR:
+    '''
+    streaming atr(); update(high, low, close) per bar, inputs must not be NaN
+    '''
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self.count = 0
+        self.value = 0.0
+        self.prev_close = None
+
+    def update(self, high: float, low: float, close: float) -> float:
+        true_range = high - low
+        if self.prev_close is not None:
+            true_range = max(true_range, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+
+        self.count += 1
+        if self.count < self.period:
+            self.value += true_range
+            return math.nan
+        if self.count == self.period:
+            self.value = (self.value + true_range) / self.period
+        else:
+            self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict
+
+from src.database.connection import run_in_db_session
+from src.database.models import get_job, get_unfinished_jobs, insert_job, update_job
+
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(BaseException):
+    """
+    Raised by JobContext.report() once the job has been cancelled. Like
+    asyncio.CancelledError it is not an Exception, so handlers that turn
+    errors into HTTP 500s let it through.
+    """
+
+
+class QueueFullError(Exception):
+    """Too many jobs queued or running to accept another."""
+
+
+class JobContext:
+    """
+    Handed to a runner with its request. report() records progress (0..1)
+    and raises JobCancelled after cancel(), so long loops stop at their next
+    report. Safe to call from worker threads.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.progress = 0.0
+        self.message = None
+        self.cancelled = threading.Event()
+        # set once the runner has returned; past that point cancel() is a no-op
+        self.finishing = False
+
+    def report(self, progress: float, message: str | None = None):
+        if self.cancelled.is_set():
+            raise JobCancelled(self.job_id)
+        self.progress = progress
+        if message is not None:
+            self.message = message
+
+
+# runner(request, ctx) -> JSON text of the result
+Runner = Callable[[Dict, JobContext], Awaitable[str]]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+class JobQueue:
+    """
+    Background jobs on the running event loop, persisted in the jobs table.
+    At most max_concurrent run at once (the rest wait queued), and submit()
+    refuses new jobs beyond max_pending queued + running. Jobs still queued
+    or running at shutdown are left that way in the table and resumed, from
+    the start, by the next start().
+    """
+
+    def __init__(self, runners: Dict[str, Runner], max_concurrent: int = 2, max_pending: int = 100):
+        self.runners = runners
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self._active = {}  # job id -> (task, JobContext)
+        self._semaphore = None
+        self._closing = False
+
+    async def start(self) -> int:
+        """
+        Bind to the running loop and resume unfinished jobs; returns how many.
+        """
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._closing = False
+        resumed = 0
+        for job in await run_in_db_session(get_unfinished_jobs):
+            if job['kind'] not in self.runners:
+                await run_in_db_session(update_job, job['id'], status='failed', error=f"Unknown job kind: {job['kind']}", finished_at=_now())
+                continue
+            await run_in_db_session(update_job, job['id'], status='queued', progress=0)
+            self._launch(job['id'], job['kind'], json.loads(job['request']))
+            resumed += 1
+        return resumed
+
+    async def shutdown(self):
+        """
+        Stop every job task without marking it finished, so it resumes on restart.
+        """
+        self._closing = True
+        tasks = [task for task, _ in self._active.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def submit(self, kind: str, request: Dict) -> str:
+        if kind not in self.runners:
+            raise ValueError(f"Unknown job kind: {kind}. Available kinds: {list(self.runners)}")
+        if len(self._active) >= self.max_pending:
+            raise QueueFullError(f"{len(self._active)} jobs already queued or running")
+        job_id = uuid.uuid4().hex
+        await run_in_db_session(insert_job, job_id, kind, json.dumps(request))
+        self._launch(job_id, kind, request)
+        return job_id
+
+    async def get(self, job_id: str) -> Dict | None:
+        """
+        Job status without its result; progress is live while it runs.
+        """
+        job = await run_in_db_session(get_job, job_id)
+        if job is None:
+            return None
+        job.pop('request', None)
+        active = self._active.get(job_id)
+        if active is not None:
+            ctx = active[1]
+            job['progress'] = ctx.progress
+            job['message'] = ctx.message or job['message']
+        return job
+
+    async def result(self, job_id: str) -> Dict | None:
+        return await run_in_db_session(get_job, job_id, True)
+
+    async def cancel(self, job_id: str) -> Dict | None:
+        """
+        Cancel a queued or running job and wait until it has stopped.
+        Work already handed to a worker thread finishes in the background
+        unless it checks ctx.report(). Finished jobs are returned unchanged.
+        """
+        active = self._active.get(job_id)
+        if active is not None:
+            task, ctx = active
+            ctx.cancelled.set()
+            if not ctx.finishing:
+                task.cancel()
+            await asyncio.wait([task])
+        return await self.get(job_id)
+
+    def _launch(self, job_id: str, kind: str, request: Dict):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        ctx = JobContext(job_id)
+        task = asyncio.get_running_loop().create_task(self._run(job_id, kind, request, ctx))
+        self._active[job_id] = (task, ctx)
+
+    async def _run(self, job_id: str, kind: str, request: Dict, ctx: JobContext):
+        try:
+            async with self._semaphore:
+                await run_in_db_session(update_job, job_id, status='running', started_at=_now())
+                result = await self.runners[kind](request, ctx)
+                ctx.finishing = True
+                await run_in_db_session(update_job, job_id, status='succeeded', progress=1.0, message=ctx.message, result=result, finished_at=_now())
+        except (asyncio.CancelledError, JobCancelled):
+            if self._closing:
+                raise
+            await run_in_db_session(update_job, job_id, status='cancelled', message=ctx.message, finished_at=_now())
+        except Exception as e:
+            # HTTPException carries its message in detail
+            error = getattr(e, 'detail', None) or str(e) or type(e).__name__
+            print(f"Job {job_id} ({kind}) failed: {error}")
+            await run_in_db_session(update_job, job_id, status='failed', error=str(error), message=ctx.message, finished_at=_now())
+        finally:
+            self._active.pop(job_id, None)
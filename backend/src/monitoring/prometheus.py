@@ -0,0 +1,178 @@
+"""
+In-process metrics in the Prometheus text exposition format (version 0.0.4).
+
+Counters and histograms are labelled and thread-safe; collectors are
+callbacks that report counters other components already keep (cache hits,
+pool sizes) at scrape time instead of mirroring every update. GET /metrics
+serves registry.render().
+"""
+
+import math
+import threading
+from bisect import bisect_left
+
+# Seconds; covers a cached response (~1 ms) up to a cold multi-symbol run
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if len(labels) != len(self.label_names) or any(name not in labels for name in self.label_names):
+            raise ValueError(f"{self.name} takes labels {list(self.label_names)}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _labels(self, key: tuple) -> dict:
+        return dict(zip(self.label_names, key))
+
+
+class Counter(_Metric):
+    """
+    Monotonic count per label combination.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels=()):
+        super().__init__(name, help, labels)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list:
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """
+    Observations counted into cumulative `le` buckets, with their sum and
+    count, per label combination.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._counts = {}  # key -> per-bucket (not cumulative) counts, +Inf last
+        self._sums = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        # first bucket whose upper bound is >= value
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[slot] += 1
+            self._sums[key] += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> list:
+        samples = []
+        with self._lock:
+            for key, counts in self._counts.items():
+                labels = self._labels(key)
+                total = 0
+                for bound, count in zip(self.buckets + (math.inf,), counts):
+                    total += count
+                    samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, total))
+                samples.append((f"{self.name}_sum", labels, self._sums[key]))
+                samples.append((f"{self.name}_count", labels, total))
+        return samples
+
+
+class Registry:
+    """
+    Every metric and collector rendered by /metrics. A collector is a
+    callable returning (name, kind, help, [(labels, value), ...]) tuples.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels=()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def register_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for collector in collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry behind GET /metrics
+registry = Registry()
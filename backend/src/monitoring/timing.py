@@ -0,0 +1,154 @@
+"""
+Per-stage request timing.
+
+span("name") marks one stage of the request being handled (date-range
+lookup, Alpha Vantage fetch, database read, DataFrame construction, signals,
+simulation, metrics, JSON encoding...). TimingMiddleware times every HTTP
+request into backtester_request_seconds; with SERVER_TIMING=1 it also starts
+a trace per request, and the spans recorded during it are summed by name
+into a Server-Timing response header and the backtester_stage_seconds
+histogram.
+
+Without an active trace span() returns one shared no-op context manager, so
+instrumented code costs a context-variable lookup. Spans on worker threads
+belong to the request as long as the work was handed over with its context
+(asyncio.to_thread does this; plain executors need contextvars.copy_context).
+"""
+
+import os
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from src.monitoring.prometheus import registry
+
+# SERVER_TIMING=1 turns stage spans (and the Server-Timing header) on
+STAGE_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+REQUEST_SECONDS = registry.histogram(
+    "backtester_request_seconds",
+    "HTTP request latency until the response starts, by route",
+    ("method", "route", "status"),
+)
+STAGE_SECONDS = registry.histogram(
+    "backtester_stage_seconds",
+    "Time spent in each request stage (recorded while SERVER_TIMING=1)",
+    ("stage",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+_trace = ContextVar("stage_trace", default=None)
+_NO_SPAN = nullcontext()
+
+
+class Trace:
+    """
+    Seconds spent per stage name (repeated stages add up), in the order the
+    stages first ran.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def server_timing(self, total: float | None = None) -> str:
+        """
+        Server-Timing header value, durations in milliseconds.
+        """
+        with self._lock:
+            stages = list(self.stages.items())
+        if total is not None:
+            stages.append(("total", total))
+        return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in stages)
+
+
+class _Span:
+    __slots__ = ("trace", "name", "started")
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.trace.add(self.name, elapsed)
+        STAGE_SECONDS.observe(elapsed, stage=self.name)
+        return False
+
+
+def span(name: str):
+    """
+    Context manager timing one stage of the current request; a no-op
+    outside a trace.
+    """
+    trace = _trace.get()
+    if trace is None:
+        return _NO_SPAN
+    return _Span(trace, name)
+
+
+def start_trace():
+    """
+    Begin collecting spans in this context; returns (trace, token) for
+    end_trace.
+    """
+    trace = Trace()
+    return trace, _trace.set(trace)
+
+
+def end_trace(token):
+    _trace.reset(token)
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware: request latency histogram for every HTTP request, plus
+    a per-request trace and Server-Timing header while STAGE_TIMING is on.
+    Routes are labelled by their path template, unmatched paths as
+    "unmatched", so the label set stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        trace, token = start_trace() if STAGE_TIMING else (None, None)
+        status = 500  # unless the app gets as far as starting a response
+        latency = None
+
+        async def send_with_timing(message):
+            nonlocal status, latency
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                latency = time.perf_counter() - started
+                if trace is not None:
+                    header = trace.server_timing(total=latency).encode("latin-1")
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if token is not None:
+                end_trace(token)
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                latency if latency is not None else time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
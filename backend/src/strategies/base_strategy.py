@@ -6,27 +6,95 @@ attributes:
 - cash
 - shares owned
 - position (long/flat/short)
-- list of trades
-- list of portfolio values each day
+- ledger: executed trades (TradeLedger, columnar arrays)
+- equity: portfolio value each day (EquityCurve, float64 array)
 
 methods:
-- generate_signals(self, data) -> pd.DataFrame:
+- compute_signals(self, data) -> Dict[str, np.ndarray]: (buy_signal, sell_signal, indicators)
+- generate_signals(self, data) -> pd.DataFrame: (compatibility shim over compute_signals)
+- sweep_signals(cls, cache, params) -> (buy, sell):
 - simulate_trades(self, data, signals) -> pd.DataFrame:
+- simulate_trades_vectorized(self, data, signals) -> Dict:
+- simulate_trades_kernel(self, data, signals, **execution) -> Dict: (stops, sizing)
+- extend(self, data) -> pd.DataFrame: (incremental, needs new_signal_state/step_signals)
+- reset(self): (clears the account, keeps the ledger buffers)
 - calculate_performance(self) -> Dict:
 
 '''
-from abc import ABC, abstractmethod
+from abc import ABC
+import numpy as np
 import pandas as pd
 from typing import Dict
 
+from src.backtesting.kernel import execute_bars
+from src.backtesting.ledger import SIDE_BUY, SIDE_SELL, EquityCurve, TradeLedger
+from src.backtesting.metrics import metrics_from_arrays
+from src.backtesting.vectorized import simulate_long_flat
+from src.monitoring.timing import span
+
+
+def _format_dates(index) -> list:
+    '''
+    YYYY-MM-DD strings for a whole index at once
+    '''
+    if hasattr(index, 'strftime'):
+        return list(index.strftime('%Y-%m-%d'))
+    return [str(d)[:10] for d in index]
+
+
+def _nullable_list(values) -> list:
+    '''
+    float list with NaN replaced by None (null in JSON)
+    '''
+    arr = np.asarray(values, dtype=np.float64)
+    nan_mask = np.isnan(arr)
+    if not nan_mask.any():
+        return arr.tolist()
+    return np.where(nan_mask, None, arr).tolist()
+
+
+# indicator columns passed through to the chart payload when present
+INDICATOR_SERIES = ("fast_ma", "slow_ma", "upper_band", "lower_band")
+SIGNAL_COLUMNS = ("buy_signal", "sell_signal")
+
+
+def _signal_arrays(data: pd.DataFrame, signals):
+    '''
+    (index, close, {column: array}) for either signal format: the
+    DataFrame of generate_signals (its own index and close column) or the
+    dict of compute_signals (arrays aligned with data)
+    '''
+    if isinstance(signals, pd.DataFrame):
+        columns = {col: signals[col].to_numpy() for col in SIGNAL_COLUMNS + INDICATOR_SERIES if col in signals.columns}
+        return signals.index, signals['close'].to_numpy(dtype=np.float64), columns
+    return data.index, data['close'].to_numpy(dtype=np.float64), signals
+
 class BaseStrategy(ABC):
     def __init__(self, initial_cash: float = 100000):
         self.initial_cash = initial_cash
         self.cash = initial_cash
         self.shares_owned = 0
         self.position = "flat"  # flat or long
-        self.trades = []
-        self.portfolio_values = []
+        self.ledger = TradeLedger()
+        self.equity = EquityCurve()
+        # running indicators and last bar seen by extend(); None until it is first called
+        self.signal_state = None
+        self.last_date = None
+
+    def reset(self, capacity: int = 0):
+        '''
+        back to initial_cash and flat with no trades, no portfolio values
+        and no extend() state. the ledger and equity curve keep their
+        buffers (room for `capacity` bars), so a strategy reused across runs
+        doesn't reallocate
+        '''
+        self.cash = self.initial_cash
+        self.shares_owned = 0
+        self.position = "flat"
+        self.ledger.reset()
+        self.equity.reset(capacity)
+        self.signal_state = None
+        self.last_date = None
     
     def buy(self, date, price):
         if self.position == "flat":
@@ -34,12 +102,7 @@ class BaseStrategy(ABC):
             self.cash = 0 
             self.shares_owned = shares_to_buy
             self.position = "long"
-            self.trades.append({
-                "date": date,
-                "action": "buy",
-                "price": price,
-                "shares": shares_to_buy
-            })
+            self.ledger.append(date, SIDE_BUY, price, shares_to_buy)
         else:
             raise ValueError("Cannot buy shares when position is not flat")
 
@@ -50,116 +113,257 @@ class BaseStrategy(ABC):
             self.cash += profit
             self.shares_owned = 0
             self.position = "flat"
-            self.trades.append({
-                "date": date,
-                "action": "sell",
-                "price": price,
-                "shares": shares_to_sell
-            })
+            self.ledger.append(date, SIDE_SELL, price, shares_to_sell)
         else:
             raise ValueError("Cannot sell shares when position is not long")
 
-    @abstractmethod
+    def compute_signals(self, data: pd.DataFrame) -> Dict[str, np.ndarray]:
+        '''
+        signals for the strategy, one array per bar of data:
+        {"buy_signal", "sell_signal", plus any named indicator arrays}.
+        strategies compute them from the price columns as numpy arrays,
+        without copying data. the default falls back to generate_signals for
+        strategies written against the older DataFrame contract
+        '''
+        if type(self).generate_signals is BaseStrategy.generate_signals:
+            raise NotImplementedError(f"{self.__class__.__name__} must implement compute_signals or generate_signals")
+        signals = self.generate_signals(data)
+        return {col: signals[col].to_numpy() for col in signals.columns if col not in data.columns}
+
     def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
         '''
-        generate signals for the strategy
-        input: data - pd.DataFrame with stock data
-        output: pd.DataFrame with signals
+        compatibility shim: data plus one column per compute_signals array.
+        a shallow copy, the caller's frame is left alone
         '''
-        pass
+        if type(self).compute_signals is BaseStrategy.compute_signals:
+            raise NotImplementedError(f"{self.__class__.__name__} must implement compute_signals or generate_signals")
+        df = data.copy(deep=False)
+        for col, values in self.compute_signals(data).items():
+            df[col] = values
+        return df
+
+    @classmethod
+    def accepts_params(cls, params: dict) -> bool:
+        '''
+        whether a parameter combination is worth running (used to prune sweeps)
+        '''
+        return True
+
+    @classmethod
+    def sweep_signals(cls, cache, params: dict):
+        '''
+        (buy_signal, sell_signal) arrays for one parameter combination.
+        cache is a src.backtesting.sweep.IndicatorCache shared by every
+        combination of a sweep; strategies override this to reuse its rolling
+        windows. the default just runs compute_signals on the cached data
+        (symbol by symbol for a multi-symbol cache).
+        '''
+        if isinstance(cache.data, list):
+            # portfolio cache: one column per symbol
+            per_symbol = [cls.sweep_signals(type(cache)(frame), params) for frame in cache.data]
+            return (
+                np.column_stack([buy for buy, _ in per_symbol]),
+                np.column_stack([sell for _, sell in per_symbol]),
+            )
+        signals = cls(**params).compute_signals(cache.data)
+        return np.asarray(signals['buy_signal']), np.asarray(signals['sell_signal'])
+
+    def new_signal_state(self):
+        '''
+        fresh running-indicator state for step_signals. strategies that can
+        be extended bar by bar override both
+        '''
+        raise NotImplementedError(f"{self.__class__.__name__} does not support incremental updates")
+
+    def step_signals(self, state, close: float) -> Dict:
+        '''
+        feed one close into state; returns that bar's buy_signal, sell_signal
+        and indicator values, as generate_signals computes them over the
+        whole series
+        '''
+        raise NotImplementedError(f"{self.__class__.__name__} does not support incremental updates")
+
+    def extend(self, data: pd.DataFrame) -> pd.DataFrame:
+        '''
+        resumable run: only the bars of data after the last one this strategy
+        has seen go through its running indicators and the account (cash,
+        shares, position, trades, portfolio values), so extending by k new
+        bars costs O(k). the first call starts from scratch. trades match
+        simulate_trades over the same bars.
+        returns the generate_signals rows for just the new bars
+        '''
+        if self.signal_state is None:
+            self.reset(len(data))
+            self.signal_state = self.new_signal_state()
+            start = 0
+        else:
+            start = data.index.searchsorted(self.last_date, side='right')
+
+        new_bars = data.iloc[start:].copy()
+        steps = []
+        for date, price in zip(new_bars.index, new_bars['close'].tolist()):
+            step = self.step_signals(self.signal_state, price)
+            if step['buy_signal'] == 1 and self.position == "flat":
+                self.buy(date, price)
+            elif step['sell_signal'] == 1 and self.position == "long":
+                self.sell(date, price)
+
+            self.equity.append(self.cash + (self.shares_owned * price))
+            steps.append(step)
+
+        if steps:
+            self.last_date = new_bars.index[-1]
+            for col in steps[0]:
+                new_bars[col] = [step[col] for step in steps]
+        return new_bars
 
-    def simulate_trades(self, data: pd.DataFrame, signals: pd.DataFrame) -> Dict:
+    def simulate_trades(self, data: pd.DataFrame, signals, columnar: bool = False) -> Dict:
         """
-        Execute trades based on buy/sell signals - common logic for all strategies
+        Execute trades based on buy/sell signals - common logic for all strategies.
+        signals is the compute_signals dict or a generate_signals DataFrame
         """
-        # Reset strategy state
-        self.cash = self.initial_cash  # Use consistent initial cash value
-        self.shares_owned = 0
-        self.position = "flat"
-        self.trades = []
+        index, close, columns = _signal_arrays(data, signals)
+        # Reset strategy state (cash, position, trades and portfolio values)
+        self.reset(len(close))
         
         # Execute trades day by day
-        for index, row in signals.iterrows():
-            date = index  # Use the index (date) since it's set as index
-            price = row['close']
-            
-            # Buy signal
-            if row['buy_signal'] == 1 and self.position == "flat":
-                self.buy(date, price)
-            
-            # Sell signal  
-            elif row['sell_signal'] == 1 and self.position == "long":
-                self.sell(date, price)
+        with span("simulate"):
+            for date, price, buy_signal, sell_signal in zip(
+                index, close.tolist(), columns['buy_signal'].tolist(), columns['sell_signal'].tolist()
+            ):
+                # Buy signal
+                if buy_signal == 1 and self.position == "flat":
+                    self.buy(date, price)
 
-            self.portfolio_values.append({
-                "date": date.strftime('%Y-%m-%d') if hasattr(date, 'strftime') else str(date)[:10],
-                "portfolio_value": self.cash + (self.shares_owned * price)
-            })
+                # Sell signal
+                elif sell_signal == 1 and self.position == "long":
+                    self.sell(date, price)
+
+                self.equity.append(self.cash + (self.shares_owned * price))
         
+        return self._build_results(data, signals, columnar=columnar)
+
+    def simulate_trades_vectorized(self, data: pd.DataFrame, signals, columnar: bool = False) -> Dict:
+        """
+        Same fills, cash and equity curve as simulate_trades, but derived from
+        the signal arrays in bulk instead of iterating rows
+        """
+        index, close, columns = _signal_arrays(data, signals)
+        with span("simulate"):
+            sim = simulate_long_flat(close, columns['buy_signal'], columns['sell_signal'], self.initial_cash)
+
+            self.reset()
+            self.cash = sim["final_cash"]
+            self.shares_owned = sim["final_shares"]
+            self.position = "long" if len(sim["position"]) and sim["position"][-1] == 1 else "flat"
+            self.ledger.load(index[sim["trade_index"]], sim["trade_side"], sim["trade_price"], sim["trade_shares"])
+            self.equity.load(sim["equity"])
+
+        return self._build_results(data, signals, columnar=columnar)
+
+    def simulate_trades_kernel(self, data: pd.DataFrame, signals, columnar: bool = False, **execution) -> Dict:
+        """
+        Bar loop through the compiled execution kernel (src.backtesting.kernel),
+        which adds stop_loss / take_profit / trailing_stop exits and partial
+        position_size on top of buy()/sell(). With no execution options the
+        trades and equity curve are the same as simulate_trades.
+        """
+        index, close, columns = _signal_arrays(data, signals)
+        # intrabar stop checks use the bar's open/high/low when data has them
+        same_bars = index.equals(data.index)
+        prices = {col: data[col].to_numpy() for col in ('open', 'high', 'low') if same_bars and col in data.columns}
+        with span("simulate"):
+            sim = execute_bars(
+                close,
+                columns['buy_signal'],
+                columns['sell_signal'],
+                self.initial_cash,
+                open_=prices.get('open'),
+                high=prices.get('high'),
+                low=prices.get('low'),
+                **execution,
+            )
+
+            self.reset()
+            self.cash = sim["final_cash"]
+            self.shares_owned = sim["final_shares"]
+            self.position = "long" if self.shares_owned > 0 else "flat"
+            self.ledger.load(
+                index[sim["trade_index"]], sim["trade_side"], sim["trade_price"],
+                sim["trade_shares"], sim["trade_reason"],
+            )
+            self.equity.load(sim["equity"])
+
+        return self._build_results(data, signals, columnar=columnar)
+
+    def _build_results(self, data: pd.DataFrame, signals, columnar: bool = False) -> Dict:
+        """
+        Assemble the API payload from the ledger and equity curve; this is
+        the only place they become lists of dicts. columnar=True sends the
+        dates once and every series as a flat list (NaN as None) instead of
+        one {"date", "value"} dict per bar.
+        """
+        index, close, columns = _signal_arrays(data, signals)
         # Calculate final portfolio value
-        final_price = signals.iloc[-1]['close']
+        final_price = close[-1]
         final_portfolio_value = self.cash + (self.shares_owned * final_price)
-        metrics = self.calculate_metrics(data)
-        
-        # Build OHLC candles for frontend chart
-        candles = []
-        if all(col in data.columns for col in ['open', 'high', 'low', 'close']):
-            for idx, row in data.iterrows():
-                candles.append({
-                    "date": idx.strftime('%Y-%m-%d') if hasattr(idx, 'strftime') else str(idx)[:10],
-                    "open": float(row['open']),
-                    "high": float(row['high']),
-                    "low": float(row['low']),
-                    "close": float(row['close']),
-                })
-        
-        # Extract moving averages if available in signals
-        fast_ma_series = []
-        slow_ma_series = []
-        if 'fast_ma' in signals.columns:
-            for idx, val in signals['fast_ma'].items():
-                fast_ma_series.append({
-                    "date": idx.strftime('%Y-%m-%d') if hasattr(idx, 'strftime') else str(idx)[:10],
-                    "value": None if pd.isna(val) else float(val)
-                })
-        if 'slow_ma' in signals.columns:
-            for idx, val in signals['slow_ma'].items():
-                slow_ma_series.append({
-                    "date": idx.strftime('%Y-%m-%d') if hasattr(idx, 'strftime') else str(idx)[:10],
-                    "value": None if pd.isna(val) else float(val)
-                })
-
-        # Extract Bollinger bands if available
-        upper_band_series = []
-        lower_band_series = []
-        if 'upper_band' in signals.columns:
-            for idx, val in signals['upper_band'].items():
-                upper_band_series.append({
-                    "date": idx.strftime('%Y-%m-%d') if hasattr(idx, 'strftime') else str(idx)[:10],
-                    "value": None if pd.isna(val) else float(val)
-                })
-        if 'lower_band' in signals.columns:
-            for idx, val in signals['lower_band'].items():
-                lower_band_series.append({
-                    "date": idx.strftime('%Y-%m-%d') if hasattr(idx, 'strftime') else str(idx)[:10],
-                    "value": None if pd.isna(val) else float(val)
-                })
+        with span("metrics"):
+            metrics = self.calculate_metrics(data)
+        with span("payload"):
+            return self._payload(data, index, columns, final_portfolio_value, metrics, columnar)
+
+    def _payload(self, data: pd.DataFrame, index, columns: Dict, final_portfolio_value: float, metrics: Dict, columnar: bool) -> Dict:
+        """
+        Everything in the _build_results payload besides the metrics
+        """
+        # Format every date once; candles come from data, indicators from signals
+        dates = _format_dates(data.index)
+        signal_dates = dates if index.equals(data.index) else _format_dates(index)
+
+        has_ohlc = all(col in data.columns for col in ['open', 'high', 'low', 'close'])
+        ohlc = {col: data[col].astype(float).tolist() for col in ['open', 'high', 'low', 'close']} if has_ohlc else None
+
+        # Moving averages and Bollinger bands, whichever the strategy produced
+        indicators = {
+            col: _nullable_list(columns[col]) if col in columns else None
+            for col in INDICATOR_SERIES
+        }
+
+        if columnar:
+            if ohlc is not None and signal_dates is not dates:
+                ohlc["dates"] = dates
+            series = {
+                "format": "columnar",
+                "dates": signal_dates,
+                "portfolio_values": _nullable_list(self.equity.values),
+                "candles": ohlc,
+                **indicators,
+            }
+        else:
+            # Build OHLC candles for frontend chart
+            candles = []
+            if ohlc is not None:
+                candles = [
+                    {"date": d, "open": o, "high": h, "low": l, "close": c}
+                    for d, o, h, l, c in zip(dates, ohlc['open'], ohlc['high'], ohlc['low'], ohlc['close'])
+                ]
+            series = {
+                "portfolio_values": self.equity.to_records(signal_dates),
+                "candles": candles,
+                **{
+                    col: [{"date": d, "value": v} for d, v in zip(signal_dates, values)] if values else None
+                    for col, values in indicators.items()
+                },
+            }
 
-        
-        
         return {
-            "trades": self.trades,
-            "total_trades": len(self.trades),
+            "trades": self.ledger.to_records(),
+            "total_trades": len(self.ledger),
             "final_cash": self.cash,
             "final_shares": self.shares_owned,
             "final_portfolio_value": final_portfolio_value,
             "total_return": (final_portfolio_value - 100000) / 100000 * 100,
-            "portfolio_values": self.portfolio_values,
-            "candles": candles,
-            "fast_ma": fast_ma_series if fast_ma_series else None,
-            "slow_ma": slow_ma_series if slow_ma_series else None,
-            "upper_band": upper_band_series if upper_band_series else None,
-            "lower_band": lower_band_series if lower_band_series else None,
+            **series,
             **metrics
         }
         
@@ -167,16 +371,11 @@ class BaseStrategy(ABC):
         '''
         calculate metrics
         '''
-        from src.backtesting.metrics import calculate_full_metrics
-        
-        # Extract just the portfolio values as numbers
-        portfolio_values_list = [pv['portfolio_value'] for pv in self.portfolio_values]
-        
-        return calculate_full_metrics(
-            strategy=self.__class__.__name__,
-            params=self.params,
-            initial_cash=self.initial_cash,
-            trades=self.trades,
-            portfolio_values=portfolio_values_list,
+        return metrics_from_arrays(
+            self.initial_cash,
+            self.equity.values,
+            self.ledger.side,
+            self.ledger.price,
+            self.ledger.shares,
             risk_free_rate=0.02  # Use 2% as default risk-free rate
         )
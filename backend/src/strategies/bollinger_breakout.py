@@ -1,9 +1,19 @@
 from .base_strategy import BaseStrategy
+from .registry import ParamSpec
+from src.indicators.volatility import Bollinger, bollinger
 import pandas as pd
 import numpy as np
 from typing import Dict
 
 class BollingerBreakout(BaseStrategy):
+    '''
+    long when the close breaks above the upper Bollinger band, flat when it breaks below the lower one
+    '''
+    PARAMS = [
+        ParamSpec("period", int, 20, minimum=2, maximum=500, description="bars in the moving average and standard deviation"),
+        ParamSpec("std", float, 2, minimum=0, maximum=10, description="band width in standard deviations"),
+    ]
+
     def __init__(self, period: int = 20, std: int = 2, initial_cash: float = 100000):
         self.params = {
             "period": period,
@@ -11,34 +21,77 @@ class BollingerBreakout(BaseStrategy):
         }
         super().__init__(initial_cash)
 
-    def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
+    def compute_signals(self, data: pd.DataFrame) -> Dict[str, np.ndarray]:
         '''
-        Adds Bollinger Bands and breakout signals to the dataframe:
+        Bollinger Bands and breakout signals from the close column:
         - middle_band: simple moving average over period
         - upper_band: middle + std * rolling_std
         - lower_band: middle - std * rolling_std
         - buy_signal: 1 if close crosses above upper_band
         - sell_signal: 1 if close crosses below lower_band
         '''
+        close = data['close'].to_numpy(dtype=np.float64)
+        middle, upper, lower = bollinger(close, int(self.params["period"]), float(self.params["std"]))
 
-        df = data.copy()
-        period = int(self.params["period"])
-        num_std = float(self.params["std"])
+        # Buy when price crosses above upper band; sell when crosses below lower band
+        buy_signal, sell_signal = breakout_signals(close, upper, lower)
+        return {
+            "middle_band": middle,
+            "upper_band": upper,
+            "lower_band": lower,
+            "buy_signal": buy_signal,
+            "sell_signal": sell_signal,
+        }
 
-        rolling_mean = df['close'].rolling(window=period).mean()
-        rolling_std = df['close'].rolling(window=period).std(ddof=0)
+    def new_signal_state(self):
+        return {
+            "bands": Bollinger(int(self.params["period"]), float(self.params["std"])),
+            "prev": None,  # (close, upper_band, lower_band) of the previous bar
+        }
 
-        df['middle_band'] = rolling_mean
-        df['upper_band'] = rolling_mean + num_std * rolling_std
-        df['lower_band'] = rolling_mean - num_std * rolling_std
+    def step_signals(self, state, close: float) -> Dict:
+        middle, upper, lower = state["bands"].update(close)
 
-        # Prior day values for crossover detection
-        prev_close = df['close'].shift(1)
-        prev_upper = df['upper_band'].shift(1)
-        prev_lower = df['lower_band'].shift(1)
+        prev = state["prev"]
+        state["prev"] = (close, upper, lower)
+        buy = sell = 0
+        if prev is not None:
+            prev_close, prev_upper, prev_lower = prev
+            buy = int(prev_close <= prev_upper and close > upper)
+            sell = int(prev_close >= prev_lower and close < lower)
+        return {
+            "middle_band": middle,
+            "upper_band": upper,
+            "lower_band": lower,
+            "buy_signal": buy,
+            "sell_signal": sell,
+        }
+
+    @classmethod
+    def sweep_signals(cls, cache, params: dict):
+        period = int(params["period"])
+        num_std = float(params["std"])
+        rolling_mean = cache.rolling_mean(period)
+        rolling_std = cache.rolling_std(period)
+        return breakout_signals(
+            cache.close,
+            rolling_mean + num_std * rolling_std,
+            rolling_mean - num_std * rolling_std,
+        )
 
-        # Buy when price crosses above upper band; sell when crosses below lower band
-        df['buy_signal'] = np.where((prev_close <= prev_upper) & (df['close'] > df['upper_band']), 1, 0)
-        df['sell_signal'] = np.where((prev_close >= prev_lower) & (df['close'] < df['lower_band']), 1, 0)
 
-        return df
+def breakout_signals(close: np.ndarray, upper_band: np.ndarray, lower_band: np.ndarray):
+    '''
+    buy when close crosses above upper_band, sell when it crosses below lower_band,
+    comparing each bar with the one before. NaN bands never signal.
+    works along axis 0, so (dates x symbols) arrays are fine too.
+    returns (buy_signal, sell_signal) as 0/1 int arrays
+    '''
+    close = np.asarray(close, dtype=np.float64)
+    upper_band = np.asarray(upper_band)
+    lower_band = np.asarray(lower_band)
+    buy = np.zeros(close.shape, dtype=np.int64)
+    sell = np.zeros(close.shape, dtype=np.int64)
+    buy[1:] = (close[:-1] <= upper_band[:-1]) & (close[1:] > upper_band[1:])
+    sell[1:] = (close[:-1] >= lower_band[:-1]) & (close[1:] < lower_band[1:])
+    return buy, sell
@@ -1,9 +1,19 @@
 from .base_strategy import BaseStrategy
+from .registry import ParamSpec
+from src.indicators.moving_average import SMA, sma
 import pandas as pd
 import numpy as np
 from typing import Dict
 
 class MA_Crossover(BaseStrategy):
+    '''
+    long when the fast moving average crosses above the slow one, flat when it crosses back below
+    '''
+    PARAMS = [
+        ParamSpec("fast_period", int, 10, minimum=1, maximum=500, description="bars in the fast moving average"),
+        ParamSpec("slow_period", int, 30, minimum=1, maximum=1000, description="bars in the slow moving average"),
+    ]
+
     def __init__(self, fast_period: int, slow_period: int, initial_cash: float = 100000):
         self.params = {
             "fast_period": fast_period,
@@ -11,35 +21,66 @@ class MA_Crossover(BaseStrategy):
         }
         super().__init__(initial_cash)
 
-    def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
+    def compute_signals(self, data: pd.DataFrame) -> Dict[str, np.ndarray]:
         '''
-        adds the following columns to the data:
+        arrays from the close column:
         - fast_ma: fast moving average
         - slow_ma: slow moving average
         - buy_signal: 1 if fast_ma crosses above slow_ma, 0 otherwise
         - sell_signal: 1 if fast_ma crosses below slow_ma, 0 otherwise
         '''
+        close = data['close'].to_numpy(dtype=np.float64)
+        fast_ma = sma(close, self.params['fast_period'])
+        slow_ma = sma(close, self.params['slow_period'])
 
-        df = data.copy()
-        df['fast_ma'] = df['close'].rolling(window=self.params['fast_period']).mean()
-        df['slow_ma'] = df['close'].rolling(window=self.params['slow_period']).mean()
-        
         # Detect crossovers (not just when one is above the other)
-        df['fast_above_slow'] = df['fast_ma'] > df['slow_ma']
-        df['fast_above_slow_prev'] = df['fast_above_slow'].shift(1)
-        
-        # Buy signal: fast_ma crosses above slow_ma
-        df['buy_signal'] = np.where(
-            (df['fast_above_slow'] == True) & (df['fast_above_slow_prev'] == False), 1, 0
-        )
-        
-        # Sell signal: fast_ma crosses below slow_ma  
-        df['sell_signal'] = np.where(
-            (df['fast_above_slow'] == False) & (df['fast_above_slow_prev'] == True), 1, 0
+        buy_signal, sell_signal = crossover_signals(fast_ma, slow_ma)
+        return {"fast_ma": fast_ma, "slow_ma": slow_ma, "buy_signal": buy_signal, "sell_signal": sell_signal}
+
+    def new_signal_state(self):
+        return {
+            "fast": SMA(self.params['fast_period']),
+            "slow": SMA(self.params['slow_period']),
+            "above": None,  # fast_ma > slow_ma on the previous bar
+        }
+
+    def step_signals(self, state, close: float) -> Dict:
+        fast_ma = state["fast"].update(close)
+        slow_ma = state["slow"].update(close)
+        above = fast_ma > slow_ma  # False while either is NaN
+        was_above = state["above"]
+        state["above"] = above
+        return {
+            "fast_ma": fast_ma,
+            "slow_ma": slow_ma,
+            "buy_signal": int(was_above is not None and above and not was_above),
+            "sell_signal": int(was_above is not None and not above and was_above),
+        }
+
+    @classmethod
+    def accepts_params(cls, params: dict) -> bool:
+        return params['fast_period'] < params['slow_period']
+
+    @classmethod
+    def sweep_signals(cls, cache, params: dict):
+        return crossover_signals(
+            cache.rolling_mean(params['fast_period']),
+            cache.rolling_mean(params['slow_period']),
         )
-        
-        # Clean up helper columns
-        df = df.drop(['fast_above_slow', 'fast_above_slow_prev'], axis=1)
-        
-        return df
+
+
+def crossover_signals(fast_ma: np.ndarray, slow_ma: np.ndarray):
+    '''
+    buy when fast_ma crosses above slow_ma, sell when it crosses below.
+    bars where either average is still NaN count as "not above", and the
+    first bar never signals because it has no previous bar.
+    works along axis 0, so (dates x symbols) arrays are fine too.
+    returns (buy_signal, sell_signal) as 0/1 int arrays
+    '''
+    above = np.asarray(fast_ma) > np.asarray(slow_ma)
+    buy = np.zeros(above.shape, dtype=np.int64)
+    sell = np.zeros(above.shape, dtype=np.int64)
+    buy[1:] = above[1:] & ~above[:-1]
+    sell[1:] = ~above[1:] & above[:-1]
+    return buy, sell
 
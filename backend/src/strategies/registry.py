@@ -0,0 +1,173 @@
+'''
+strategy registry
+
+maps display names ("Moving Average Crossover") to BaseStrategy subclasses
+without importing them: a strategy is registered by "module:Class" path and
+its module is imported the first time the strategy is used. each class
+declares its parameters as PARAMS, a list of ParamSpec (type, default, valid
+range), which the API uses to fill in defaults and validate requests.
+
+besides the built-in strategies below, strategies are discovered (once, on
+first lookup) from
+- the "quant_backtester.strategies" entry point group: entry point name is
+  the display name, its value the "module:Class" path
+- every *.py file in the directory named by STRATEGY_PLUGIN_DIR; a plugin
+  module registers its classes with registry.register(name, cls)
+'''
+
+import importlib
+import os
+import sys
+import threading
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Dict, List
+
+ENTRY_POINT_GROUP = "quant_backtester.strategies"
+
+# display name -> "module:Class" for the strategies shipped with the backend
+BUILTIN_STRATEGIES = {
+    "Moving Average Crossover": "src.strategies.ma_crossover:MA_Crossover",
+    "Bollinger Breakout": "src.strategies.bollinger_breakout:BollingerBreakout",
+}
+
+
+class ParamSpec:
+    '''
+    one strategy parameter: type (int or float), default and optional
+    inclusive bounds
+    '''
+    def __init__(self, name: str, type: type, default, minimum=None, maximum=None, description: str = ""):
+        self.name = name
+        self.type = type
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.description = description
+
+    def validate(self, value):
+        '''
+        value coerced to the declared type; raises ValueError if it has the
+        wrong type or is out of range
+        '''
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{self.name} must be a number, got {value!r}")
+        if self.type is int:
+            if value != int(value):
+                raise ValueError(f"{self.name} must be a whole number, got {value!r}")
+            value = int(value)
+        else:
+            value = float(value)
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"{self.name} must be >= {self.minimum}, got {value}")
+        if self.maximum is not None and value > self.maximum:
+            raise ValueError(f"{self.name} must be <= {self.maximum}, got {value}")
+        return value
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "type": self.type.__name__,
+            "default": self.default,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "description": self.description,
+        }
+
+
+class StrategyRegistry:
+    '''
+    registered strategies by display name; classes are imported lazily
+    '''
+    def __init__(self, builtins: Dict[str, str] | None = None):
+        self._targets = dict(builtins or {})  # name -> class or "module:Class"
+        self._discovered = False
+        self._lock = threading.RLock()
+
+    def register(self, name: str, target):
+        '''
+        add (or replace) a strategy: target is the class itself or its
+        "module:Class" path, imported on first use
+        '''
+        with self._lock:
+            self._targets[name] = target
+
+    def names(self) -> List[str]:
+        self._discover()
+        return list(self._targets)
+
+    def get(self, name: str):
+        '''
+        the strategy class registered under name, importing it if needed;
+        raises KeyError listing the available names if there is none
+        '''
+        self._discover()
+        with self._lock:
+            target = self._targets.get(name)
+            if target is None:
+                raise KeyError(f"Unknown strategy: {name}. Available strategies: {list(self._targets)}")
+            if isinstance(target, str):
+                module_name, _, attr = target.partition(":")
+                target = getattr(importlib.import_module(module_name), attr)
+                self._targets[name] = target
+            return target
+
+    def params(self, name: str) -> List[ParamSpec]:
+        return list(getattr(self.get(name), "PARAMS", []))
+
+    def defaults(self, name: str) -> Dict:
+        return {spec.name: spec.default for spec in self.params(name)}
+
+    def resolve_params(self, name: str, params: Dict) -> Dict:
+        '''
+        every declared parameter of the strategy, from params or its
+        default, validated against its spec. raises ValueError for unknown
+        names, wrong types and out-of-range values
+        '''
+        specs = {spec.name: spec for spec in self.params(name)}
+        unknown = set(params) - set(specs)
+        if unknown:
+            raise ValueError(f"Unknown parameters for {name}: {sorted(unknown)}. Accepted: {list(specs)}")
+        return {
+            param: spec.validate(params[param]) if param in params else spec.default
+            for param, spec in specs.items()
+        }
+
+    def schema(self, name: str) -> Dict:
+        strategy_cls = self.get(name)
+        return {
+            "name": name,
+            "description": (strategy_cls.__doc__ or "").strip(),
+            "params": [spec.to_dict() for spec in self.params(name)],
+        }
+
+    def _discover(self):
+        if self._discovered:
+            return
+        with self._lock:
+            if self._discovered:
+                return
+            # set first: plugin modules call register() while being imported
+            self._discovered = True
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                self._targets.setdefault(entry_point.name, entry_point.value)
+            plugin_dir = os.getenv("STRATEGY_PLUGIN_DIR")
+            if plugin_dir:
+                for path in sorted(Path(plugin_dir).glob("*.py")):
+                    self._load_plugin(path)
+
+    def _load_plugin(self, path: Path):
+        # imported by plain module name with the directory on sys.path, so
+        # batch worker processes (which inherit sys.path) can unpickle its classes
+        plugin_dir = str(path.parent)
+        if plugin_dir not in sys.path:
+            sys.path.append(plugin_dir)
+        try:
+            importlib.import_module(path.stem)
+        except Exception as e:
+            # one broken plugin shouldn't take the other strategies down
+            print(f"Failed to load strategy plugin {path}: {e}")
+
+
+# Process-wide registry used by the API
+registry = StrategyRegistry(BUILTIN_STRATEGIES)
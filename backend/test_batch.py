@@ -0,0 +1,45 @@
+import json
+import pytest
+
+from benchmarks.synthetic import synthetic_ohlcv
+from src.backtesting.batch import BatchExecutor
+from src.backtesting.engine import BacktestingEngine
+from src.backtesting.sweep import expand_param_grid, evaluate_combinations
+from src.strategies.ma_crossover import MA_Crossover
+from src.strategies.bollinger_breakout import BollingerBreakout
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with BatchExecutor(max_workers=2) as ex:
+        yield ex
+
+
+def test_batch_backtests_match_engine(executor):
+    frames = {"AAA": synthetic_ohlcv(500, 1), "BBB": synthetic_ohlcv(400, 2)}
+    jobs = [
+        {"symbol": "AAA", "strategy": MA_Crossover, "params": {"fast_period": 5, "slow_period": 20}},
+        {"symbol": "BBB", "strategy": MA_Crossover, "params": {"fast_period": 10, "slow_period": 40}},
+        {"symbol": "AAA", "strategy": BollingerBreakout, "params": {"period": 20, "std": 2}},
+        {"symbol": "BBB", "strategy": MA_Crossover, "params": {"fast_period": 5}},  # missing param
+    ]
+    rows = {row["id"]: row for row in executor.run_backtests(frames, jobs)}
+    assert set(rows) == {0, 1, 2, 3}
+
+    for i, job in enumerate(jobs[:3]):
+        expected = BacktestingEngine(job["strategy"](**job["params"])).run(frames[job["symbol"]])
+        assert rows[i]["status"] == "ok"
+        assert rows[i]["result"]["final_portfolio_value"] == pytest.approx(expected["final_portfolio_value"])
+        assert rows[i]["result"]["total_trades"] == expected["total_trades"]
+        assert "portfolio_values" not in rows[i]["result"]
+
+    assert rows[3]["status"] == "error"
+
+
+def test_parallel_sweep_matches_in_process(executor):
+    data = synthetic_ohlcv(600, 3)
+    combos = expand_param_grid({"fast_period": [3, 5, 8, 13], "slow_period": [20, 30, 50]})
+    parallel = executor.run_sweep(data, MA_Crossover, combos)
+    serial = evaluate_combinations(data, MA_Crossover, combos)
+    key = lambda r: (r["params"]["fast_period"], r["params"]["slow_period"])
+    assert sorted(parallel, key=key) == sorted(serial, key=key)
@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks.cases import build_cases
+from benchmarks.run import compare, run_benchmarks
+from benchmarks.synthetic import synthetic_ohlcv
+
+
+def _result(name, best, bars=1000, symbols=1):
+    return {"name": name, "bars": bars, "symbols": symbols, "min": best}
+
+
+def test_compare_flags_slowdowns_beyond_tolerance():
+    baseline = [_result("a", 0.010), _result("b", 0.010), _result("c", 0.010), _result("tiny", 0.0001)]
+    current = [
+        _result("a", 0.014),   # +40%: regression
+        _result("b", 0.011),   # +10%: within tolerance
+        _result("c", 0.005),   # -50%: improvement
+        _result("tiny", 0.0004),  # 4x, but under a millisecond: noise
+        _result("d", 0.010),   # not in the baseline
+    ]
+    report = compare(current, baseline, tolerance=0.25)
+    assert [r["key"] for r in report["regressions"]] == ["a[bars=1000,symbols=1]"]
+    assert [r["key"] for r in report["improvements"]] == ["c[bars=1000,symbols=1]"]
+    assert [r["key"] for r in report["unchanged"]] == ["b[bars=1000,symbols=1]", "tiny[bars=1000,symbols=1]"]
+    assert [r["key"] for r in report["new"]] == ["d[bars=1000,symbols=1]"]
+    assert report["regressions"][0]["change"] == pytest.approx(0.4)
+
+
+def test_synthetic_ohlcv_is_deterministic_and_consistent():
+    frame = synthetic_ohlcv(500, seed=3)
+    assert frame.equals(synthetic_ohlcv(500, seed=3))
+    assert frame.index.is_monotonic_increasing and frame.index.name == "date"
+    assert (frame["high"] >= frame[["open", "close"]].max(axis=1)).all()
+    assert (frame["low"] <= frame[["open", "close"]].min(axis=1)).all()
+
+
+def test_every_case_runs_at_a_small_size(db):
+    cases = build_cases()
+    results = run_benchmarks(cases, [200], [2], log=lambda line: None, min_repeats=1, max_repeats=1, min_seconds=0)
+    assert {r["name"] for r in results} == {case.name for case in cases}
+    assert all(r["repeats"] == 1 and r["min"] > 0 for r in results)
@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+import src.database.connection as connection
+from src.database.models import get_stock_data
+from src.database.cache import OHLCVCache, get_price_frame, ohlcv_cache
+
+
+def _frame(days: int) -> pd.DataFrame:
+    dates = pd.date_range("2020-01-01", periods=days, freq="D", name="date")
+    return pd.DataFrame({c: [1.0] * days for c in ["open", "high", "low", "close", "volume"]}, index=dates)
+
+
+def test_lru_evicts_least_recently_used_by_bytes():
+    size = int(_frame(100).memory_usage(index=True, deep=True).sum())
+    cache = OHLCVCache(max_bytes=size * 2)
+    cache.put("A", _frame(100))
+    cache.put("B", _frame(100))
+    assert cache.get("A") is not None  # A is now most recent
+    cache.put("C", _frame(100))
+    assert cache.get("B") is None
+    assert cache.get("A") is not None and cache.get("C") is not None
+    assert cache.stats()["bytes"] == size * 2
+
+    cache.put("HUGE", _frame(1000))  # over the whole budget: not cached
+    assert cache.get("HUGE") is None
+
+
+@pytest.fixture
+def db(db):
+    conn = connection.get_db_connection()
+    conn.executemany(
+        'INSERT INTO stock_data (symbol, date, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [("SPY", f"2021-01-{d:02d}", d, d + 1, d - 1, d + 0.5, 100 * d) for d in range(1, 29)],
+    )
+    conn.commit()
+    conn.close()
+    return db
+
+
+def test_get_price_frame_slices_match_database(db):
+    frame = get_price_frame("SPY", "2021-01-05", "2021-01-10")
+    rows = get_stock_data("SPY", "2021-01-05", "2021-01-10")
+    assert list(frame.index.strftime("%Y-%m-%d")) == [r["date"] for r in rows]
+    assert frame["close"].tolist() == [r["close"] for r in rows]
+
+    misses = ohlcv_cache.misses
+    get_price_frame("SPY", "2021-01-01", "2021-01-03")
+    assert ohlcv_cache.misses == misses  # served from the cached full history
+
+
+def test_insert_invalidates_cached_symbol(db):
+    from src.api.server import _insert_ohlcv_rows
+
+    assert len(get_price_frame("SPY")) == 28
+    _insert_ohlcv_rows([{"symbol": "SPY", "date": "2021-01-29", "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1}])
+    assert len(get_price_frame("SPY")) == 29
+
+
+def test_load_racing_an_invalidation_is_not_cached(db, monkeypatch):
+    import src.database.cache as cache
+
+    load = cache.load_price_frame
+
+    def load_then_write(symbol):
+        frame = load(symbol)
+        # an insert commits and invalidates while this (older) read is in flight
+        ohlcv_cache.invalidate(symbol)
+        return frame
+
+    monkeypatch.setattr(cache, "load_price_frame", load_then_write)
+    assert len(get_price_frame("SPY")) == 28
+    assert ohlcv_cache.get("SPY") is None
+
+    monkeypatch.setattr(cache, "load_price_frame", load)
+    get_price_frame("SPY")
+    assert ohlcv_cache.get("SPY") is not None
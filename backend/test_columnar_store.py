@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+import src.database.columnar_store as columnar_store
+import src.database.connection as connection
+from src.database.models import (
+    get_stock_data, sync_columnar_store, update_symbol_catalog,
+    invalidate_symbol_catalog,
+)
+
+
+@pytest.fixture
+def db(db, monkeypatch):
+    monkeypatch.setenv("PRICE_STORE", "arrow")
+    conn = connection.get_db_connection()
+    conn.executemany(
+        'INSERT INTO stock_data (symbol, date, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [("TEST", f"2020-01-{d:02d}", d, d + 1, d - 1, d + 0.5, 1000 * d) for d in range(1, 11)],
+    )
+    update_symbol_catalog(conn, ["TEST"])
+    conn.commit()
+    conn.close()
+    invalidate_symbol_catalog()
+    return columnar_store.get_store_dir()
+
+
+def test_arrow_reads_match_sqlite(db, monkeypatch):
+    arrow = get_stock_data("TEST", "2020-01-03", "2020-01-07", columnar=True)
+    assert columnar_store.has_symbol("TEST")  # built on first read
+
+    monkeypatch.setenv("PRICE_STORE", "sqlite")
+    sqlite = get_stock_data("TEST", "2020-01-03", "2020-01-07", columnar=True)
+
+    assert len(arrow["date"]) == 5
+    for name in columnar_store.SCHEMA.names:
+        np.testing.assert_array_equal(arrow[name], sqlite[name])
+        assert arrow[name].dtype == sqlite[name].dtype
+
+    rows = get_stock_data("TEST", "2020-01-03", "2020-01-07")
+    np.testing.assert_array_equal(sqlite["close"], [row["close"] for row in rows])
+
+
+def test_sync_rewrites_file_after_insert(db):
+    sync_columnar_store(["TEST"])
+    conn = connection.get_db_connection()
+    conn.execute("INSERT INTO stock_data (symbol, date, open, high, low, close, volume) VALUES ('TEST', '2020-01-11', 1, 1, 1, 1, 1)")
+    conn.commit()
+    conn.close()
+    assert len(get_stock_data("TEST", columnar=True)["date"]) == 10  # replica not refreshed yet
+
+    sync_columnar_store(["TEST"])
+    assert get_stock_data("TEST", columnar=True)["date"][-1] == np.datetime64("2020-01-11")
+
+
+def test_store_sits_beside_the_database(db, db_path):
+    get_stock_data("TEST", columnar=True)
+    assert db == db_path.parent / "arrow"
+    assert (db / "TEST.arrow").exists()
+
+
+def test_unknown_symbol_is_empty(db):
+    columns = get_stock_data("NOPE", columnar=True)
+    assert not columnar_store.has_symbol("NOPE")
+    assert all(len(values) == 0 for values in columns.values())
+
+
+def test_concurrent_writes_of_one_symbol_use_separate_temp_files(db):
+    from concurrent.futures import ThreadPoolExecutor
+
+    columns = {
+        "date": np.arange("2020-01-01", "2020-04-10", dtype="datetime64[D]"),
+    }
+    n = len(columns["date"])
+    columns.update({col: np.arange(n, dtype=np.float64) for col in ("open", "high", "low", "close")})
+    columns["volume"] = np.arange(n, dtype=np.int64)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(lambda _: columnar_store.write_symbol("RACE", columns), range(32))) == [n] * 32
+    assert list(db.glob("*.tmp")) == []
+    np.testing.assert_array_equal(columnar_store.read_symbol("RACE")["close"], columns["close"])
@@ -0,0 +1,54 @@
+import threading
+
+import src.database.connection as connection
+from src.database.connection import ConnectionPool, db_session
+
+
+def test_pool_applies_pragmas_and_reuses_connections(tmp_path, monkeypatch):
+    monkeypatch.setattr(connection, "get_db_path", lambda: tmp_path / "a.db")
+    pool = ConnectionPool(max_idle=2)
+
+    conn = pool.acquire()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    pool.release(conn)
+
+    assert pool.acquire() is conn
+    pool.release(conn)
+    assert pool.stats() == {"created": 1, "idle": 1, "in_use": 0}
+
+    # a different database file drops connections to the old one
+    monkeypatch.setattr(connection, "get_db_path", lambda: tmp_path / "b.db")
+    other = pool.acquire()
+    assert other is not conn
+    pool.release(other)
+    pool.close_all()
+
+
+def test_nested_sessions_share_one_connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(connection, "get_db_path", lambda: tmp_path / "a.db")
+    with db_session() as outer:
+        with db_session() as inner:
+            assert inner is outer
+    with db_session() as again:
+        assert again is outer  # back from the pool
+
+
+def test_sessions_in_parallel_threads_get_their_own_connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(connection, "get_db_path", lambda: tmp_path / "a.db")
+    barrier = threading.Barrier(4)
+    seen = []
+
+    def worker():
+        with db_session() as conn:
+            barrier.wait()
+            seen.append(conn)
+            conn.execute("SELECT 1").fetchone()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(c) for c in seen}) == 4
@@ -1,7 +1,15 @@
+import pickle
+
+import numpy as np
 import pandas as pd
 import pytest
+
+from benchmarks.synthetic import synthetic_ohlcv
 from src.backtesting.engine import BacktestingEngine
+from src.backtesting.kernel import REASON_STOP_LOSS, REASON_TAKE_PROFIT, REASON_TRAILING_STOP, execute_bars
 from src.strategies.base_strategy import BaseStrategy
+from src.strategies.bollinger_breakout import BollingerBreakout
+from src.strategies.ma_crossover import MA_Crossover
 
 class DummyStrategy(BaseStrategy):
     def generate_signals(self, data):
@@ -102,3 +110,156 @@ def test_engine_empty_dataframe_raises():
     engine = BacktestingEngine(strategy)
     with pytest.raises(IndexError):
         engine.run(data)
+
+
+class RandomSignalStrategy(BaseStrategy):
+    def __init__(self, seed: int = 0):
+        super().__init__()
+        self.params = {"seed": seed}
+        self.seed = seed
+
+    def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
+        rng = np.random.default_rng(self.seed)
+        n = len(data)
+        # includes bars where both signals fire at once
+        return pd.DataFrame({
+            "buy_signal": (rng.random(n) < 0.2).astype(int),
+            "sell_signal": (rng.random(n) < 0.2).astype(int),
+            "close": data["close"].astype(float).values,
+        }, index=data.index)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_vectorized_mode_matches_loop(seed):
+    data = synthetic_ohlcv(300, seed=100 + seed)
+
+    loop = BacktestingEngine(RandomSignalStrategy(seed)).run(data, mode="loop")
+    vec = BacktestingEngine(RandomSignalStrategy(seed)).run(data, mode="vectorized")
+
+    assert vec["trades"] == loop["trades"]
+    assert vec["final_cash"] == loop["final_cash"]
+    assert vec["final_shares"] == loop["final_shares"]
+    assert vec["portfolio_values"] == loop["portfolio_values"]
+    assert vec["sharpe_ratio"] == loop["sharpe_ratio"]
+
+
+def test_vectorized_mode_empty_dataframe_raises():
+    data = pd.DataFrame(columns=["open", "high", "low", "close", "volume"]).set_index(pd.Index([], name=None))
+    engine = BacktestingEngine(DummySignalStrategy(pattern="none"))
+    with pytest.raises(IndexError):
+        engine.run(data, mode="vectorized")
+
+
+def test_engine_unknown_mode_raises():
+    engine = BacktestingEngine(DummySignalStrategy(pattern="none"))
+    with pytest.raises(ValueError):
+        engine.run(_make_ohlcv(days=3), mode="nope")
+
+
+@pytest.mark.parametrize("strategy_cls, params", [
+    (MA_Crossover, {"fast_period": 5, "slow_period": 20}),
+    (BollingerBreakout, {"period": 10, "std": 1}),
+])
+def test_extend_matches_full_run(strategy_cls, params):
+    data = synthetic_ohlcv(400, seed=7)
+    full = BacktestingEngine(strategy_cls(**params)).run(data)
+
+    engine = BacktestingEngine(strategy_cls(**params))
+    engine.extend(data.iloc[:250])
+    # a stored engine picks up where it left off
+    engine = pickle.loads(pickle.dumps(engine))
+    for end in (251, 255, 400):
+        engine.extend(data.iloc[:end])
+    assert len(engine.extend(data)) == 0
+    resumed = engine.results()
+
+    assert resumed["trades"] == full["trades"]
+    assert resumed["portfolio_values"] == full["portfolio_values"]
+    assert resumed["final_portfolio_value"] == full["final_portfolio_value"]
+    assert resumed["sharpe_ratio"] == full["sharpe_ratio"]
+    for col in ("fast_ma", "slow_ma", "upper_band", "lower_band"):
+        if full[col] is None:
+            assert resumed[col] is None
+            continue
+        expected = [p["value"] for p in full[col]]
+        got = [p["value"] for p in resumed[col]]
+        assert [v is None for v in got] == [v is None for v in expected]
+        assert [v for v in got if v is not None] == pytest.approx([v for v in expected if v is not None], rel=1e-12)
+
+
+@pytest.mark.parametrize("mode", ["loop", "vectorized", "kernel"])
+def test_reused_strategy_resets_ledger_and_equity(mode):
+    strategy = MA_Crossover(fast_period=5, slow_period=20)
+    engine = BacktestingEngine(strategy)
+    long_run = engine.run(synthetic_ohlcv(300, seed=3), mode=mode)
+    short = synthetic_ohlcv(120, seed=4)
+    first = engine.run(short, mode=mode)
+    second = engine.run(short, mode=mode)
+
+    assert len(strategy.equity) == 120
+    assert len(strategy.ledger) == first["total_trades"]
+    assert second == first
+    assert BacktestingEngine(MA_Crossover(fast_period=5, slow_period=20)).run(short, mode=mode) == first
+    assert len(long_run["portfolio_values"]) == 300
+
+
+def test_ledger_grows_past_its_initial_buffer():
+    strategy = DummySignalStrategy("alternate")
+    result = BacktestingEngine(strategy).run(_make_ohlcv(days=50))
+    assert result["total_trades"] == 50
+    assert [t["action"] for t in result["trades"][:3]] == ["buy", "sell", "buy"]
+    assert strategy.ledger.price.tolist() == [t["price"] for t in result["trades"]]
+
+
+def test_extend_unsupported_strategy_raises():
+    with pytest.raises(NotImplementedError):
+        BacktestingEngine(DummySignalStrategy()).extend(_make_ohlcv(days=3))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_kernel_mode_matches_loop(seed):
+    data = synthetic_ohlcv(300, seed=100 + seed)
+    loop = BacktestingEngine(RandomSignalStrategy(seed)).run(data, mode="loop")
+    kernel = BacktestingEngine(RandomSignalStrategy(seed)).run(data, mode="kernel")
+
+    assert kernel["trades"] == loop["trades"]
+    assert kernel["final_cash"] == loop["final_cash"]
+    assert kernel["portfolio_values"] == loop["portfolio_values"]
+
+
+def test_kernel_stop_loss_take_profit_and_trailing_stop():
+    # enter at the close of bar 0, then walk the price around
+    close = np.array([100.0, 104.0, 112.0, 101.0, 90.0])
+    buy = np.array([1.0, 0, 0, 0, 0])
+    sell = np.zeros(5)
+
+    opens = np.array([100.0, 103.0, 105.0, 110.0, 97.0])
+    stopped = execute_bars(close, buy, sell, 1000, open_=opens, low=close - 1, stop_loss=0.05)
+    assert stopped["trade_reason"].tolist() == [0, REASON_STOP_LOSS]
+    assert stopped["trade_index"].tolist() == [0, 4]
+    assert stopped["trade_price"][1] == pytest.approx(95.0)
+
+    # bar 2 opens above the target: filled at the open, not the target
+    profit = execute_bars(close, buy, sell, 1000, open_=np.array([100, 103, 111, 101, 90.0]), take_profit=0.10)
+    assert profit["trade_reason"].tolist() == [0, REASON_TAKE_PROFIT]
+    assert profit["trade_price"][1] == 111.0
+
+    trailing = execute_bars(close, buy, sell, 1000, trailing_stop=0.05)
+    assert trailing["trade_reason"].tolist() == [0, REASON_TRAILING_STOP]
+    assert trailing["trade_index"].tolist() == [0, 3]
+    assert trailing["trade_price"][1] == 101.0  # gapped through 112 * 0.95
+
+
+def test_kernel_partial_sizing_keeps_the_rest_in_cash():
+    close = np.array([10.0, 20.0])
+    sim = execute_bars(close, [1, 0], [0, 1], 1000, position_size=0.25)
+    assert sim["trade_shares"].tolist() == [25.0, 25.0]
+    assert sim["equity"].tolist() == [1000.0, 1250.0]
+    with pytest.raises(ValueError):
+        execute_bars(close, [1, 0], [0, 1], 1000, position_size=1.5)
+
+
+def test_execution_options_need_kernel_mode():
+    engine = BacktestingEngine(DummySignalStrategy())
+    with pytest.raises(ValueError):
+        engine.run(_make_ohlcv(days=3), mode="vectorized", stop_loss=0.1)
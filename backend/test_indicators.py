@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicators.extrema import RollingMax, RollingMin, rolling_max, rolling_min
+from src.indicators.momentum import RSI, rsi
+from src.indicators.moving_average import EMA, SMA, ema, sma
+from src.indicators.volatility import ATR, Bollinger, RollingStd, atr, bollinger, rolling_std
+
+
+def _prices(n=300, seed=3):
+    rng = np.random.default_rng(seed)
+    # a flat stretch exercises the repeated-value special cases
+    return np.concatenate([100 + np.cumsum(rng.normal(0, 1, n)), [50.0] * 30])
+
+
+def _stream(indicator, *columns):
+    return np.array([indicator.update(*bar) for bar in zip(*(c.tolist() for c in columns))])
+
+
+def test_streaming_matches_pandas_rolling():
+    close = _prices()
+    rolling = pd.Series(close).rolling
+    for period in (1, 5, 20):
+        np.testing.assert_array_equal(_stream(SMA(period), close), rolling(period).mean().to_numpy())
+        np.testing.assert_allclose(_stream(RollingStd(period), close), rolling(period).std(ddof=0).to_numpy(), rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("period", [1, 2, 5, 20])
+def test_batch_and_streaming_agree(period):
+    close = _prices()
+    high, low = close + 1.5, close - 1.5
+
+    np.testing.assert_array_equal(_stream(SMA(period), close), sma(close, period))
+    np.testing.assert_array_equal(_stream(RollingMax(period), close), rolling_max(close, period))
+    np.testing.assert_array_equal(_stream(RollingMin(period), close), rolling_min(close, period))
+
+    # the other batch versions are vectorized, so they agree to rounding error
+    # (absolute for the std of near-flat windows around a price of ~100)
+    close_enough = dict(rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(_stream(EMA(period), close), ema(close, period), **close_enough)
+    np.testing.assert_allclose(_stream(RollingStd(period), close), rolling_std(close, period), **close_enough)
+    np.testing.assert_allclose(_stream(RSI(period), close), rsi(close, period), **close_enough)
+    np.testing.assert_allclose(_stream(ATR(period), high, low, close), atr(high, low, close, period), **close_enough)
+
+    bands = Bollinger(period, 2)
+    streamed = np.array([bands.update(v) for v in close.tolist()]).T
+    np.testing.assert_allclose(streamed, np.array(bollinger(close, period, 2)), **close_enough)
+
+
+def test_rolling_stats_match_pandas():
+    close = pd.Series(_prices())
+    for period in (1, 5, 20):
+        np.testing.assert_array_equal(sma(close, period), close.rolling(period).mean().to_numpy())
+        np.testing.assert_allclose(rolling_std(close, period), close.rolling(period).std(ddof=0).to_numpy(), rtol=1e-9, atol=1e-12)
+        np.testing.assert_array_equal(rolling_max(close, period), close.rolling(period).max().to_numpy())
+        np.testing.assert_array_equal(rolling_min(close, period), close.rolling(period).min().to_numpy())
+
+
+def test_two_dimensional_inputs_work_per_column():
+    close = np.column_stack([_prices(seed=1), _prices(seed=2)])
+    for func in (sma, ema, rolling_std, rolling_max, rsi):
+        out = func(close, 10)
+        np.testing.assert_array_equal(out[:, 1], func(close[:, 1], 10))
+
+
+def test_known_values():
+    close = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    np.testing.assert_array_equal(ema(close, 3), [np.nan, np.nan, 2.0, 3.0, 4.0])
+    # only gains: RSI pinned at 100
+    np.testing.assert_array_equal(rsi(close, 2), [np.nan, np.nan, 100.0, 100.0, 100.0])
+    # gaps above the previous close widen the true range
+    np.testing.assert_array_equal(atr([2.0, 5.0], [1.0, 4.0], [1.5, 4.5], 2), [np.nan, 2.25])
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pytest
+
+from src.data.alpha_vantage_fetcher import (
+    AlphaVantageError, AlphaVantageFetcher, RateLimitError, TokenBucket,
+    choose_outputsize, parse_daily_series,
+)
+from src.data.ingest import ingest_symbols
+from src.data.refresher import BackgroundRefresher
+
+
+def _series(days: int) -> dict:
+    return {
+        "Time Series (Daily)": {
+            f"2020-01-{d:02d}": {
+                "1. open": "10.0", "2. high": "11.0", "3. low": "9.0",
+                "4. close": str(10.0 + d), "5. volume": "1000",
+            }
+            for d in range(days, 0, -1)  # newest first, like the real API
+        }
+    }
+
+
+class StubAlphaVantage(BaseHTTPRequestHandler):
+    # symbol -> number of rate-limit notices to send before the data
+    throttle = {}
+    calls = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        symbol = parse_qs(urlparse(self.path).query)["symbol"][0]
+        with self.lock:
+            self.calls.append(symbol)
+            remaining = self.throttle.get(symbol, 0)
+            self.throttle[symbol] = max(remaining - 1, 0)
+        if symbol == "BAD":
+            body = {"Error Message": "Invalid API call."}
+        elif remaining:
+            body = {"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute."}
+        else:
+            body = _series(5)
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_url():
+    StubAlphaVantage.throttle = {"MSFT": 2}
+    StubAlphaVantage.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAlphaVantage)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/query"
+    server.shutdown()
+    server.server_close()
+
+
+def test_ingest_retries_rate_limits_and_writes_on_one_thread(stub_url):
+    fetcher = AlphaVantageFetcher("demo", base_url=stub_url, requests_per_minute=6000, burst=10, retry_backoff=0.01)
+    writes = []
+
+    def write(symbol, columns):
+        writes.append((threading.get_ident(), symbol, columns))
+        return len(columns["date"])
+
+    summary = ingest_symbols(fetcher, ["AAPL", "MSFT", "BAD", "NVDA"], write, max_workers=4)
+
+    assert sorted(summary["fetched"]) == ["AAPL", "MSFT", "NVDA"]
+    assert summary["failed"] == ["BAD"]
+    assert summary["rows"] == 15
+    assert StubAlphaVantage.calls.count("MSFT") == 3  # two notices, then data
+    assert {ident for ident, _, _ in writes} == {threading.get_ident()}
+    columns = next(columns for _, symbol, columns in writes if symbol == "AAPL")
+    assert (np.diff(columns["date"]) > np.timedelta64(0)).all()
+    np.testing.assert_array_equal(columns["close"], [11.0, 12.0, 13.0, 14.0, 15.0])
+
+
+def test_streaming_parse_matches_json_for_any_chunking():
+    body = json.dumps({"Meta Data": {"3. Last Refreshed": "2020-01-30"}, **_series(30)}, indent=4).encode()
+    expected = json.loads(body)["Time Series (Daily)"]
+    for size in (1, 7, 64, len(body)):
+        chunks = (body[i:i + size] for i in range(0, len(body), size))
+        columns = parse_daily_series(chunks, capacity=4)  # forces regrowth
+        dates = np.datetime_as_string(columns["date"], unit="D").tolist()
+        assert dates == sorted(expected)
+        assert columns["close"].tolist() == [float(expected[d]["4. close"]) for d in dates]
+        assert columns["volume"].dtype == np.int64
+
+
+def test_streaming_parse_raises_for_notices():
+    with pytest.raises(RateLimitError):
+        parse_daily_series([b'{"Note": "Thank you for using', b' Alpha Vantage!"}'])
+    with pytest.raises(AlphaVantageError, match="Invalid API call"):
+        parse_daily_series([b'{"Error Message": "Invalid API call."}'])
+
+
+def test_fetch_stock_data_returns_sorted_rows(stub_url):
+    fetcher = AlphaVantageFetcher("demo", base_url=stub_url, requests_per_minute=6000)
+    rows = fetcher.fetch_stock_data("AAPL", outputsize="compact")
+    assert [r["date"] for r in rows] == [f"2020-01-0{d}" for d in range(1, 6)]
+    assert rows[0] == {"symbol": "AAPL", "date": "2020-01-01", "open": 10.0, "high": 11.0,
+                       "low": 9.0, "close": 11.0, "volume": 1000}
+
+
+def test_async_fetch_streams_and_retries(stub_url):
+    fetcher = AlphaVantageFetcher("demo", base_url=stub_url, requests_per_minute=6000, burst=10, retry_backoff=0.01)
+
+    async def fetch_all():
+        return await asyncio.gather(*(fetcher.fetch_stock_columns_async(s) for s in ["AAPL", "MSFT", "BAD"]))
+
+    aapl, msft, bad = asyncio.run(fetch_all())
+    assert bad is None
+    assert StubAlphaVantage.calls.count("MSFT") == 3
+    np.testing.assert_array_equal(aapl["close"], msft["close"])
+    assert np.datetime_as_string(aapl["date"], unit="D").tolist()[0] == "2020-01-01"
+
+
+def test_async_fetch_parses_off_the_event_loop(stub_url, monkeypatch):
+    from src.data.alpha_vantage_fetcher import DailySeriesParser
+
+    feed_threads = []
+    feed = DailySeriesParser.feed
+
+    def recording_feed(self, chunk):
+        feed_threads.append(threading.get_ident())
+        return feed(self, chunk)
+
+    monkeypatch.setattr(DailySeriesParser, "feed", recording_feed)
+    fetcher = AlphaVantageFetcher("demo", base_url=stub_url, requests_per_minute=6000)
+
+    async def fetch():
+        return threading.get_ident(), await fetcher.fetch_stock_columns_async("AAPL")
+
+    loop_thread, columns = asyncio.run(fetch())
+    assert len(columns["date"]) == 5
+    assert feed_threads and loop_thread not in feed_threads
+
+
+def test_fetch_gives_up_after_max_retries(stub_url):
+    StubAlphaVantage.throttle = {"MSFT": 5}
+    fetcher = AlphaVantageFetcher("demo", base_url=stub_url, requests_per_minute=6000, max_retries=1, retry_backoff=0.01)
+    assert fetcher.fetch_stock_data("MSFT") is None
+    assert StubAlphaVantage.calls == ["MSFT", "MSFT"]
+
+
+def test_token_bucket_spaces_requests():
+    bucket = TokenBucket(rate=50.0, capacity=1)  # one token every 20ms
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # the first token is there up front, the other five take ~100ms
+    assert time.monotonic() - start >= 0.09
+
+
+def test_choose_outputsize_by_business_day_gap():
+    assert choose_outputsize(None) == "full"
+    assert choose_outputsize("2024-03-01", today="2024-03-04") == "compact"  # Friday -> Monday
+    assert choose_outputsize("2024-01-02", today="2024-05-22") == "full"  # 101 weekdays
+    assert choose_outputsize("2024-01-02", today="2024-05-20") == "compact"  # 99 weekdays
+
+
+def test_background_refresher_runs_until_stopped():
+    ran = threading.Event()
+    calls = []
+
+    def refresh():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("network down")  # logged, schedule continues
+        ran.set()
+
+    refresher = BackgroundRefresher(refresh, interval=0.01).start()
+    assert ran.wait(2)
+    refresher.stop()
+    count = len(calls)
+    time.sleep(0.05)
+    assert len(calls) == count
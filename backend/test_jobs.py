@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+from src.database.models import get_job, insert_job
+from src.jobs.queue import JobQueue
+
+
+async def _count(request, ctx):
+    for i in range(request["steps"]):
+        ctx.report(i / request["steps"], f"step {i}")
+        await asyncio.sleep(0.01)
+    return json.dumps({"n": request["n"]})
+
+
+async def _wait_for(queue, job_id, status, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        job = await queue.get(job_id)
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} is {job['status']}, expected {status}")
+
+
+def test_concurrency_limit_progress_and_cancel(db):
+    async def scenario():
+        queue = JobQueue({"count": _count}, max_concurrent=1)
+        await queue.start()
+        first = await queue.submit("count", {"n": 1, "steps": 1000})
+        second = await queue.submit("count", {"n": 2, "steps": 3})
+
+        running = await _wait_for(queue, first, "running")
+        await asyncio.sleep(0.05)
+        assert (await queue.get(first))["progress"] > running["progress"]
+        assert (await queue.get(second))["status"] == "queued"  # only one slot
+
+        cancelled = await queue.cancel(first)
+        assert cancelled["status"] == "cancelled" and cancelled["finished_at"]
+
+        await _wait_for(queue, second, "succeeded")
+        assert json.loads((await queue.result(second))["result"]) == {"n": 2}
+        assert (await queue.result(first))["result"] is None
+
+    asyncio.run(scenario())
+
+
+def test_unfinished_jobs_resume_after_restart(db):
+    async def first_process():
+        queue = JobQueue({"count": _count})
+        job_id = await queue.submit("count", {"n": 7, "steps": 1000})
+        await _wait_for(queue, job_id, "running")
+        await queue.shutdown()
+        return job_id
+
+    job_id = asyncio.run(first_process())
+    assert get_job(job_id)["status"] == "running"
+    insert_job("orphan", "gone", "{}")
+
+    async def quick(request, ctx):
+        return json.dumps({"n": request["n"]})
+
+    async def second_process():
+        queue = JobQueue({"count": quick})
+        assert await queue.start() == 1
+        return await _wait_for(queue, job_id, "succeeded")
+
+    assert asyncio.run(second_process())["progress"] == 1.0
+    assert json.loads(get_job(job_id, with_result=True)["result"]) == {"n": 7}  # from the stored request
+    assert get_job("orphan")["status"] == "failed"
@@ -1,6 +1,9 @@
 import math
+import numpy as np
 import pytest
 from src.backtesting.metrics import (
+    equity_metrics,
+    trade_metrics,
     get_basic_metrics,
     get_sharpe_ratio,
     get_sortino_ratio,
@@ -78,3 +81,35 @@ def test_calculate_full_metrics_integration():
         assert k in res
     assert res["total_trades"] == 2
     assert res["round_trips"] == 1
+
+
+def test_equity_metrics_batched_matches_each_curve():
+    rng = np.random.default_rng(0)
+    curves = 1000 * np.cumprod(1 + rng.normal(0, 0.01, (300, 5)), axis=0)
+    curves[:, 4] = 1000.0  # flat curve: zero sharpe and volatility
+    batched = equity_metrics(curves, 0.02, initial_cash=1000.0)
+    for k in range(curves.shape[1]):
+        single = calculate_full_metrics("s", {}, 1000.0, [], curves[:, k].tolist(), 0.02)
+        for key, values in batched.items():
+            assert values[k] == pytest.approx(single[key], rel=1e-12)
+    assert batched["sharpe_ratio"][4] == 0.0
+    assert batched["volatility"][4] == 0.0
+
+
+def test_equity_metrics_short_curves():
+    assert equity_metrics([], initial_cash=500.0)["final_portfolio_value"] == 500.0
+    m = equity_metrics([100.0], 0.02)
+    assert (m["sharpe_ratio"], m["sortino_ratio"], m["max_drawdown"], m["volatility"]) == (0.0, 0.0, 0.0, 0.0)
+
+
+def test_trade_metrics_pairs_latest_buy_and_skips_unmatched_sells():
+    # sell with no buy, two buys (the later one pairs), a second sell with nothing open
+    side = [-1, 1, 1, -1, -1]
+    price = [90.0, 100.0, 110.0, 121.0, 80.0]
+    shares = [1.0, 2.0, 1.0, 3.0, 1.0]
+    m = trade_metrics(side, price, shares)
+    assert m["total_trades"] == 5
+    assert m["round_trips"] == 1
+    assert m["avg_win"] == pytest.approx(11.0)
+    assert m["avg_trade_return"] == pytest.approx(0.1)
+    assert trade_metrics([], [], [])["round_trips"] == 0
@@ -0,0 +1,90 @@
+import src.database.connection as connection
+from src.database.models import (
+    create_tables, get_available_symbols, get_date_range, get_symbol_info,
+    symbol_exists, invalidate_symbol_catalog,
+)
+
+
+def _insert(conn, symbol, dates):
+    conn.executemany(
+        'INSERT OR IGNORE INTO stock_data (symbol, date, open, high, low, close, volume) VALUES (?, ?, 1, 1, 1, 1, 1)',
+        [(symbol, d) for d in dates],
+    )
+
+
+def test_catalog_backfilled_from_existing_stock_data(db_path):
+    # a database from before the catalog: only stock_data
+    conn = connection.get_db_connection()
+    conn.execute('''
+        CREATE TABLE stock_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT NOT NULL, date DATE NOT NULL,
+            open REAL NOT NULL, high REAL NOT NULL, low REAL NOT NULL, close REAL NOT NULL,
+            volume INTEGER NOT NULL, UNIQUE(symbol, date)
+        )
+    ''')
+    _insert(conn, "MSFT", ["2020-01-02", "2020-01-03"])
+    _insert(conn, "AAPL", ["2019-05-01", "2021-06-30", "2020-01-01"])
+    conn.commit()
+    conn.close()
+
+    create_tables()
+    assert get_available_symbols() == ["AAPL", "MSFT"]
+    assert get_date_range("AAPL") == ("2019-05-01", "2021-06-30")
+    assert get_symbol_info("AAPL")["row_count"] == 3
+    assert get_date_range("SPY") == (None, None)
+
+
+def test_insert_updates_catalog_in_same_transaction(db_path):
+    from src.api.server import _insert_ohlcv_rows
+
+    create_tables()
+    assert not symbol_exists("SPY")
+
+    row = {"symbol": "SPY", "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1}
+    _insert_ohlcv_rows([{**row, "date": "2022-01-03"}, {**row, "date": "2022-01-04"}])
+    info = get_symbol_info("SPY")
+    assert (info["first_date"], info["last_date"], info["row_count"]) == ("2022-01-03", "2022-01-04", 2)
+    assert info["last_fetched_at"] is not None
+
+    # duplicates are ignored and the count stays exact
+    _insert_ohlcv_rows([{**row, "date": "2022-01-04"}, {**row, "date": "2022-01-05"}])
+    assert get_symbol_info("SPY")["row_count"] == 3
+    assert get_date_range("SPY") == ("2022-01-03", "2022-01-05")
+
+
+def test_catalog_reload_racing_an_invalidation_is_discarded(db_path, monkeypatch):
+    from contextlib import contextmanager
+
+    import src.database.models as models
+
+    create_tables()
+    session = models.db_session
+
+    @contextmanager
+    def session_then_write():
+        with session() as conn:
+            yield conn
+        # a writer commits and invalidates while the reload is in flight
+        invalidate_symbol_catalog()
+
+    monkeypatch.setattr(models, "db_session", session_then_write)
+    assert not symbol_exists("SPY")
+    assert models._catalog is None
+
+
+def test_catalog_picks_up_other_writers_after_ttl(db_path, monkeypatch):
+    import src.database.models as models
+
+    create_tables()
+    assert not symbol_exists("SPY")
+
+    # another process: commits without invalidating this one's mirror
+    conn = connection.get_db_connection()
+    _insert(conn, "SPY", ["2022-01-03"])
+    models.update_symbol_catalog(conn, ["SPY"])
+    conn.commit()
+    conn.close()
+    assert not symbol_exists("SPY")
+
+    monkeypatch.setattr(models, "CATALOG_TTL_SECONDS", 0)
+    assert symbol_exists("SPY")
@@ -0,0 +1,61 @@
+import pytest
+
+from src.monitoring.prometheus import Registry
+from src.monitoring.timing import end_trace, span, start_trace
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram("req_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, route="/x")
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP req_seconds Latency", "# TYPE req_seconds histogram"]
+    assert lines[2:] == [
+        'req_seconds_bucket{route="/x",le="0.1"} 2',
+        'req_seconds_bucket{route="/x",le="1.0"} 3',
+        'req_seconds_bucket{route="/x",le="+Inf"} 4',
+        'req_seconds_sum{route="/x"} 3.65',
+        'req_seconds_count{route="/x"} 4',
+    ]
+    assert latency.count(route="/x") == 4
+
+
+def test_counters_check_labels_and_collectors_render():
+    registry = Registry()
+    fetches = registry.counter("fetches_total", "Fetches", ("outcome",))
+    fetches.inc(outcome="ok")
+    fetches.inc(2, outcome='say "hi"')
+    with pytest.raises(ValueError):
+        fetches.inc(kind="ok")
+    with pytest.raises(ValueError):
+        registry.counter("fetches_total", "Again")
+
+    registry.register_collector(lambda: [("pool_size", "gauge", "Pool", [({}, 3), ({"state": "idle"}, float("inf"))])])
+    text = registry.render()
+    assert 'fetches_total{outcome="ok"} 1\n' in text
+    assert 'fetches_total{outcome="say \\"hi\\""} 2\n' in text
+    assert "# TYPE pool_size gauge\npool_size 3\npool_size{state=\"idle\"} +Inf\n" in text
+    assert fetches.value(outcome="ok") == 1
+
+
+def test_spans_sum_per_stage_only_inside_a_trace():
+    with span("outside"):
+        pass
+
+    trace, token = start_trace()
+    try:
+        for _ in range(3):
+            with span("signals"):
+                pass
+        with span("encode"):
+            pass
+    finally:
+        end_trace(token)
+    with span("after"):
+        pass
+
+    assert list(trace.stages) == ["signals", "encode"]
+    header = trace.server_timing(total=0.5)
+    assert header.startswith("signals;dur=") and header.endswith("total;dur=500.000")
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_ohlcv
+from src.backtesting.engine import BacktestingEngine
+from src.backtesting.portfolio import PortfolioBacktestingEngine, align_frames, normalize_weights
+from src.strategies.ma_crossover import MA_Crossover
+from src.strategies.bollinger_breakout import BollingerBreakout
+
+
+@pytest.mark.parametrize("strategy_cls,params", [
+    (MA_Crossover, {"fast_period": 5, "slow_period": 20}),
+    (BollingerBreakout, {"period": 15, "std": 1.5}),
+])
+def test_portfolio_is_sum_of_single_symbol_runs(strategy_cls, params):
+    frames = {"AAA": synthetic_ohlcv(400, 1), "BBB": synthetic_ohlcv(400, 2), "CCC": synthetic_ohlcv(400, 3)}
+    weights = {"AAA": 0.5, "BBB": 0.3, "CCC": 0.2}
+    result = PortfolioBacktestingEngine(strategy_cls, params, initial_cash=100000, weights=weights).run(frames)
+
+    expected = np.zeros(400)
+    total_trades = 0
+    for symbol, frame in frames.items():
+        cash = 100000 * weights[symbol]
+        single = BacktestingEngine(strategy_cls(**params, initial_cash=cash)).run(frame, mode="vectorized")
+        expected += [pv["portfolio_value"] for pv in single["portfolio_values"]]
+        total_trades += single["total_trades"]
+        assert result["per_symbol"][symbol]["final_value"] == pytest.approx(single["final_portfolio_value"], rel=1e-9)
+
+    assert np.allclose(result["portfolio_values"], expected, rtol=1e-9)
+    assert result["total_trades"] == total_trades
+    assert result["final_portfolio_value"] == pytest.approx(expected[-1], rel=1e-9)
+
+
+def test_align_frames_uses_common_dates():
+    frames = {"AAA": synthetic_ohlcv(100, 1, "2020-01-01"), "BBB": synthetic_ohlcv(100, 2, "2020-01-21")}
+    aligned = align_frames(frames)
+    assert len(aligned["AAA"]) == 80
+    assert aligned["AAA"].index.equals(aligned["BBB"].index)
+
+
+def test_idle_cash_and_weight_validation():
+    frames = {"AAA": synthetic_ohlcv(50, 1)}
+    result = PortfolioBacktestingEngine(MA_Crossover, {"fast_period": 100, "slow_period": 200}, weights={"AAA": 0.4}).run(frames)
+    # no signals: the portfolio just sits in cash
+    assert result["portfolio_values"] == [100000.0] * 50
+
+    with pytest.raises(ValueError):
+        normalize_weights(["AAA", "BBB"], {"AAA": 0.8, "BBB": 0.4})
+    with pytest.raises(ValueError):
+        normalize_weights(["AAA"], {"ZZZ": 0.1})
@@ -0,0 +1,47 @@
+from src.database.result_cache import ResultCache, result_cache_key
+
+
+def test_key_ignores_key_order_and_integral_floats():
+    a = result_cache_key({"symbol": "AAPL", "params": {"fast": 10, "slow": 30}, "cash": 100000})
+    b = result_cache_key({"cash": 100000.0, "params": {"slow": 30.0, "fast": 10}, "symbol": "AAPL"})
+    assert a == b
+    assert a != result_cache_key({"symbol": "AAPL", "params": {"fast": 10, "slow": 31}, "cash": 100000})
+
+
+def test_memory_tier_evicts_least_recently_used(db):
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get_memory("a") == (b"aaaa", "application/json")
+    cache.put("c", b"cccc")  # over budget: "b" is the least recently used
+
+    assert cache.get_memory("b") is None
+    assert cache.get_memory("a") is not None
+    assert cache.stats()["bytes"] == 8
+
+
+def test_disk_tier_outlives_the_instance(db):
+    ResultCache(max_bytes=1024).put("k", b"{}", "application/json")
+
+    fresh = ResultCache(max_bytes=1024)
+    assert fresh.get_memory("k") is None
+    assert fresh.get("k") == (b"{}", "application/json")
+    assert fresh.get_memory("k") is not None  # promoted
+    assert fresh.get("missing") is None
+    assert fresh.stats()["disk_hits"] == 1
+    assert fresh.stats()["misses"] == 1
+
+    fresh.clear(disk=True)
+    assert fresh.get("k") is None
+
+
+def test_disk_tier_pruned_to_most_recently_used(db, monkeypatch):
+    monkeypatch.setattr(ResultCache, "PRUNE_EVERY", 3)
+    cache = ResultCache(max_bytes=1024, max_disk_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, key.encode())
+    cache.clear()
+
+    assert cache.get("a") is None
+    assert cache.get("b") == (b"b", "application/json")
+    assert cache.get("c") == (b"c", "application/json")
@@ -0,0 +1,438 @@
+import asyncio
+import json
+import math
+import numpy as np
+import pandas as pd
+import pytest
+import time
+from fastapi.testclient import TestClient
+
+import src.database.connection as connection
+from src.database.models import update_symbol_catalog, invalidate_symbol_catalog
+from src.database.cache import ohlcv_cache
+from src.database.result_cache import result_cache
+from src.api import server
+from src.api.server import app, COLUMNAR_MEDIA_TYPE
+
+
+def _seed_prices(symbol: str, days: int = 120):
+    conn = connection.get_db_connection()
+    rows = []
+    for i in range(days):
+        price = 100 + 10 * math.sin(i / 7.0) + i * 0.1
+        date = f"2021-{1 + i // 28:02d}-{1 + i % 28:02d}"
+        rows.append((symbol, date, price, price + 1, price - 1, price, 1000))
+    conn.executemany(
+        'INSERT INTO stock_data (symbol, date, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        rows,
+    )
+    update_symbol_catalog(conn, [symbol])
+    conn.commit()
+    conn.close()
+    invalidate_symbol_catalog()
+
+
+@pytest.fixture
+def client(db):
+    _seed_prices("TEST")
+    return TestClient(app)
+
+
+def _backtest_body(**overrides):
+    body = {
+        "symbol": "TEST",
+        "start_date": "2021-01-01",
+        "end_date": "2021-05-08",
+        "strategy": "Moving Average Crossover",
+        "initial_cash": 100000,
+        "strategy_params": {"fast_period": 3, "slow_period": 10},
+    }
+    body.update(overrides)
+    return body
+
+
+def test_backtest_default_records_shape(client):
+    res = client.post("/backtest", json=_backtest_body())
+    assert res.status_code == 200
+    payload = res.json()
+    assert isinstance(payload["portfolio_values"][0], dict)
+    assert set(payload["candles"][0]) == {"date", "open", "high", "low", "close"}
+    assert payload["fast_ma"][0] == {"date": "2021-01-01", "value": None}
+
+
+def test_backtest_columnar_matches_records(client):
+    records = client.post("/backtest", json=_backtest_body()).json()
+    columnar = client.post("/backtest", json=_backtest_body(response_format="columnar")).json()
+
+    assert columnar["format"] == "columnar"
+    assert columnar["dates"] == [pv["date"] for pv in records["portfolio_values"]]
+    assert columnar["portfolio_values"] == [pv["portfolio_value"] for pv in records["portfolio_values"]]
+    assert columnar["candles"]["close"] == [c["close"] for c in records["candles"]]
+    assert columnar["slow_ma"] == [p["value"] for p in records["slow_ma"]]
+    assert columnar["upper_band"] is None
+    assert columnar["trades"] == records["trades"]
+    assert columnar["sharpe_ratio"] == records["sharpe_ratio"]
+
+
+def test_backtest_columnar_via_accept_header(client):
+    res = client.post("/backtest", json=_backtest_body(), headers={"Accept": COLUMNAR_MEDIA_TYPE})
+    assert res.status_code == 200
+    assert res.json()["format"] == "columnar"
+
+
+def test_backtest_unknown_response_format(client):
+    res = client.post("/backtest", json=_backtest_body(response_format="xml"))
+    assert res.status_code == 400
+
+
+def test_backtest_results_cached_until_new_bars_arrive(client):
+    before = client.get("/cache/stats").json()["results"]
+    first = client.post("/backtest", json=_backtest_body())
+    assert first.headers["X-Cache"] == "miss"
+
+    # Parameter order doesn't change the key
+    again = client.post("/backtest", json=_backtest_body(strategy_params={"slow_period": 10, "fast_period": 3}))
+    assert again.headers["X-Cache"] == "hit"
+    assert again.content == first.content
+
+    # The disk tier survives a cold memory tier
+    result_cache.clear()
+    assert client.post("/backtest", json=_backtest_body()).headers["X-Cache"] == "hit"
+    assert result_cache.stats()["disk_hits"] == before["disk_hits"] + 1
+
+    server._insert_ohlcv_rows([{"symbol": "TEST", "date": "2021-05-09", "open": 100.0,
+                                "high": 101.0, "low": 99.0, "close": 100.0, "volume": 1000}])
+    assert client.post("/backtest", json=_backtest_body()).headers["X-Cache"] == "miss"
+
+    stats = client.get("/cache/stats").json()["results"]
+    assert stats["misses"] == before["misses"] + 2
+
+
+def test_backtest_with_stops_uses_kernel(client):
+    plain = client.post("/backtest", json=_backtest_body()).json()
+    stopped = client.post("/backtest", json=_backtest_body(stop_loss=0.01, position_size=0.5)).json()
+    assert stopped["trades"][0]["shares"] == pytest.approx(plain["trades"][0]["shares"] / 2)
+    assert any(trade.get("reason") == "stop_loss" for trade in stopped["trades"])
+
+    assert client.post("/backtest", json=_backtest_body(stop_loss=1.5)).status_code == 400
+
+
+def test_strategies_lists_names_and_parameter_schemas(client):
+    payload = client.get("/strategies").json()
+    assert payload["strategies"][:2] == ["Moving Average Crossover", "Bollinger Breakout"]
+    params = payload["schemas"]["Bollinger Breakout"]["params"]
+    assert [(p["name"], p["type"], p["default"]) for p in params] == [("period", "int", 20), ("std", "float", 2)]
+
+
+def test_backtest_rejects_invalid_strategy_params(client):
+    res = client.post("/backtest", json=_backtest_body(strategy_params={"fast_period": 0}))
+    assert res.status_code == 400
+    assert "fast_period" in res.json()["detail"]
+    assert client.post("/backtest", json=_backtest_body(strategy="Nope")).status_code == 400
+
+
+def test_sweep_ranks_combinations_and_matches_single_backtest(client):
+    body = {
+        "symbol": "TEST",
+        "start_date": "2021-01-01",
+        "end_date": "2021-05-08",
+        "strategy": "Moving Average Crossover",
+        "initial_cash": 100000,
+        "param_grid": {"fast_period": {"start": 2, "stop": 6, "step": 2}, "slow_period": [5, 10, 20]},
+    }
+    res = client.post("/backtest/sweep", json=body)
+    assert res.status_code == 200
+    payload = res.json()
+
+    # fast_period >= slow_period is pruned: (6, 5) drops out of 3 x 3
+    assert payload["combinations"] == 8
+    sharpes = [r["sharpe_ratio"] for r in payload["results"]]
+    assert sharpes == sorted(sharpes, reverse=True)
+
+    best = payload["results"][0]
+    single = client.post("/backtest", json=_backtest_body(strategy_params=best["params"])).json()
+    assert single["sharpe_ratio"] == pytest.approx(best["sharpe_ratio"])
+    assert single["total_trades"] == best["total_trades"]
+
+
+def test_sweep_unknown_strategy(client):
+    body = {
+        "symbol": "TEST", "start_date": "2021-01-01", "end_date": "2021-05-08",
+        "strategy": "Nope", "param_grid": {"x": [1]},
+    }
+    assert client.post("/backtest/sweep", json=body).status_code == 400
+
+
+def test_sweep_rejects_huge_ranges_without_expanding_them(client):
+    import time
+
+    base = {"symbol": "TEST", "start_date": "2021-01-01", "end_date": "2021-05-08", "strategy": "Bollinger Breakout"}
+    started = time.perf_counter()
+    for grid in (
+        {"period": {"start": 2, "stop": 10**10}},
+        {"std": {"start": 0.5, "stop": 10, "step": 1e-9}},
+        {"period": {"start": 2, "stop": 200}, "std": {"start": 0.5, "stop": 5, "step": 0.01}},  # 199 x 451
+    ):
+        for route in ("/backtest/sweep", "/backtest/walk-forward"):
+            res = client.post(route, json={**base, "param_grid": grid})
+            assert res.status_code == 400
+            assert "limit is 20000" in res.json()["detail"]
+    assert time.perf_counter() - started < 1
+
+
+def test_walk_forward_returns_folds_and_stitched_curve(client):
+    body = {
+        "symbol": "TEST", "start_date": "2021-01-01", "end_date": "2021-05-08",
+        "strategy": "Moving Average Crossover",
+        "param_grid": {"fast_period": [2, 3], "slow_period": [5, 10]},
+        "train_bars": 40, "test_bars": 30,
+    }
+    res = client.post("/backtest/walk-forward", json=body)
+    assert res.status_code == 200
+    payload = res.json()
+
+    # 120 bars: test windows at 40-70, 70-100, 100-120
+    assert len(payload["folds"]) == 3
+    assert payload["folds"][0]["test_start"] == payload["dates"][0]
+    assert len(payload["dates"]) == len(payload["portfolio_values"]) == 80
+    assert payload["final_portfolio_value"] == pytest.approx(payload["portfolio_values"][-1])
+    assert all(fold["params"]["fast_period"] in (2, 3) for fold in payload["folds"])
+
+    body["train_bars"] = 200
+    assert client.post("/backtest/walk-forward", json=body).status_code == 400
+
+
+def test_batch_streams_one_line_per_job(client, monkeypatch):
+    import src.api.server as server
+    from src.backtesting.batch import BatchExecutor
+
+    executor = BatchExecutor(max_workers=2)
+    monkeypatch.setattr(server, "batch_executor", executor)
+    body = {
+        "start_date": "2021-01-01",
+        "end_date": "2021-05-08",
+        "jobs": [
+            {"symbol": "test", "strategy": "Moving Average Crossover", "strategy_params": {"fast_period": 3, "slow_period": 10}},
+            {"symbol": "TEST", "strategy": "Bollinger Breakout"},
+        ],
+    }
+    try:
+        res = client.post("/backtest/batch", json=body)
+    finally:
+        executor.shutdown()
+    assert res.status_code == 200
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert sorted(r["id"] for r in rows) == [0, 1]
+    assert all(r["status"] == "ok" for r in rows)
+
+    single = client.post("/backtest", json=_backtest_body()).json()
+    ma_row = next(r for r in rows if r["id"] == 0)
+    assert ma_row["result"]["final_portfolio_value"] == pytest.approx(single["final_portfolio_value"])
+
+
+def test_portfolio_backtest_combines_symbols(client):
+    _seed_prices("OTHER", days=100)
+    body = {
+        "symbols": ["TEST", "other"],
+        "start_date": "2021-01-01",
+        "end_date": "2021-04-08",
+        "strategy": "Moving Average Crossover",
+        "strategy_params": {"fast_period": 3, "slow_period": 10},
+    }
+    res = client.post("/backtest/portfolio", json=body)
+    assert res.status_code == 200
+    payload = res.json()
+    assert payload["symbols"] == ["TEST", "OTHER"]
+    assert len(payload["dates"]) == len(payload["portfolio_values"])
+    assert payload["final_portfolio_value"] == pytest.approx(
+        sum(s["final_value"] for s in payload["per_symbol"].values())
+    )
+
+    body["weights"] = {"TEST": 0.9, "OTHER": 0.9}
+    assert client.post("/backtest/portfolio", json=body).status_code == 400
+
+
+class _FakeFetcher:
+    def __init__(self):
+        self.requests = []
+
+    def iter_fetch(self, symbols, max_workers=None, outputsize="full", columnar=False):
+        for symbol in symbols:
+            self.requests.append((symbol, outputsize[symbol]))
+            dates = np.array(["2021-05-07", "2021-05-10", "2021-05-11"], dtype="datetime64[ns]")
+            ones = np.ones(len(dates))
+            yield symbol, {"date": dates, "open": ones, "high": ones, "low": ones, "close": ones,
+                           "volume": np.ones(len(dates), dtype=np.int64)}
+
+
+def test_refresh_stale_symbols_fetches_compact_gap(client, monkeypatch):
+    import src.api.server as server
+    from src.database.models import get_date_range
+
+    fetcher = _FakeFetcher()
+    monkeypatch.setattr(server, "_alpha_fetcher", lambda: fetcher)
+
+    # seeded "today": nothing to do yet
+    assert server.refresh_stale_symbols(today="2021-05-20")["fetched"] == []
+
+    conn = connection.get_db_connection()
+    conn.execute("UPDATE symbols SET last_fetched_at = NULL")
+    conn.commit()
+    conn.close()
+    invalidate_symbol_catalog()
+
+    summary = server.refresh_stale_symbols(today="2021-05-20")
+    assert fetcher.requests == [("TEST", "compact")]
+    assert summary["rows"] == 2  # only bars after the stored 2021-05-08
+    assert get_date_range("TEST") == ("2021-01-01", "2021-05-11")
+    assert server.refresh_stale_symbols(today="2021-05-12")["fetched"] == []
+
+
+def test_refresh_skips_symbols_fetched_on_the_given_day(client, monkeypatch):
+    import src.api.server as server
+
+    fetcher = _FakeFetcher()
+    fetches_in_use = []
+
+    def iter_fetch(*args, **kwargs):
+        # the downloads run without a pooled connection checked out
+        fetches_in_use.append(connection.pool.stats()["in_use"])
+        yield from _FakeFetcher.iter_fetch(fetcher, *args, **kwargs)
+
+    monkeypatch.setattr(fetcher, "iter_fetch", iter_fetch)
+    monkeypatch.setattr(server, "_alpha_fetcher", lambda: fetcher)
+
+    conn = connection.get_db_connection()
+    conn.execute("UPDATE symbols SET last_fetched_at = '2021-05-20T09:30:00+00:00'")
+    conn.commit()
+    conn.close()
+    invalidate_symbol_catalog()
+
+    assert server.refresh_stale_symbols(today="2021-05-20")["fetched"] == []
+    assert server.refresh_stale_symbols(today="2021-05-21")["fetched"] == ["TEST"]
+    assert fetches_in_use == [0]
+
+
+class _SlowAsyncFetcher:
+    def __init__(self):
+        self.calls = 0
+
+    async def fetch_stock_columns_async(self, symbol, outputsize="full"):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        dates = pd.bdate_range("2021-01-04", periods=60).values.astype("datetime64[ns]")
+        prices = 100 + 10 * np.sin(np.arange(len(dates)) / 5.0)
+        return {"date": dates, "open": prices, "high": prices, "low": prices, "close": prices,
+                "volume": np.full(len(dates), 1000, dtype=np.int64)}
+
+
+def test_concurrent_cold_symbol_loads_share_one_fetch(client, monkeypatch):
+    import src.api.server as server
+
+    fetcher = _SlowAsyncFetcher()
+    monkeypatch.setattr(server, "_alpha_fetcher", lambda: fetcher)
+
+    async def load_many():
+        return await asyncio.gather(*(
+            server._load_price_data("COLD", "2021-01-04", "2021-03-01") for _ in range(5)
+        ))
+
+    frames = asyncio.run(load_many())
+    assert fetcher.calls == 1
+    assert all(len(frame) == len(frames[0]) > 0 for frame in frames)
+    assert frames[0].index[-1] == pd.Timestamp("2021-03-01")
+
+
+def test_backtest_cold_symbol_fetches_via_async_client(client, monkeypatch):
+    import src.api.server as server
+
+    fetcher = _SlowAsyncFetcher()
+    monkeypatch.setattr(server, "_alpha_fetcher", lambda: fetcher)
+    res = client.post("/backtest", json=_backtest_body(symbol="cold", start_date="2021-01-04", end_date="2021-03-20"))
+    assert res.status_code == 200
+    assert res.json()["candles"][0]["date"] == "2021-01-04"
+    assert fetcher.calls == 1
+
+
+def _metric_samples(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_server_timing_header_breaks_down_backtest_stages(client, monkeypatch):
+    import src.monitoring.timing as timing
+
+    assert "Server-Timing" not in client.post("/backtest", json=_backtest_body()).headers
+
+    monkeypatch.setattr(timing, "STAGE_TIMING", True)
+    result_cache.clear(disk=True)
+    ohlcv_cache.invalidate()
+    res = client.post("/backtest", json=_backtest_body())
+    assert res.status_code == 200
+    stages = dict(entry.split(";dur=") for entry in res.headers["Server-Timing"].split(", "))
+    assert list(stages)[-1] == "total"
+    assert {"date_range", "cache_lookup", "db_read", "frame", "signals", "simulate",
+            "metrics", "payload", "encode", "cache_store"} <= set(stages)
+    assert all(float(ms) >= 0 for ms in stages.values())
+    assert float(stages["total"]) >= float(stages["simulate"])
+
+
+def test_metrics_endpoint_reports_latency_caches_and_fetches(client, monkeypatch):
+    import src.api.server as server
+
+    monkeypatch.setattr(server, "_alpha_fetcher", lambda: _SlowAsyncFetcher())
+    client.post("/backtest", json=_backtest_body())
+    client.post("/backtest", json=_backtest_body())  # result cache hit
+    client.post("/backtest", json=_backtest_body(symbol="cold", start_date="2021-01-04", end_date="2021-03-20"))
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = _metric_samples(res.text)
+    assert samples['backtester_request_seconds_count{method="POST",route="/backtest",status="200"}'] >= 3
+    assert samples['backtester_request_seconds_bucket{method="POST",route="/backtest",status="200",le="+Inf"}'] >= 3
+    assert samples['backtester_result_cache_hits_total{tier="memory"}'] >= 1
+    assert 0 < samples["backtester_result_cache_hit_ratio"] <= 1
+    assert samples["backtester_price_cache_misses_total"] >= 1
+    assert samples["backtester_db_connections_created_total"] >= 1
+    assert samples['backtester_db_connections{state="in_use"}'] >= 0
+    assert samples['backtester_price_fetches_total{kind="full",shared="false"}'] >= 1
+
+
+def _wait_for_job(client, job_id, timeout=10.0):
+    for _ in range(int(timeout / 0.05)):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed", "cancelled"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish: {job}")
+
+
+def test_jobs_run_backtests_and_sweeps_in_background(client, monkeypatch):
+    monkeypatch.delenv("ALPHA_VANTAGE_API_KEY", raising=False)
+    with client:  # runs the lifespan, which starts the job queue
+        res = client.post("/jobs", json={"kind": "backtest", "request": _backtest_body()})
+        assert res.status_code == 202
+        job = _wait_for_job(client, res.json()["id"])
+        assert job["status"] == "succeeded" and job["progress"] == 1.0
+        assert client.get(f"/jobs/{job['id']}/result").json() == client.post("/backtest", json=_backtest_body()).json()
+
+        sweep = {k: v for k, v in _backtest_body().items() if k != "strategy_params"}
+        sweep["param_grid"] = {"fast_period": [3, 5], "slow_period": [10, 20]}
+        job_id = client.post("/jobs", json={"kind": "sweep", "request": sweep}).json()["id"]
+        assert _wait_for_job(client, job_id)["message"] == "4/4 combinations"
+        assert client.get(f"/jobs/{job_id}/result").json()["combinations"] == 4
+
+        failed = client.post("/jobs", json={"kind": "backtest", "request": _backtest_body(strategy="Nope")}).json()
+        assert _wait_for_job(client, failed["id"])["status"] == "failed"
+        res = client.get(f"/jobs/{failed['id']}/result")
+        assert res.status_code == 409 and "Unknown strategy" in res.json()["detail"]
+
+        assert client.post("/jobs", json={"kind": "nope", "request": {}}).status_code == 400
+        assert client.post("/jobs", json={"kind": "backtest", "request": {"symbol": "TEST"}}).status_code == 422
+        assert client.get("/jobs/missing").status_code == 404
+        assert client.post(f"/jobs/{job_id}/cancel").json()["status"] == "succeeded"
@@ -1,7 +1,11 @@
+import sys
+
 import pandas as pd
 import numpy as np
+import pytest
 from src.strategies.ma_crossover import MA_Crossover
 from src.strategies.bollinger_breakout import BollingerBreakout
+from src.strategies.registry import BUILTIN_STRATEGIES, StrategyRegistry
 
 
 def _make_prices(vals):
@@ -44,3 +48,92 @@ def test_bollinger_breakout_buy_signal_on_spike():
     # Last day should likely be a buy breakout
     assert signals["buy_signal"].iloc[-1] in [0, 1]
     assert signals["buy_signal"].sum() >= 0
+
+
+def test_bollinger_sweep_signals_match_generate_signals():
+    from src.backtesting.sweep import IndicatorCache
+
+    rng = np.random.default_rng(7)
+    data = _make_prices(list(100 * np.cumprod(1 + rng.normal(0, 0.02, 400))))
+    cache = IndicatorCache(data)
+    for period, std in [(5, 1), (20, 2), (10, 1.5)]:
+        signals = BollingerBreakout(period=period, std=std).generate_signals(data)
+        buy, sell = BollingerBreakout.sweep_signals(cache, {"period": period, "std": std})
+        assert (buy == signals["buy_signal"].to_numpy()).all()
+        assert (sell == signals["sell_signal"].to_numpy()).all()
+
+
+@pytest.mark.parametrize("strat", [MA_Crossover(fast_period=3, slow_period=8), BollingerBreakout(period=10, std=1.5)])
+def test_compute_signals_arrays_match_generate_signals_shim(strat):
+    rng = np.random.default_rng(3)
+    data = _make_prices(list(100 * np.cumprod(1 + rng.normal(0, 0.02, 200))))
+    columns = list(data.columns)
+
+    arrays = strat.compute_signals(data)
+    frame = strat.generate_signals(data)
+    assert list(data.columns) == columns
+    assert list(frame.columns) == columns + list(arrays)
+    for name, values in arrays.items():
+        assert isinstance(values, np.ndarray)
+        np.testing.assert_array_equal(frame[name].to_numpy(), values)
+
+
+def test_dataframe_only_strategy_still_runs():
+    from src.backtesting.engine import BacktestingEngine
+    from src.strategies.base_strategy import BaseStrategy
+
+    class Legacy(BaseStrategy):
+        def generate_signals(self, data):
+            df = data.copy()
+            df['buy_signal'] = [1, 0, 0, 0]
+            df['sell_signal'] = [0, 0, 1, 0]
+            return df
+
+    data = _make_prices([100, 101, 102, 103])
+    assert set(Legacy().compute_signals(data)) == {"buy_signal", "sell_signal"}
+    result = BacktestingEngine(Legacy()).run(data)
+    assert [t["action"] for t in result["trades"]] == ["buy", "sell"]
+
+    class Empty(BaseStrategy):
+        pass
+
+    with pytest.raises(NotImplementedError):
+        Empty().compute_signals(data)
+
+
+def test_expand_param_grid_ranges():
+    from src.backtesting.sweep import expand_param_grid
+
+    grid = expand_param_grid({"period": {"start": 10, "stop": 20, "step": 5}, "std": {"start": 1.0, "stop": 2.0, "step": 0.5}})
+    assert len(grid) == 9
+    assert grid[0] == {"period": 10, "std": 1.0}
+    assert grid[-1] == {"period": 20, "std": 2.0}
+
+
+def test_registry_resolves_defaults_and_validates_ranges():
+    registry = StrategyRegistry(BUILTIN_STRATEGIES)
+    assert registry.get("Moving Average Crossover") is MA_Crossover
+    assert registry.resolve_params("Bollinger Breakout", {"period": 10.0}) == {"period": 10, "std": 2}
+
+    for bad in ({"period": 1}, {"period": 2.5}, {"std": "2"}, {"width": 3}):
+        with pytest.raises(ValueError):
+            registry.resolve_params("Bollinger Breakout", bad)
+    with pytest.raises(KeyError):
+        registry.get("Nope")
+
+
+def test_registry_loads_plugin_directory_lazily(tmp_path, monkeypatch):
+    (tmp_path / "always_long.py").write_text(
+        "from src.strategies.ma_crossover import MA_Crossover\n"
+        "from src.strategies.registry import registry\n"
+        "class AlwaysLong(MA_Crossover):\n"
+        "    pass\n"
+        "registry.register('Always Long', AlwaysLong)\n"
+    )
+    monkeypatch.setenv("STRATEGY_PLUGIN_DIR", str(tmp_path))
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    monkeypatch.setattr("src.strategies.registry.registry", StrategyRegistry(BUILTIN_STRATEGIES))
+    from src.strategies import registry as registry_module
+
+    assert "Always Long" in registry_module.registry.names()
+    assert registry_module.registry.defaults("Always Long") == {"fast_period": 10, "slow_period": 30}
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_ohlcv
+from src.backtesting.batch import BatchExecutor
+from src.backtesting.sweep import evaluate_combinations, expand_param_grid, rank_results
+from src.backtesting.vectorized import simulate_long_flat
+import src.backtesting.walk_forward as walk_forward
+from src.backtesting.walk_forward import WalkForwardEngine, best_train_rows, evaluate_folds, walk_forward_folds
+from src.strategies.ma_crossover import MA_Crossover, crossover_signals
+from src.strategies.bollinger_breakout import BollingerBreakout
+
+
+GRID = {"fast_period": [3, 5, 8], "slow_period": [20, 40]}
+
+
+def test_walk_forward_folds():
+    assert walk_forward_folds(10, 4, 3) == [(0, 4, 7), (3, 7, 10)]
+    assert walk_forward_folds(11, 4, 3) == [(0, 4, 7), (3, 7, 10), (6, 10, 11)]
+    assert walk_forward_folds(10, 4, 3, anchored=True) == [(0, 4, 7), (0, 7, 10)]
+    with pytest.raises(ValueError):
+        walk_forward_folds(4, 4, 3)
+
+
+def test_fold_picks_best_train_combination_and_trades_it_out_of_sample():
+    data = synthetic_ohlcv(400, 1)
+    combos = expand_param_grid(GRID)
+    close = data["close"].to_numpy()
+    rows = evaluate_folds(data, MA_Crossover, combos, [(50, 250, 320)])
+
+    # signals come from the whole series, so warmup uses the bars before the window
+    def signals(params):
+        fast = data["close"].rolling(params["fast_period"]).mean().to_numpy()
+        slow = data["close"].rolling(params["slow_period"]).mean().to_numpy()
+        return crossover_signals(fast, slow)
+
+    best = rows[0]["params"]
+    buy, sell = signals(best)
+    expected = simulate_long_flat(close[250:320], buy[250:320], sell[250:320])
+    np.testing.assert_allclose(rows[0]["test"]["equity"], expected["equity"])
+
+    ranked = rank_results(evaluate_combinations(data.iloc[:250], MA_Crossover, combos), "total_return")
+    rows = evaluate_folds(data, MA_Crossover, combos, [(0, 250, 320)], sort_by="total_return")
+    assert rows[0]["params"] == ranked[0]["params"]
+    assert rows[0]["train_metrics"]["total_return"] == pytest.approx(ranked[0]["total_return"])
+
+
+def test_stitched_curve_compounds_test_windows():
+    data = synthetic_ohlcv(600, 2)
+    engine = WalkForwardEngine(MA_Crossover, GRID, train_bars=200, test_bars=100, initial_cash=50000)
+    result = engine.run(data)
+
+    assert [(f["test_start"], f["test_end"]) for f in result["folds"]] == [
+        (data.index[s].strftime('%Y-%m-%d'), data.index[e - 1].strftime('%Y-%m-%d'))
+        for _, s, e in walk_forward_folds(600, 200, 100)
+    ]
+    assert result["dates"][0] == data.index[200].strftime('%Y-%m-%d')
+    assert len(result["portfolio_values"]) == len(result["dates"]) == 400
+
+    # each window starts from the equity the previous one ended with
+    capital = 50000
+    for fold, (_, s, e) in zip(result["folds"], walk_forward_folds(600, 200, 100)):
+        window = result["portfolio_values"][s - 200:e - 200]
+        growth = 1 + fold["test_metrics"]["total_return"]
+        assert window[-1] == pytest.approx(capital * growth)
+        capital = window[-1]
+    assert result["final_portfolio_value"] == pytest.approx(capital)
+    assert result["total_return"] == pytest.approx(capital / 50000 - 1)
+
+    # positions are closed at the end of every test window
+    actions = [t["action"] for t in result["trades"]]
+    assert actions.count("buy") == actions.count("sell")
+
+
+def test_parallel_walk_forward_matches_in_process():
+    data = synthetic_ohlcv(700, 3)
+    # 32 combinations x 6 folds: enough work to go to the pool
+    engine = WalkForwardEngine(BollingerBreakout, {"period": list(range(10, 50, 5)), "std": [1.0, 1.5, 2.0, 2.5]}, train_bars=150, test_bars=100)
+    serial = engine.run(data)
+    with BatchExecutor(max_workers=2) as executor:
+        seen = []
+        parallel = engine.run(data, executor=executor, progress=lambda done, total: seen.append((done, total)))
+    assert parallel == serial
+    assert seen[-1] == (32, 32)
+    assert len(seen) > 1  # chunks reported from the workers too
+
+
+def test_streamed_and_chunked_searches_pick_the_same_winners(monkeypatch):
+    data = synthetic_ohlcv(500, 5)
+    combos = expand_param_grid({"fast_period": [3, 5, 8, 13], "slow_period": [20, 30, 40]})
+    folds = walk_forward_folds(500, 150, 100)
+    def summary(rows):
+        return [(r["fold"], r["params"], r["train_metrics"], r["test"]["equity"].tolist()) for r in rows]
+
+    whole = summary(evaluate_folds(data, MA_Crossover, combos, folds))
+
+    # blocks of two combinations at a time
+    monkeypatch.setattr(walk_forward, "METRICS_BLOCK", 2)
+    seen = []
+    assert summary(evaluate_folds(data, MA_Crossover, combos, folds, progress=lambda done, total: seen.append(done))) == whole
+    assert seen == list(range(2, 13, 2))
+
+    # chunks searched separately (as by worker processes), then merged
+    chunks = [best_train_rows(data, MA_Crossover, combos[i:i + 5], folds, offset=i) for i in range(0, len(combos), 5)]
+    best = [rank_results([chunk[f] for chunk in chunks])[0] for f in range(len(folds))]
+    assert summary(evaluate_folds(data, MA_Crossover, combos, folds, best=best)) == whole
+
+
+def test_walk_forward_rejects_bad_sort_metric():
+    with pytest.raises(ValueError):
+        WalkForwardEngine(MA_Crossover, GRID, train_bars=100, test_bars=50, sort_by="nope").run(synthetic_ohlcv(300, 4))
+
+
+def test_oversized_grid_is_refused_before_expansion():
+    engine = WalkForwardEngine(MA_Crossover, {"fast_period": {"start": 2, "stop": 10**9}, "slow_period": {"start": 20, "stop": 10**9}})
+    with pytest.raises(ValueError, match="limit is 20000"):
+        engine.combinations()